@@ -12,6 +12,7 @@ from sinner.Benchmark import Benchmark
 from sinner.Parameters import Parameters
 from sinner.BatchProcessingCore import BatchProcessingCore
 from sinner.Sinner import Sinner
+from sinner.processors.frame.FaceEnhancer import FaceEnhancer
 from sinner.gui.GUIForm import GUIForm
 from sinner.webcam.WebCam import WebCam
 from sinner.utilities import limit_resources
@@ -20,6 +21,7 @@ from sinner.utilities import limit_resources
 class Sin(Sinner):
     gui: bool
     benchmark: bool
+    export_enhancer: bool
     camera: bool
     max_memory: int
 
@@ -39,6 +41,8 @@ class Sin(Sinner):
             window.mainloop()
         elif self.benchmark is True:
             Benchmark(parameters=self.parameters)
+        elif self.export_enhancer is True:
+            FaceEnhancer(parameters=self.parameters).export()
         elif self.camera is True:
             WebCam(parameters=self.parameters).run()
         else:
@@ -1,7 +1,9 @@
 import shutil
+import threading
+import time
 from argparse import Namespace
-from concurrent.futures import ThreadPoolExecutor, as_completed, Future
-from typing import List, Any, Iterable, Callable
+from functools import partial
+from typing import List, Any, Iterable, Callable, Iterator
 
 import os
 
@@ -12,12 +14,18 @@ from sinner.models.State import State
 from sinner.Status import Status, Mood
 from sinner.handlers.frame.BaseFrameHandler import BaseFrameHandler
 from sinner.handlers.frame.DirectoryHandler import DirectoryHandler
+from sinner.handlers.frame.FFmpegVideoHandler import FFmpegVideoHandler
 from sinner.handlers.frame.ImageHandler import ImageHandler
 from sinner.handlers.frame.VideoHandler import VideoHandler
+from sinner.models.FrameDeduplicator import FrameDeduplicator
+from sinner.models.FramesPipeline import FramesPipeline
+from sinner.models.MemoryGovernor import MemoryGovernor
+from sinner.models.ModelRegistry import ModelRegistry
 from sinner.models.NumberedFrame import NumberedFrame
+from sinner.models.ReorderBuffer import ReorderBuffer
+from sinner.processors.ProcessorsChain import ProcessorsChain
 from sinner.processors.frame.BaseFrameProcessor import BaseFrameProcessor
-from sinner.typing import Frame
-from sinner.utilities import list_class_descendants, resolve_relative_path, is_image, is_video, get_mem_usage, suggest_max_memory, path_exists, is_dir, normalize_path, suggest_execution_threads, suggest_temp_dir
+from sinner.utilities import list_class_descendants, load_class, resolve_relative_path, is_image, is_video, get_mem_usage, suggest_max_memory, path_exists, is_dir, normalize_path, suggest_execution_threads, suggest_temp_dir
 from sinner.validators.AttributeLoader import Rules
 
 
@@ -28,12 +36,22 @@ class BatchProcessingCore(Status):
     temp_dir: str
     extract_frames: bool
     keep_frames: bool
+    stream_frames: bool
+    pipe_result: bool
+    fuse_processors: bool
+    pipe_checkpoint: bool
     max_memory: int
     execution_threads: int
+    decode_threads: int
+    save_threads: int
+    queue_size: int
+    batch_size: int
+    batch_latency: int
+    duplicate_threshold: float
 
     parameters: Namespace
 
-    _statistics: dict[str, int] = {'mem_rss_max': 0, 'mem_vms_max': 0, 'limits_reaches': 0}
+    _statistics: dict[str, int] = {'mem_rss_max': 0, 'mem_vms_max': 0}
     _output_file: str | None = None  # despite the output_path value, the output file name can be changed during the execution process
 
     def rules(self) -> Rules:
@@ -41,6 +59,7 @@ class BatchProcessingCore(Status):
             {
                 'parameter': 'max-memory',  # key defined in Sin, but class can be called separately in tests
                 'default': suggest_max_memory(),
+                'help': 'The maximum amount of memory (in GB), held by frames in processing'
             },
             {
                 'parameter': 'execution-threads',
@@ -48,6 +67,48 @@ class BatchProcessingCore(Status):
                 'default': suggest_execution_threads(),
                 'help': 'The count of simultaneous processing threads'
             },
+            {
+                'parameter': 'decode-threads',
+                'type': int,
+                'default': 1,
+                'valid': lambda: self.decode_threads > 0,
+                'help': 'The count of threads, that decode (or extract) target frames for processing'
+            },
+            {
+                'parameter': 'save-threads',
+                'type': int,
+                'default': 2,
+                'valid': lambda: self.save_threads > 0,
+                'help': 'The count of threads, that save processed frames'
+            },
+            {
+                'parameter': 'batch-size',
+                'type': int,
+                'default': 1,
+                'valid': lambda: self.batch_size > 0,
+                'help': 'The maximal count of frames, that a processing thread passes to models at once'
+            },
+            {
+                'parameter': 'batch-latency',
+                'type': int,
+                'default': 50,
+                'valid': lambda: self.batch_latency >= 0,
+                'help': 'The maximal time (in milliseconds) to wait for frames to fill a batch'
+            },
+            {
+                'parameter': 'duplicate-threshold',
+                'type': float,
+                'default': 0,
+                'valid': lambda: self.duplicate_threshold >= 0,
+                'help': 'Reuse the processed result for a frame, which differs from a recent frame less than the threshold (0 disables)'
+            },
+            {
+                'parameter': 'queue-size',
+                'type': int,
+                'default': lambda: self.execution_threads * self.batch_size * 2,
+                'valid': lambda: self.queue_size > 0,
+                'help': 'The capacity (in frames) of queues between decoding, processing and saving'
+            },
             {
                 'parameter': {'target', 'target-path'},
                 'attribute': 'target_path',
@@ -80,6 +141,26 @@ class BatchProcessingCore(Status):
                 'default': False,
                 'help': 'Keep temporary frames after processing'
             },
+            {
+                'parameter': 'stream-frames',
+                'default': True,
+                'help': 'Decode video targets in a single stream instead of extracting every frame separately'
+            },
+            {
+                'parameter': 'fuse-processors',
+                'default': False,
+                'help': 'Apply the whole processors chain to each frame in a single pass, saving only the final result'
+            },
+            {
+                'parameter': 'pipe-result',
+                'default': False,
+                'help': 'Pipe frames of the last processor straight into the video encoder instead of saving them as temp frames'
+            },
+            {
+                'parameter': 'pipe-checkpoint',
+                'default': False,
+                'help': 'Also save piped frames as temp frames, so an interrupted processing can be resumed'
+            },
             {
                 'parameter': 'temp-dir',
                 'default': lambda: suggest_temp_dir(self.temp_dir),
@@ -112,21 +193,31 @@ class BatchProcessingCore(Status):
         self.configure_output_filename()
 
     def run(self) -> None:
-        current_target_path = self.target_path
+        current_target_path: str | None = self.target_path
         temp_resources: List[str] = []  # list of temporary created resources
-        for processor_name in self.frame_processor:
-            current_processor = BaseFrameProcessor.create(processor_name, self.parameters)
+        processors_chains = self.suggest_processors_chains()
+        for processor_index, processors_names in enumerate(processors_chains):
+            processor_name = '+'.join(processors_names)
+            current_processor = BaseFrameProcessor.create(processor_name, self.parameters) if len(processors_names) == 1 else ProcessorsChain(processors_names, self.parameters)
             handler = self.suggest_handler(current_target_path, self.parameters)
             state = State(parameters=self.parameters, target_path=current_target_path, temp_dir=self.temp_dir, frames_count=handler.fc, processor_name=processor_name)
             current_processor.configure_state(state)
             current_processor.configure_output_filename(self.configure_output_filename)
+            state.sync()  # frames files could be changed since the journal was written (e.g. by the interrupted run)
             if state.is_finished:
                 self.update_status(f'Processing with {processor_name} already done ({state.processed_frames_count}/{state.frames_count})')
             else:
                 if state.is_started:
                     self.update_status(f'Temp resources for this target already exists with {state.processed_frames_count} frames processed, continue processing with {state.processor_name}')
+                result_handler = self.suggest_result_handler() if processor_index == len(processors_chains) - 1 else None
                 if current_processor.self_processing:
                     current_processor.process(handler, state)
+                elif result_handler is not None:
+                    self.pipe_process(current_processor, handler, state, result_handler)
+                    current_processor.release_resources()
+                    temp_resources.append(state.path)
+                    current_target_path = None  # the result is already encoded
+                    break
                 else:
                     self.process(current_processor, handler, state)
                 current_processor.release_resources()
@@ -136,25 +227,39 @@ class BatchProcessingCore(Status):
         if current_target_path is not None:
             handler = self.suggest_handler(self.target_path, self.parameters)
             handler.result(from_dir=current_target_path, filename=str(self._output_file), audio_target=self.target_path)
-        else:
+        elif not self.pipe_result:
             self.update_status('Target path is empty, ignoring', mood=Mood.BAD)
 
+        if ModelRegistry.shared().records:
+            self.update_status(f'Loaded models: {ModelRegistry.shared().statistics}')
+        ModelRegistry.shared().release()
+
         if self.keep_frames is False:
             self.update_status('Deleting temp resources')
             for dir_path in temp_resources:
                 shutil.rmtree(dir_path, ignore_errors=True)
 
-    def process_frame(self, frame_num: int, extract: Callable[[int], NumberedFrame], process: Callable[[Frame], Frame], save: Callable[[NumberedFrame], None]) -> None:
-        try:
-            numbered_frame = extract(frame_num)
-            numbered_frame.frame = process(numbered_frame.frame)
-            save(numbered_frame)
-        except Exception as exception:
-            self.update_status(message=str(exception), mood=Mood.BAD)
-            quit()
+    def suggest_processors_chains(self) -> List[List[str]]:
+        """
+        Splits processors to the sequence of passes over the target frames. When processors fusing is enabled,
+        consecutive frame-by-frame processors are joined to one pass. Self-processing processors always use own pass
+        """
+        chains: List[List[str]] = []
+        is_fusible_chain = False
+        for processor_name in self.frame_processor:
+            processor_class = load_class(resolve_relative_path('processors/frame'), processor_name)
+            is_fusible = self.fuse_processors and not getattr(processor_class, 'self_processing', False)
+            if is_fusible and is_fusible_chain:
+                chains[-1].append(processor_name)
+            else:
+                chains.append([processor_name])
+            is_fusible_chain = is_fusible
+        return chains
 
     def process(self, processor: BaseFrameProcessor, handler: BaseFrameHandler, state: State) -> None:
         handler.current_frame_index = state.processed_frames_count
+        is_streaming = self.stream_frames and handler.streamable
+        frames: Iterable[int] | Iterable[NumberedFrame] = handler.stream(state.processed_frames_count) if is_streaming else handler
         with tqdm(
                 total=state.frames_count,
                 desc=state.processor_name, unit='frame',
@@ -162,7 +267,7 @@ class BatchProcessingCore(Status):
                 bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}{postfix}]',
                 initial=state.processed_frames_count,
         ) as progress:
-            self.multi_process_frame(processor=processor, frames=handler, extract=handler.extract_frame, save=state.save_temp_frame, progress=progress)
+            self.multi_process_frame(processor=processor, frames=frames, extract=handler.extract_frame, save=state.save_temp_frame, progress=progress)
         _, lost_frames = state.final_check()
         if lost_frames:
             with tqdm(
@@ -171,29 +276,128 @@ class BatchProcessingCore(Status):
                     dynamic_ncols=True,
                     bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}{postfix}]',
             ) as progress:
-                self.multi_process_frame(processor=processor, frames=lost_frames, extract=handler.extract_frame, save=state.save_temp_frame, progress=progress)
+                frames = self.select_frames(handler, lost_frames) if is_streaming else lost_frames
+                self.multi_process_frame(processor=processor, frames=frames, extract=handler.extract_frame, save=state.save_temp_frame, progress=progress)
+        handler.release_resources()
         is_ok, _ = state.final_check()
         if not is_ok:
             raise Exception("Something went wrong on processed frames check")
 
-    def multi_process_frame(self, processor: BaseFrameProcessor, frames: Iterable[int], extract: Callable[[int], NumberedFrame], save: Callable[[NumberedFrame], None], progress: tqdm) -> None:  # type: ignore[type-arg]
-        def process_done(future_: Future[None]) -> None:
-            futures.remove(future_)
-            progress.set_postfix(self.get_postfix(len(futures)))
+    def suggest_result_handler(self) -> FFmpegVideoHandler | None:
+        """
+        Returns the handler, which can encode the result from frames stream, if piping is enabled and possible
+        """
+        if self.pipe_result and is_video(self.target_path) and FFmpegVideoHandler.available():
+            handler = self.suggest_handler(self.target_path, self.parameters)
+            if isinstance(handler, FFmpegVideoHandler):
+                return handler
+        return None
+
+    def pipe_process(self, processor: BaseFrameProcessor, handler: BaseFrameHandler, state: State, result_handler: FFmpegVideoHandler) -> None:
+        """
+        Processes frames and pipes them into the result encoder. Frames are processed out of order, so they pass
+        through the reorder buffer. Frames, that already saved in the state (e.g. from the interrupted run) are reused
+        """
+        def save(numbered_frame: NumberedFrame) -> None:
+            if self.pipe_checkpoint:
+                state.save_temp_frame(numbered_frame)
+            buffer.put(numbered_frame)
+
+        def encode() -> None:
+            try:
+                encoded.append(result_handler.encode(buffer, filename=str(self._output_file), audio_target=self.target_path))
+            finally:
+                buffer.close()
+
+        state.sync()  # saved frames are read back, so the journal should match frames files
+        saved_frames = set(state.processed_frames_indexes)
+        buffer = ReorderBuffer(capacity=self.execution_threads * 4)
+        encoded: List[bool] = []
+        encoder = threading.Thread(target=encode)
+        encoder.start()
+        try:
+            with tqdm(
+                    total=state.frames_count,
+                    desc=state.processor_name, unit='frame',
+                    dynamic_ncols=True,
+                    bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}{postfix}]',
+            ) as progress:
+                frames = self.pipe_frames(handler, state, saved_frames, buffer, progress)
+                self.multi_process_frame(processor=processor, frames=frames, extract=handler.extract_frame, save=save, progress=progress, on_stop=buffer.close)  # the source can wait for the buffer space
+        finally:
+            buffer.close()
+            encoder.join()
+        handler.release_resources()
+        if buffer.next_index < state.frames_count or not all(encoded):
+            raise Exception(f"Something went wrong on frames piping: {buffer.next_index} of {state.frames_count} frames encoded")
+
+    def pipe_frames(self, handler: BaseFrameHandler, state: State, saved_frames: set[int], buffer: ReorderBuffer, progress: tqdm) -> Iterator[int] | Iterator[NumberedFrame]:  # type: ignore[type-arg]
+        """
+        Yields frames to process in the resulting order, passing already saved frames directly to the buffer
+        """
+        start_frame = 0
+        while start_frame in saved_frames:  # the saved sequence start is not decoded at all
+            buffer.wait_for_space()
+            if buffer.closed:
+                return
+            buffer.put(NumberedFrame(start_frame, state.read_temp_frame(start_frame)))
             progress.update()
+            start_frame += 1
+        frames: Iterable[int] | Iterable[NumberedFrame] = handler.stream(start_frame) if self.stream_frames and handler.streamable else range(start_frame, handler.fc)
+        for frame in frames:
+            buffer.wait_for_space()
+            if buffer.closed:  # the encoder or the processing is stopped
+                break
+            frame_index = frame.index if isinstance(frame, NumberedFrame) else frame
+            if frame_index in saved_frames:
+                buffer.put(NumberedFrame(frame_index, state.read_temp_frame(frame_index)))
+                progress.update()
+            else:
+                yield frame  # type: ignore[misc]
 
-        with ThreadPoolExecutor(max_workers=self.execution_threads) as executor:
-            futures: list[Future[None]] = []
-            for frame_num in frames:
-                future: Future[None] = executor.submit(self.process_frame, frame_num, extract, processor.process_frame, save)
-                future.add_done_callback(process_done)
-                futures.append(future)
-                progress.set_postfix(self.get_postfix(len(futures)))
-                if get_mem_usage('vms', 'g') >= self.max_memory:
-                    futures[:1][0].result()
-                    self._statistics['limits_reaches'] += 1
-            for completed_future in as_completed(futures):
-                completed_future.result()
+    @staticmethod
+    def select_frames(handler: BaseFrameHandler, frames_indexes: List[int]) -> Iterator[NumberedFrame]:
+        """
+        Streams only the requested frames, decoding the target once, starting from the first requested frame
+        """
+        remaining_indexes = set(frames_indexes)
+        for numbered_frame in handler.stream(min(remaining_indexes)):
+            if numbered_frame.index in remaining_indexes:
+                remaining_indexes.remove(numbered_frame.index)
+                yield numbered_frame
+                if not remaining_indexes:
+                    break
+
+    def multi_process_frame(self, processor: BaseFrameProcessor, frames: Iterable[int] | Iterable[NumberedFrame], extract: Callable[[int], NumberedFrame], save: Callable[[NumberedFrame], None], progress: tqdm, on_stop: Callable[[], None] | None = None) -> None:  # type: ignore[type-arg]
+        """
+        Processes frames in the decode-process-save pipeline. Frames can be passed either as indexes (each frame will be
+        extracted by a decoding thread), or as already decoded frames (e.g. from a handler stream)
+        :param on_stop: called, if the processing is stopped by an error, see FramesPipeline.run()
+        """
+        postfix_time = time.perf_counter()
+
+        def frame_done(_: NumberedFrame) -> None:
+            nonlocal postfix_time
+            progress.update()
+            if time.perf_counter() - postfix_time >= 1:  # memory usage and queues statistics are not needed on every frame
+                postfix_time = time.perf_counter()
+                progress.set_postfix(self.get_postfix(pipeline, deduplicator))
+
+        process: Callable[[NumberedFrame], NumberedFrame] = processor.process_numbered_frame
+        process_batch: Callable[[List[NumberedFrame]], List[NumberedFrame]] = processor.process_numbered_frames
+        deduplicator: FrameDeduplicator | None = None
+        if self.duplicate_threshold > 0:  # duplicates are caught in front of the processor, results are reused
+            deduplicator = FrameDeduplicator(self.duplicate_threshold)
+            process = partial(deduplicator.process, process=processor.process_numbered_frame)
+            process_batch = partial(deduplicator.process_batch, process_batch=processor.process_numbered_frames)
+        governor = MemoryGovernor.shared(self.max_memory * 1024 ** 3)
+        pipeline = FramesPipeline(extract=extract, process=process, save=save, decode_workers=self.decode_threads, process_workers=self.execution_threads, save_workers=self.save_threads, queue_size=self.queue_size, governor=governor, process_batch=process_batch, batch_size=self.batch_size, batch_latency=self.batch_latency / 1000)
+        try:
+            pipeline.run(frames, on_done=frame_done, on_stop=on_stop)
+        except Exception as exception:
+            self.update_status(message=f"Frames processing failed: {exception}", mood=Mood.BAD)
+            raise
+        progress.set_postfix(self.get_postfix(pipeline, deduplicator))
 
     def get_mem_usage(self) -> str:
         mem_rss = get_mem_usage()
@@ -205,14 +409,13 @@ class BatchProcessingCore(Status):
         return '{:.2f}'.format(mem_rss).zfill(5) + 'MB [MAX:{:.2f}'.format(self._statistics['mem_rss_max']).zfill(5) + 'MB]' + '/' + '{:.2f}'.format(mem_vms).zfill(5) + 'MB [MAX:{:.2f}'.format(
             self._statistics['mem_vms_max']).zfill(5) + 'MB]'
 
-    def get_postfix(self, futures_length: int) -> dict[str, Any]:
-        postfix = {
+    def get_postfix(self, pipeline: FramesPipeline, deduplicator: FrameDeduplicator | None = None) -> dict[str, Any]:
+        return {
             'memory_usage': self.get_mem_usage(),
-            'futures': futures_length,
+            **MemoryGovernor.shared().statistics,
+            **pipeline.statistics,
+            **(deduplicator.statistics if deduplicator is not None else {}),
         }
-        if self._statistics['limits_reaches'] > 0:
-            postfix['limit_reaches'] = self._statistics['limits_reaches']
-        return postfix
 
     @staticmethod
     def suggest_handler(target_path: str | None, parameters: Namespace) -> BaseFrameHandler:  # todo: refactor this
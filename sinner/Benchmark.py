@@ -2,15 +2,21 @@ import os
 import shutil
 import time
 from argparse import Namespace
+from itertools import islice
 from typing import List, Any
 from colorama import Fore, Style
 
+import numpy
 import onnxruntime
 import psutil
 import torch
 
 from sinner.BatchProcessingCore import BatchProcessingCore
 from sinner.Status import Status
+from sinner.helpers.FrameHelper import available_frame_formats, read_from_image, write_to_image
+from sinner.models.NumberedFrame import NumberedFrame
+from sinner.processors.frame.FaceEnhancer import FaceEnhancer
+from sinner.typing import Frame
 from sinner.utilities import resolve_relative_path, get_app_dir, suggest_execution_providers, decode_execution_providers, list_class_descendants
 from sinner.validators.AttributeLoader import Rules
 
@@ -29,6 +35,8 @@ class Benchmark(Status):
     execution_threads: int
     frame_processors: list[str]
     temp_dir: str
+    frame_formats: bool
+    enhancer_engines: bool
 
     results: List[dict[str, Any]] = []
     parameters: Namespace
@@ -83,6 +91,16 @@ class Benchmark(Status):
                 'choices': list_class_descendants(resolve_relative_path('processors/frame'), 'BaseFrameProcessor'),
                 'help': 'Select the frame processor from available processors'
             },
+            {
+                'parameter': 'frame-formats',
+                'default': False,
+                'help': 'Benchmark temporary frames formats write and read throughput instead of the frame processor'
+            },
+            {
+                'parameter': 'enhancer-engines',
+                'default': False,
+                'help': 'Benchmark FaceEnhancer engines speed and their results difference instead of the frame processor'
+            },
             {
                 'module_help': 'The benchmarking module'
             }
@@ -95,6 +113,14 @@ class Benchmark(Status):
         self.parameters = parameters
         self.update_parameters(parameters)  # load validated values back to parameters
 
+        if self.frame_formats:
+            self.benchmark_frame_formats()
+            return
+
+        if self.enhancer_engines:
+            self.benchmark_enhancer_engines()
+            return
+
         if self.execution_provider is None:
             execution_providers = onnxruntime.get_available_providers()
         else:
@@ -154,6 +180,59 @@ class Benchmark(Status):
                 r_time = f'{Fore.BLUE}{r_time}{Style.RESET_ALL}'
             self.update_status(f"Result for {Fore.YELLOW}{stats['processor']}{Style.RESET_ALL} with {p_style}{provider}{Style.RESET_ALL} on {Fore.YELLOW}{stats['threads']}{Style.RESET_ALL} thread(s) = {r_time}ns (~{seconds} sec -> {fps} FPS)")
 
+    def get_frames(self, count: int = 10) -> List[NumberedFrame]:
+        """
+        Returns first frames of the target (an image, a video or a frames directory), extracted by the target handler
+        """
+        handler = BatchProcessingCore.suggest_handler(self.target_path, self.parameters)
+        if handler.streamable:
+            frames = list(islice(handler.stream(), count))
+        else:
+            frames = [handler.extract_frame(frame_index) for frame_index in range(min(count, handler.fc))]
+        handler.release_resources()
+        return frames
+
+    def benchmark_frame_formats(self) -> None:
+        frames = self.get_frames()
+        variants: List[tuple[str, int | None]] = [(frame_format, None) for frame_format in available_frame_formats()]
+        variants += [('png', png_compression) for png_compression in [0, 1, 3, 6, 9]]
+        for frame_format, png_compression in variants:
+            formats_dir = os.path.join(self.temp_dir, 'frame_formats')
+            shutil.rmtree(formats_dir, ignore_errors=True)
+            formats_paths = [os.path.join(formats_dir, f'{numbered_frame.index}.{frame_format}') for numbered_frame in frames]
+            start_time = time.time_ns()
+            for numbered_frame, frame_path in zip(frames, formats_paths):
+                write_to_image(numbered_frame.frame, frame_path, png_compression)
+            write_time = time.time_ns() - start_time
+            start_time = time.time_ns()
+            for frame_path in formats_paths:
+                read_from_image(frame_path)
+            read_time = time.time_ns() - start_time
+            size = sum(os.path.getsize(frame_path) for frame_path in formats_paths)
+            variant = frame_format if png_compression is None else f'{frame_format} (compression {png_compression})'
+            self.update_status(f"Result for {Fore.YELLOW}{variant}{Style.RESET_ALL}: write {Fore.BLUE}{round(len(frames) / (write_time / 1000000000), 2)}{Style.RESET_ALL} FPS, read {Fore.BLUE}{round(len(frames) / (read_time / 1000000000), 2)}{Style.RESET_ALL} FPS, size {Fore.BLUE}{round(size / len(frames) / 1024 ** 2, 2)}{Style.RESET_ALL} MB/frame")
+            shutil.rmtree(formats_dir, ignore_errors=True)
+
+    def benchmark_enhancer_engines(self) -> None:
+        """
+        Enhances the target frames with each FaceEnhancer engine, and compares results of each engine with the torch engine results
+        """
+        frames = self.get_frames()
+        reference: List[Frame] = []
+        for engine in FaceEnhancer.ENGINES:
+            self.parameters.enhancer_engine = engine
+            enhancer = FaceEnhancer(self.parameters)
+            enhancer.process_frame(frames[0].frame)  # warms up models
+            start_time = time.time_ns()
+            results = [enhancer.process_numbered_frame(NumberedFrame(numbered_frame.index, numbered_frame.frame.copy())).frame for numbered_frame in frames]
+            execution_time = time.time_ns() - start_time
+            enhancer.release_resources()
+            if not reference:
+                reference = results
+            differences = [numpy.abs(result.astype(numpy.int16) - expected.astype(numpy.int16)) for result, expected in zip(results, reference) if result.shape == expected.shape]
+            difference = f'max {max(int(diff.max()) for diff in differences)}, mean {round(float(numpy.mean([diff.mean() for diff in differences])), 2)}' if differences else 'n/a'
+            self.update_status(f"Result for {Fore.YELLOW}{engine}{Style.RESET_ALL} engine: {Fore.BLUE}{round(len(frames) / (execution_time / 1000000000), 2)}{Style.RESET_ALL} FPS, difference with the {FaceEnhancer.TORCH} engine: {Fore.BLUE}{difference}{Style.RESET_ALL}")
+
     def release_resources(self) -> None:
         if 'CUDAExecutionProvider' in self.execution_providers:
             torch.cuda.empty_cache()
@@ -1,44 +1,161 @@
 import contextlib
 import io
-import threading
-from typing import List
+from functools import partial
+from typing import List, Dict, Any, Callable
+import insightface
 from insightface.app import FaceAnalysis
 from insightface.app.common import Face
 
+from sinner.models.DetectionSize import DetectionSize
+from sinner.models.FaceTracker import FaceTracker
+from sinner.models.FacesDetection import FacesDetection
+from sinner.models.ModelRegistry import ModelRegistry
+from sinner.models.NumberedFrame import NumberedFrame
+from sinner.models.SessionBatch import SessionBatch
 from sinner.typing import Frame
 
 
 class FaceAnalyser:
-    _face_analyser: FaceAnalysis | None = None
+    """
+    Detects faces with the buffalo_l models bundle. The detector always runs, other models of the bundle run only
+    for requested analysis profiles: target frames usually need only faces boxes and keypoints
+    """
+    DETECTION: str = 'detection'  # boxes, detection scores and 5 keypoints only
+    RECOGNITION: str = 'recognition'  # also identity embeddings
+    FULL: str = 'full'  # also 2D and 3D landmarks, gender and age
+    PROFILES: Dict[str, List[str]] = {
+        DETECTION: [],
+        RECOGNITION: ['recognition'],
+        FULL: ['recognition', 'landmark_2d_106', 'landmark_3d_68', 'genderage'],
+    }
+    TASKS_ATTRIBUTES: Dict[str, str] = {'recognition': 'embedding', 'landmark_2d_106': 'landmark_2d_106', 'landmark_3d_68': 'landmark_3d_68', 'genderage': 'gender'}  # a face attribute, set by each model
+
     _execution_providers: List[str]
     _less_output: bool = True
+    _models_policy: str
+    _tracker: FaceTracker | None = None
+    _detection_size: DetectionSize
 
-    def __init__(self, execution_providers: List[str], less_output: bool = True):
+    def __init__(self, execution_providers: List[str], less_output: bool = True, models_policy: str = ModelRegistry.SHARED, tracking_interval: int = 0, det_size: int | str = DetectionSize.DEFAULT):
+        """
+        :param tracking_interval: if set, faces on numbered frames are fully detected only on every interval-th frame, and tracked between them
+        :param det_size: the detector input size (its longer side), or 'auto' to choose it for frames
+        """
         self._execution_providers = execution_providers
         self._less_output = less_output
+        self._models_policy = models_policy
+        self._detection_size = DetectionSize(det_size)
+        if tracking_interval > 1:
+            self._tracker = FaceTracker(tracking_interval, self.detect)
+
+    def load_face_analyser(self) -> FaceAnalysis:
+        if self._less_output:
+            with contextlib.redirect_stdout(io.StringIO()):
+                face_analyser = FaceAnalysis(name='buffalo_l', providers=self._execution_providers)
+                face_analyser.prepare(ctx_id=0, det_size=(640, 640))
+        else:
+            face_analyser = FaceAnalysis(name='buffalo_l', providers=self._execution_providers)
+            face_analyser.prepare(ctx_id=0, det_size=(640, 640))
+        return face_analyser
+
+    @property
+    def signature(self) -> str:
+        """
+        Identifies models and options, that affect analysed faces, e.g. to invalidate cached faces
+        """
+        det_size = DetectionSize.AUTO if self._detection_size.auto else self._detection_size.size
+        return f'buffalo_l-{insightface.__version__}-{det_size}'
 
     @property
     def face_analyser(self) -> FaceAnalysis:
-        if self._face_analyser is None:
-            with threading.Lock():
-                if self._less_output:
-                    with contextlib.redirect_stdout(io.StringIO()):
-                        self._face_analyser = FaceAnalysis(name='buffalo_l', providers=self._execution_providers)
-                        self._face_analyser.prepare(ctx_id=0, det_size=(640, 640))
-                else:
-                    self._face_analyser = FaceAnalysis(name='buffalo_l', providers=self._execution_providers)
-                    self._face_analyser.prepare(ctx_id=0, det_size=(640, 640))
-        return self._face_analyser
-
-    def get_one_face(self, frame: Frame) -> None | Face:
-        face = self.face_analyser.get(frame)
+        return ModelRegistry.shared().get('buffalo_l', self.load_face_analyser, self._execution_providers, {'det_size': (640, 640)}, self._models_policy)
+
+    def detect(self, frame: Frame, input_size: tuple[int, int] | None = None) -> List[Face]:
+        """
+        Detects faces boxes and keypoints only, in the frame coordinates
+        :param input_size: the detector input size (width, height), None to choose it for the frame
+        """
+        return self.detect_with(self.face_analyser.det_model, frame, input_size)
+
+    def detect_with(self, det_model: Any, frame: Frame, input_size: tuple[int, int] | None = None) -> List[Face]:
+        if input_size is None:
+            input_size = self._detection_size.for_frame(frame.shape)
+        bboxes, kpss = det_model.detect(frame, input_size=input_size, max_num=0, metric='default')
+        return [Face(bbox=bboxes[i, 0:4], kps=kpss[i] if kpss is not None else None, det_score=bboxes[i, 4]) for i in range(bboxes.shape[0])]
+
+    def detect_frames(self, frames: List[Frame]) -> List[List[Face]]:
+        """
+        Detects faces on several frames in one detector run (frames of the same size are batched together)
+        """
+        calls: List[Callable[[Any], List[Face]]] = [partial(self.detect_with, frame=frame) for frame in frames]
+        return SessionBatch.run(self.face_analyser.det_model, calls)
+
+    def get_faces(self, frame: Frame, profile: str = DETECTION) -> List[Face]:
+        """
+        Detects faces on the frame and analyses them with models of the profile
+        """
+        return self.analyse(frame, self.detect(frame), profile)
+
+    def analyse(self, frame: Frame, faces: List[Face], profile: str) -> List[Face]:
+        """
+        Runs models of the profile on detected faces, skipping models, whose results the face already has
+        """
+        for task in self.PROFILES[profile]:
+            model = self.face_analyser.models.get(task)
+            if model is None:
+                continue
+            for face in faces:
+                if face.get(self.TASKS_ATTRIBUTES[task]) is None:
+                    model.get(frame, face)
+        return faces
+
+    def get_one_face(self, frame: Frame, profile: str = FULL) -> None | Face:
+        return self.leftmost_face(self.get_faces(frame, profile))
+
+    @staticmethod
+    def leftmost_face(faces: List[Face]) -> None | Face:
         try:
-            return min(face, key=lambda x: x.bbox[0])
+            return min(faces, key=lambda x: x.bbox[0])
         except ValueError:
             return None
 
-    def get_many_faces(self, frame: Frame) -> None | List[Face]:
+    def get_many_faces(self, frame: Frame, profile: str = FULL) -> None | List[Face]:
         try:
-            return self.face_analyser.get(frame)
+            return self.get_faces(frame, profile)
         except IndexError:
             return None
+
+    def get_frame_faces(self, numbered_frame: NumberedFrame, profile: str = DETECTION) -> List[Face]:
+        """
+        Returns faces, detected on the frame by a previous processor, if the detection suits the frame geometry.
+        Otherwise, detects (or tracks, if the tracking is enabled) faces and attaches the detection to the frame,
+        so next processors can reuse it. Reused faces are analysed only with models, that weren't run for them yet
+        """
+        faces = self.reused_faces(numbered_frame)
+        if faces is not None:
+            return self.analyse(numbered_frame.frame, faces, profile)
+        if self._tracker is not None:
+            faces = self.analyse(numbered_frame.frame, self._tracker.track(numbered_frame.index, numbered_frame.frame), profile)
+        else:
+            faces = self.get_faces(numbered_frame.frame, profile)
+        self._detection_size.remember(faces)  # faces sizes of target frames only, not of source images
+        numbered_frame.detection = FacesDetection(faces, numbered_frame.frame.shape)
+        return faces
+
+    @staticmethod
+    def reused_faces(numbered_frame: NumberedFrame) -> List[Face] | None:
+        if numbered_frame.detection is None:
+            return None
+        return numbered_frame.detection.for_frame(numbered_frame.frame)
+
+    def get_frames_faces(self, numbered_frames: List[NumberedFrame], profile: str = DETECTION) -> List[List[Face]]:
+        """
+        Returns faces of several frames, as get_frame_faces does, but frames, which need the full detection, are detected
+        in one detector run. Tracked frames are processed one by one, because each depends on the previous one
+        """
+        if self._tracker is None:
+            detected_frames = [numbered_frame for numbered_frame in numbered_frames if self.reused_faces(numbered_frame) is None]
+            for numbered_frame, faces in zip(detected_frames, self.detect_frames([numbered_frame.frame for numbered_frame in detected_frames])):
+                self._detection_size.remember(faces)
+                numbered_frame.detection = FacesDetection(faces, numbered_frame.frame.shape)
+        return [self.get_frame_faces(numbered_frame, profile) for numbered_frame in numbered_frames]
@@ -28,6 +28,11 @@ class Sinner(AttributeLoader):
                 'default': False,
                 'help': 'Run a benchmark on a selected frame processor'
             },
+            {
+                'parameter': 'export-enhancer',
+                'default': False,
+                'help': 'Export the face enhancer network for the onnx enhancer engine'
+            },
             {
                 'parameter': 'camera',
                 'default': False,
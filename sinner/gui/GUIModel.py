@@ -5,7 +5,7 @@ from argparse import Namespace
 from concurrent.futures import ThreadPoolExecutor, Future
 from enum import Enum
 from tkinter import IntVar
-from typing import List, Callable, Any
+from typing import List, Callable, Any, Iterator
 
 from tqdm import tqdm
 
@@ -15,12 +15,15 @@ from sinner.gui.controls.FramePlayer.BaseFramePlayer import BaseFramePlayer
 from sinner.gui.controls.FramePlayer.PygameFramePlayer import PygameFramePlayer
 from sinner.gui.controls.ProgressBarManager import ProgressBarManager
 from sinner.handlers.frame.EOutOfRange import EOutOfRange
+from sinner.models.FrameDeduplicator import FrameDeduplicator
 from sinner.models.FrameTimeLine import FrameTimeLine
+from sinner.models.ModelRegistry import ModelRegistry
 from sinner.handlers.frame.BaseFrameHandler import BaseFrameHandler
 from sinner.handlers.frame.DirectoryHandler import DirectoryHandler
 from sinner.handlers.frame.NoneHandler import NoneHandler
 from sinner.helpers.FrameHelper import scale
 from sinner.models.Event import Event
+from sinner.models.NumberedFrame import NumberedFrame
 from sinner.models.PerfCounter import PerfCounter
 from sinner.models.State import State
 from sinner.processors.frame.BaseFrameProcessor import BaseFrameProcessor
@@ -50,6 +53,7 @@ class GUIModel(Status):
     _prepare_frames: bool  # True: always extract and use, False: newer extract nor use, Null: newer extract, use if exists. Note: attribute can't be typed as bool | None due to AttributeLoader limitations
     _initial_frame_buffer_length: int  # frames needs to be rendered before player start. Also used to determine initial frame drop
     _scale_quality: float  # the processed frame size scale from 0 to 1
+    duplicate_threshold: float
     _frame_mode: FrameMode
 
     parameters: Namespace
@@ -62,6 +66,7 @@ class GUIModel(Status):
     _processors: dict[str, BaseFrameProcessor]  # cached processors for gui [processor_name, processor]
     _target_handler: BaseFrameHandler | None = None  # the initial handler of the target file
     _positionVar: IntVar | None = None
+    _deduplicator: FrameDeduplicator | None = None
 
     _previews: dict[int, FramesList] = {}  # position: [frame, caption]  # todo: make a component or modify FrameThumbnails
 
@@ -138,6 +143,13 @@ class GUIModel(Status):
                 'default': lambda: suggest_temp_dir(self.temp_dir),
                 'help': 'Select the directory for temporary files'
             },
+            {
+                'parameter': 'duplicate-threshold',
+                'type': float,
+                'default': 0,
+                'valid': lambda: self.duplicate_threshold >= 0,
+                'help': 'Reuse the processed result for a frame, which differs from a recent frame less than the threshold (0 disables)'
+            },
             {
                 'module_help': 'The GUI processing handler'
             }
@@ -163,7 +175,11 @@ class GUIModel(Status):
 
     def reload_parameters(self) -> None:
         self.clear_previews()
+        if self._target_handler is not None:
+            self._target_handler.release_resources()
         self._target_handler = None
+        self._deduplicator = None  # results of the previous parameters can't be reused
+        ModelRegistry.shared().renew()  # models, loaded with previous parameters, are released, when replaced
         super().__init__(self.parameters)
         for _, processor in self.processors.items():
             processor.load(self.parameters)
@@ -233,6 +249,19 @@ class GUIModel(Status):
             pass
         return self._processors
 
+    @property
+    def deduplicator(self) -> FrameDeduplicator | None:
+        if self._deduplicator is None and self.duplicate_threshold > 0:
+            self._deduplicator = FrameDeduplicator(self.duplicate_threshold)
+        return self._deduplicator
+
+    def prepare_source(self, source_path: str) -> None:
+        """
+        Lets processors prepare the source in advance, so switching to it is fast
+        """
+        for _, processor in self.processors.items():
+            processor.prepare_source(source_path)
+
     @property
     def is_processors_loaded(self) -> bool:
         return self._processors != {}
@@ -243,14 +272,14 @@ class GUIModel(Status):
         if extractor_handler is None:
             return result
         try:
-            n_frame = extractor_handler.extract_frame(frame_number)
+            n_frame = self.extract_position(extractor_handler, frame_number)
             result.append((n_frame.frame, 'Original'))  # add an original frame
         except Exception as exception:
             self.update_status(message=str(exception), mood=Mood.BAD)
             return result
         if processed:  # return all processed frames
             for processor_name, processor in self.processors.items():
-                n_frame.frame = processor.process_frame(n_frame.frame)
+                n_frame = processor.process_numbered_frame(n_frame)
                 result.append((n_frame.frame, processor_name))
         return result
 
@@ -396,10 +425,16 @@ class GUIModel(Status):
         futures: list[Future[None]] = []
         self._processed_frames_count = 0
         self._shown_frames_count = 0
+        frames_stream = self.frame_handler.stream(max(start_frame - 1, 0)) if self.frame_handler.streamable else None  # player positions are one-based, see extract_position()
 
         with ThreadPoolExecutor(max_workers=self.execution_threads) as executor:  # this adds processing operations into a queue
             while start_frame <= end_frame:
-                future: Future[None] = executor.submit(self._process_frame, start_frame)
+                n_frame = None
+                if frames_stream is not None:
+                    n_frame = self.seek_stream(frames_stream, start_frame)
+                    if n_frame is None:
+                        break
+                future: Future[None] = executor.submit(self._process_frame, start_frame, n_frame)
                 future.add_done_callback(process_done)
                 futures.append(future)
                 start_frame += self.frame_step
@@ -415,21 +450,51 @@ class GUIModel(Status):
                     break
             self.update_status("_process_frames loop done")
 
-    def _process_frame(self, frame_index: int) -> None:
+    @staticmethod
+    def extract_position(frame_handler: BaseFrameHandler, frame_position: int) -> NumberedFrame:
+        """
+        Extracts the frame at the player position. Player positions are one-based, while handlers number frames from zero
+        :return: the frame, numbered with the player position
+        """
+        n_frame = frame_handler.extract_frame(max(frame_position - 1, 0))
+        n_frame.index = frame_position
+        return n_frame
+
+    @staticmethod
+    def seek_stream(frames_stream: Iterator[NumberedFrame], frame_position: int) -> NumberedFrame | None:
+        """
+        Reads the stream up to the requested player position, dropping skipped frames
+        :return: the frame, numbered with the player position (as extract_position() does), or None, if the stream is over
+        """
+        for n_frame in frames_stream:
+            if n_frame.index >= frame_position - 1:
+                n_frame.index = frame_position
+                return n_frame
+        return None
+
+    def _process_frame(self, frame_index: int, n_frame: NumberedFrame | None = None) -> None:
         if self._event_buffering.is_set():
             with PerfCounter() as frame_render_time:  # todo: already processed frames shouldn't be reprocessed
-                try:
-                    n_frame = self.frame_handler.extract_frame(frame_index)  # todo: can be cached
-                except EOutOfRange:
-                    self.update_status(f"There's no frame {frame_index}")
-                    return
+                if n_frame is None:
+                    try:
+                        n_frame = self.extract_position(self.frame_handler, frame_index)  # todo: can be cached
+                    except EOutOfRange:
+                        self.update_status(f"There's no frame {frame_index}")
+                        return
                 n_frame.frame = scale(n_frame.frame, self._scale_quality)
-                for _, processor in self.processors.items():
-                    n_frame.frame = processor.process_frame(n_frame.frame)
+                deduplicator = self.deduplicator
+                n_frame = self._process_chain(n_frame) if deduplicator is None else deduplicator.process(n_frame, self._process_chain)
             self.TimeLine.add_frame(n_frame)
             self._processed_frames_count += 1
             self._process_fps = iteration_mean(1 / frame_render_time.execution_time, self._process_fps, self._processed_frames_count)
             self._status("FPS (last/mean)", f"{round(1 / frame_render_time.execution_time, ndigits=3)}/{round(self._process_fps, ndigits=3)}")
+            if deduplicator is not None:
+                self._status("Duplicates", deduplicator.statistics['duplicates'])
+
+    def _process_chain(self, n_frame: NumberedFrame) -> NumberedFrame:
+        for _, processor in self.processors.items():
+            n_frame = processor.process_numbered_frame(n_frame)
+        return n_frame
 
     def _show_frames(self) -> None:
         if self.Player:
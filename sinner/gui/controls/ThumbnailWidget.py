@@ -1,22 +1,48 @@
-from tkinter import Canvas, Frame, Misc, NSEW, Scrollbar, NS, Label, N, UNITS, ALL, Event
+import os
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import Canvas, Frame, Misc, NSEW, Scrollbar, NS, Label, UNITS, ALL, Event
 from typing import List, Tuple, Callable
 
 from PIL import Image
 from PIL.ImageTk import PhotoImage
 
+from sinner.models.SourcesIndex import SourcesIndex
+from sinner.models.ThumbnailsQueue import ThumbnailsQueue
 from sinner.utilities import get_file_name, is_image
 
+# a thumbnail, ready to be shown: its image path, image, caption and click callback
+ReadyThumbnail = Tuple[str, Image.Image, str | bool, Callable[[str], None] | None]
+
 
 class ThumbnailWidget(Frame):
+    """
+    Shows image thumbnails in a grid. Thumbnails are made by a threads pool (and cached in the index, if it is set),
+    and are passed to the Tk thread, that adds ready thumbnails in batches, updating the layout once per batch.
+    Thumbnails are shown in the order of addition, see ThumbnailsQueue. Batches are scheduled only while some
+    thumbnails are being made
+    """
+    FLUSH_INTERVAL: int = 100  # milliseconds between batches
+
     thumbnails: List[Tuple[Label, Label]]
     thumbnail_size: int
     _columns: int
     _canvas: Canvas
+    _index: SourcesIndex | None = None
+    _executor: ThreadPoolExecutor
+    _queue: ThumbnailsQueue[ReadyThumbnail]
+    _flush_id: str | None = None  # the scheduled batch
 
-    def __init__(self, master: Misc, **kwargs):  # type: ignore[no-untyped-def]
+    def __init__(self, master: Misc, index_path: str | None = None, **kwargs):  # type: ignore[no-untyped-def]
+        """
+        :param index_path: the thumbnails index file, None to make thumbnails every time
+        """
+        self.thumbnail_size = kwargs.pop('thumbnail_size', 200)
         super().__init__(master, **kwargs)
         self.thumbnails = []
-        self.thumbnail_size = kwargs['thumbnail_size'] if 'thumbnail_size' in kwargs else 200
+        if index_path is not None:
+            self._index = SourcesIndex(index_path, self.thumbnail_size, self.get_thumbnail)
+        self._executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix=self.__class__.__name__)
+        self._queue = ThumbnailsQueue()
         self._canvas = Canvas(self)
         self._canvas.grid(row=0, column=0, sticky=NSEW)
         self._canvas.grid_rowconfigure(0, weight=1)
@@ -58,35 +84,69 @@ class ThumbnailWidget(Frame):
 
     def add_thumbnail(self, image_path: str, caption: str | bool = True, click_callback: Callable[[str], None] | None = None) -> None:
         """
-        Adds an image thumbnail to the widget
+        Adds an image thumbnail to the widget. The thumbnail is made in background and shown with the next batch
         :param image_path: image file path
         :param caption: the thumbnail caption, True to use the file name, False to ignore caption
         :param click_callback: on thumbnail click callback
         """
         if is_image(image_path):
-            img = self.get_thumbnail(Image.open(image_path), self.thumbnail_size)
-            photo = PhotoImage(img)
-
-            thumbnail_label = Label(self.frame, image=photo)
-            thumbnail_label.image = photo  # type: ignore[attr-defined]
-            thumbnail_label.grid()
-
-            # Create a label for the caption and set its width to match the thumbnail width
-            caption_label = Label(self.frame, wraplength=self.thumbnail_size)
-            if caption is not False:
-                if caption is True:
-                    caption = get_file_name(image_path)
-                caption_label.configure(text=caption)
-            caption_label.grid(sticky=N)
-
-            if click_callback:
-                thumbnail_label.bind("<Button-1>", lambda event, path=image_path: click_callback(path))  # type: ignore[misc]  #/mypy/issues/4226
-                caption_label.bind("<Button-1>", lambda event, path=image_path: click_callback(path))  # type: ignore[misc]  #/mypy/issues/4226
-
-            self.thumbnails.append((thumbnail_label, caption_label))
+            generation, order = self._queue.add()
+            self._executor.submit(self.make_thumbnail, generation, order, image_path, caption, click_callback)
+            self.schedule_flush()
+
+    def make_thumbnail(self, generation: int, order: int, image_path: str, caption: str | bool, click_callback: Callable[[str], None] | None) -> None:
+        """
+        Makes the thumbnail (in a pool thread), taking it from the index, if possible
+        """
+        if generation != self._queue.generation:
+            self._queue.put(generation, order, None)
+            return
+        try:
+            if self._index is not None:
+                image = self._index.thumbnail(image_path)
+            else:
+                with Image.open(image_path) as source_image:
+                    image = self.get_thumbnail(source_image, self.thumbnail_size)
+        except Exception:  # an unreadable image is skipped
+            self._queue.put(generation, order, None)
+            return
+        self._queue.put(generation, order, (image_path, image, caption, click_callback))
+
+    def schedule_flush(self) -> None:
+        if self._flush_id is None:
+            self._flush_id = self.after(self.FLUSH_INTERVAL, self.flush)
+
+    def flush(self) -> None:
+        """
+        Shows all ready thumbnails (on the Tk thread), and schedules the next batch, while thumbnails are being made
+        """
+        self._flush_id = None
+        ready = self._queue.take()
+        for position, (image_path, image, caption, click_callback) in ready:
+            self.show_thumbnail(position, image_path, image, caption, click_callback)
+        if ready:
             self.update_layout()
-            self.update()
-            self.master.update()
+        if self._queue.pending > 0:
+            self.schedule_flush()
+
+    def show_thumbnail(self, position: int, image_path: str, image: Image.Image, caption: str | bool, click_callback: Callable[[str], None] | None) -> None:
+        photo = PhotoImage(image)
+
+        thumbnail_label = Label(self.frame, image=photo)
+        thumbnail_label.image = photo  # type: ignore[attr-defined]
+
+        # Create a label for the caption and set its width to match the thumbnail width
+        caption_label = Label(self.frame, wraplength=self.thumbnail_size)
+        if caption is not False:
+            if caption is True:
+                caption = get_file_name(image_path)
+            caption_label.configure(text=caption)
+
+        if click_callback:
+            thumbnail_label.bind("<Button-1>", lambda event, path=image_path: click_callback(path))  # type: ignore[misc]  #/mypy/issues/4226
+            caption_label.bind("<Button-1>", lambda event, path=image_path: click_callback(path))  # type: ignore[misc]  #/mypy/issues/4226
+
+        self.thumbnails.insert(position, (thumbnail_label, caption_label))
 
     # noinspection PyTypeChecker
     def update_layout(self) -> None:
@@ -123,7 +183,15 @@ class ThumbnailWidget(Frame):
 
     def clear_thumbnails(self) -> None:
         for thumbnail, caption in self.thumbnails:
-            thumbnail.grid_forget()
-            caption.grid_forget()
+            thumbnail.destroy()  # labels are destroyed with their images
+            caption.destroy()
         self.thumbnails = []
+        self._queue.clear()
         self._canvas.configure(scrollregion=self._canvas.bbox(ALL))
+
+    def destroy(self) -> None:
+        if self._flush_id is not None:
+            self.after_cancel(self._flush_id)
+            self._flush_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
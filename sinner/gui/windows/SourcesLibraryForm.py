@@ -1,27 +1,37 @@
+import os
 from argparse import Namespace
-from threading import Thread
+from collections import deque
+from threading import Thread, Lock
 from tkinter import Misc, NSEW, Menu, filedialog, CASCADE, COMMAND, SEPARATOR, Event
-from typing import List, Callable
+from typing import List, Callable, Deque
 
 from customtkinter import CTkToplevel
 
+from sinner.Status import Status, Mood
 from sinner.gui.controls.ThumbnailWidget import ThumbnailWidget
 from sinner.models.Config import Config
-from sinner.utilities import is_image, is_dir, get_directory_file_list, get_type_extensions
-from sinner.validators.AttributeLoader import AttributeLoader, Rules
+from sinner.models.SourcesIndex import SourcesIndex
+from sinner.utilities import is_image, is_dir, get_directory_file_list, get_type_extensions, suggest_temp_dir
+from sinner.validators.AttributeLoader import Rules
 
 
-class SourcesLibraryForm(AttributeLoader):
+class SourcesLibraryForm(Status):
     parameters: Namespace
     SourcesLibraryWnd: CTkToplevel
     SourcesLibrary: ThumbnailWidget
     _library: List[str] = []
     _library_is_loaded: bool = False
+    _images: List[str]  # all images of the library
+    _pending_sources: Deque[str]  # sources, waiting for preparation
+    _preparer: Thread | None = None  # the only thread, that prepares sources
+    _preparing_lock: Lock
     _on_thumbnail_click_callback: Callable[[str], None] | None = None
     _on_window_close_callback: Callable[[], None] | None = None
+    _prepare_source_callback: Callable[[str], None] | None = None
 
     geometry: str
     state: str  # currently ignored, see issue #100
+    temp_dir: str
 
     def rules(self) -> Rules:
         return [
@@ -34,9 +44,14 @@ class SourcesLibraryForm(AttributeLoader):
                 'parameter': {'sources-library-state'},
                 'attribute': 'state',
             },
+            {
+                'parameter': 'temp-dir',
+                'default': lambda: suggest_temp_dir(self.temp_dir),
+                'help': 'Select the directory for temporary files (the library thumbnails index is stored there)'
+            },
         ]
 
-    def __init__(self, parameters: Namespace, master: Misc, library: List[str], on_thumbnail_click_callback: Callable[[str], None] | None = None, on_window_close_callback: Callable[[], None] | None = None):
+    def __init__(self, parameters: Namespace, master: Misc, library: List[str], on_thumbnail_click_callback: Callable[[str], None] | None = None, on_window_close_callback: Callable[[], None] | None = None, prepare_source_callback: Callable[[str], None] | None = None):
         self.parameters = parameters
         super().__init__(parameters)
         self.SourcesLibraryWnd = CTkToplevel(master)
@@ -46,7 +61,7 @@ class SourcesLibraryForm(AttributeLoader):
         #     self.SourcesLibraryWnd.wm_state(self.state)
         self.SourcesLibraryWnd.withdraw()  # hide window
         self.SourcesLibraryWnd.title('Sources library')
-        self.SourcesLibrary = ThumbnailWidget(self.SourcesLibraryWnd)
+        self.SourcesLibrary = ThumbnailWidget(self.SourcesLibraryWnd, index_path=os.path.join(self.temp_dir, SourcesIndex.__name__, 'thumbnails.db'))
         self.SourcesLibrary.grid(row=0, column=0, sticky=NSEW)
         self.SourcesLibraryWnd.grid_rowconfigure(0, weight=1)
         self.SourcesLibraryWnd.grid_columnconfigure(0, weight=1)
@@ -56,6 +71,10 @@ class SourcesLibraryForm(AttributeLoader):
         self._library = library
         self._on_thumbnail_click_callback = on_thumbnail_click_callback
         self._on_window_close_callback = on_window_close_callback
+        self._prepare_source_callback = prepare_source_callback
+        self._images = []
+        self._pending_sources = deque()
+        self._preparing_lock = Lock()
 
         self.MainMenu: Menu = Menu(self.SourcesLibraryWnd)
         self.Library: Menu = Menu(self.MainMenu, tearoff=False)
@@ -80,11 +99,14 @@ class SourcesLibraryForm(AttributeLoader):
             if not self._library_is_loaded:
                 self.add(self._library)
                 self._library_is_loaded = True
+            else:
+                self.start_preparing(self._images)  # sources, which are already prepared, are skipped fast
         else:
             self.SourcesLibraryWnd.withdraw()
 
     def hide(self) -> None:
         self.show(False)
+        self.stop_preparing()
         if self._on_window_close_callback:
             self._on_window_close_callback()
 
@@ -97,19 +119,54 @@ class SourcesLibraryForm(AttributeLoader):
         if callback is None:
             callback = self._on_thumbnail_click_callback
         if reload:
-            self.SourcesLibrary.clear_thumbnails()
-
-        def add_image(image_path: str) -> None:
-            if is_image(image_path):
-                self.SourcesLibrary.add_thumbnail(image_path=image_path, click_callback=lambda path: callback(path))  # type: ignore[misc]  # callback is always defined
+            self.clear()
 
+        images: List[str] = []
         for item in library:
             if is_image(item):
-                # Start a new thread for each image
-                Thread(target=add_image, args=(item,)).start()
+                images.append(item)
             elif is_dir(item):
-                for dir_file in get_directory_file_list(item, is_image):
-                    Thread(target=add_image, args=(dir_file,)).start()
+                images.extend(get_directory_file_list(item, is_image))
+        for image_path in images:
+            self.SourcesLibrary.add_thumbnail(image_path=image_path, click_callback=lambda path: callback(path))  # type: ignore[misc]  # callback is always defined
+        self._images.extend(images)
+        self.start_preparing(images)
+
+    def start_preparing(self, images: List[str]) -> None:
+        """
+        Queues sources to the preparation thread, starting it, if it isn't running
+        """
+        if self._prepare_source_callback is None or not images:
+            return
+        with self._preparing_lock:
+            pending = set(self._pending_sources)
+            self._pending_sources.extend(image_path for image_path in images if image_path not in pending)
+            if self._preparer is None:
+                self._preparer = Thread(target=self.prepare_sources, name=f'{self.__class__.__name__}-prepare', daemon=True)
+                self._preparer.start()
+
+    def stop_preparing(self) -> None:
+        """
+        Forgets queued sources, so the preparation thread stops after its current source
+        """
+        with self._preparing_lock:
+            self._pending_sources.clear()
+
+    def prepare_sources(self) -> None:
+        """
+        Lets processors prepare queued library sources in background (e.g. analyse faces), so a click on a thumbnail
+        applies the source instantly. The preparation is stopped, when the library is cleared or its window is closed
+        """
+        while True:
+            with self._preparing_lock:
+                if not self._pending_sources:
+                    self._preparer = None
+                    return
+                image_path = self._pending_sources.popleft()
+            try:
+                self._prepare_source_callback(image_path)  # type: ignore[misc]  # callback is always defined
+            except Exception as exception:  # the source will be analysed again on click
+                self.update_status(f'Failed to prepare the source {image_path}: {exception}', mood=Mood.BAD)
 
     def add_files(self) -> None:
         image_extensions = get_type_extensions('image/')
@@ -130,4 +187,6 @@ class SourcesLibraryForm(AttributeLoader):
             self.add([directory])
 
     def clear(self) -> None:
+        self.stop_preparing()
+        self._images = []
         self.SourcesLibrary.clear_thumbnails()
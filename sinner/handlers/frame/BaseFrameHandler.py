@@ -1,27 +1,42 @@
-import glob
+import hashlib
 import os
 from abc import ABC, abstractmethod
 from argparse import Namespace
-from typing import List
+from typing import List, Iterator
 
 from sinner.Status import Status
+from sinner.helpers.FrameHelper import list_frame_files, temp_frames_rules
+from sinner.models.FrameStore import FrameStore
+from sinner.models.MediaMetadata import MediaMetadata
 from sinner.models.NumberedFrame import NumberedFrame
 from sinner.validators.AttributeLoader import Rules
 from sinner.typing import NumeratedFramePath
-from sinner.utilities import load_class, get_file_name, is_file, normalize_path
+from sinner.utilities import load_class, get_file_name, normalize_path, suggest_temp_dir
 
 
 class BaseFrameHandler(Status, ABC):
     current_frame_index: int = 0
+    streamable: bool = False  # True, if the handler can decode frames sequentially faster than extracting them one by one
 
     _target_path: str
     _fps: float | None = None
     _fc: int | None = None
     _resolution: tuple[int, int] | None = None
     _length: float | None = None
+    _metadata: MediaMetadata | None = None
+
+    temp_dir: str
+    temp_format: str
+    png_compression: int | None
 
     def rules(self) -> Rules:
         return [
+            {
+                'parameter': 'temp-dir',
+                'default': lambda: suggest_temp_dir(),
+                'help': 'Select the directory for temporary files'
+            },
+            *temp_frames_rules(),
         ]
 
     @staticmethod
@@ -56,6 +71,34 @@ class BaseFrameHandler(Status, ABC):
     def fc(self) -> int:
         pass
 
+    @staticmethod
+    def cache_path(temp_dir: str, cache_name: str, target_path: str) -> str:
+        """
+        Returns the path of the target cache file. Files are named by the target full path hash, so targets with same
+        names from different directories don't overwrite caches of each other
+        """
+        digest = hashlib.sha256(os.path.abspath(str(normalize_path(target_path))).encode()).hexdigest()
+        return os.path.join(temp_dir, cache_name, f'{os.path.basename(target_path)}.{digest[:16]}.json')
+
+    @property
+    def metadata(self) -> MediaMetadata:
+        """
+        Returns the target metadata, stored in the temp dir. If there is no valid stored metadata, the target is probed once
+        """
+        if self._metadata is None:
+            temp_dir = suggest_temp_dir(getattr(self, 'temp_dir', None))  # the metadata can be requested by other attributes defaults, before temp_dir is loaded
+            self._metadata = MediaMetadata(self._target_path, self.cache_path(temp_dir, MediaMetadata.__name__, self._target_path))
+            if not self._metadata.loaded:
+                self.probe(self._metadata)
+                self._metadata.save()
+        return self._metadata
+
+    def probe(self, metadata: MediaMetadata) -> None:
+        """
+        Fills the metadata with the target properties. Handlers, which can't probe their targets, leave it empty
+        """
+        pass
+
     @property
     def frame_time(self) -> float:
         if 0 == self.fps:
@@ -86,13 +129,30 @@ class BaseFrameHandler(Status, ABC):
         :param frames_range: sets the range of returned (and extracted) frames
         :return: list of requested frames
         """
-        frames_path = sorted(glob.glob(os.path.join(glob.escape(path), '*.png')))
-        return [(int(get_file_name(file_path)), file_path) for file_path in frames_path if is_file(file_path)][frames_range[0]:frames_range[1]]
+        if FrameStore.exists(path):  # all frames are stored in the same file
+            return [(frame_index, FrameStore(path).frames_path) for frame_index in FrameStore(path).written()][frames_range[0]:frames_range[1]]
+        return [(int(get_file_name(file_path)), file_path) for file_path in list_frame_files(path)][frames_range[0]:frames_range[1]]
 
     @abstractmethod
     def extract_frame(self, frame_number: int) -> NumberedFrame:
         """
         Return the certain frame from the target
+        :param frame_number: zero-based index of the frame, the same index is used by the handler iteration and stream()
+        """
+        pass
+
+    def stream(self, start_frame: int = 0) -> Iterator[NumberedFrame]:
+        """
+        Yields frames one by one, starting from the certain frame. Frames are numbered as extract_frame() numbers them
+        :param start_frame: zero-based index of the first yielded frame
+        :return: the frames iterator
+        """
+        for frame_index in range(start_frame, self.fc):
+            yield self.extract_frame(frame_index)
+
+    def release_resources(self) -> None:
+        """
+        Releases resources, kept open between frames extractions
         """
         pass
 
@@ -1,7 +1,8 @@
-import glob
 import os.path
+import threading
+from argparse import Namespace
 from pathlib import Path
-from typing import List, Any
+from typing import List, Any, Iterator, Iterable
 from concurrent.futures import ThreadPoolExecutor, as_completed, Future
 import cv2
 import psutil
@@ -11,20 +12,31 @@ from tqdm import tqdm
 from sinner.Status import Mood
 from sinner.handlers.frame.BaseFrameHandler import BaseFrameHandler
 from sinner.handlers.frame.EOutOfRange import EOutOfRange
-from sinner.helpers.FrameHelper import write_to_image, read_from_image
+from sinner.helpers.FrameHelper import write_to_image, read_from_image, list_frame_files
+from sinner.models.FrameStore import FrameStore
+from sinner.models.MemoryGovernor import MemoryGovernor
+from sinner.models.MediaMetadata import MediaMetadata
 from sinner.models.NumberedFrame import NumberedFrame
 from sinner.typing import NumeratedFramePath, Frame
-from sinner.utilities import get_file_name, is_file, get_mem_usage, suggest_max_memory
+from sinner.utilities import get_mem_usage, suggest_max_memory
 from sinner.validators.AttributeLoader import Rules
 
 
 class CV2VideoHandler(BaseFrameHandler):
     emoji: str = '📹'
+    streamable: bool = True
 
     output_fps: float
     max_memory: int
 
-    _statistics: dict[str, int] = {'mem_rss_max': 0, 'mem_vms_max': 0, 'limits_reaches': 0}
+    _statistics: dict[str, int] = {'mem_rss_max': 0, 'mem_vms_max': 0}
+
+    # the persistent capture, shared between threads to read frames sequentially without reopening and seeking
+    _capture: VideoCapture | None = None
+    _capture_position: int = 0  # the position of the frame that the persistent capture will return on the next read
+    _capture_lock: threading.Lock
+    _read_ahead_frames: dict[int, Frame]  # frames decoded while skipping forward, but not requested yet
+    _read_ahead_limit: int = 8  # the maximal forward gap which is read through instead of seeking
 
     def rules(self) -> Rules:
         return [
@@ -36,6 +48,7 @@ class CV2VideoHandler(BaseFrameHandler):
             {
                 'parameter': 'max-memory',  # key defined in Sin, but class can be called separately in tests
                 'default': suggest_max_memory(),
+                'help': 'The maximum amount of memory (in GB), held by extracted frames waiting for writing'
             },
             {
                 'module_help': 'The video processing module, based on CV2 library'
@@ -46,6 +59,11 @@ class CV2VideoHandler(BaseFrameHandler):
     def available() -> bool:
         return "FFMPEG" in cv2.getBuildInformation()
 
+    def __init__(self, target_path: str, parameters: Namespace):
+        self._capture_lock = threading.Lock()
+        self._read_ahead_frames = {}
+        super().__init__(target_path, parameters)
+
     def open(self) -> VideoCapture:
         cap = cv2.VideoCapture(self._target_path)
         if not cap.isOpened():
@@ -55,53 +73,62 @@ class CV2VideoHandler(BaseFrameHandler):
     @property
     def fps(self) -> float:
         if self._fps is None:
-            capture = self.open()
-            self._fps = capture.get(cv2.CAP_PROP_FPS)
-            capture.release()
+            self._fps = self.metadata.fps if self.metadata.fps is not None else 0.0
         return self._fps
 
     @property
     def fc(self) -> int:  # this value can be inaccurate
-        def is_frame_readable(position: int) -> bool:
-            capture.set(cv2.CAP_PROP_POS_FRAMES, position - 1)
-            return capture.read()[0]
-
         if self._fc is None:
-            capture = self.open()
-            header_frames_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
-            if is_frame_readable(header_frames_count):
-                self._fc = header_frames_count
-                return self._fc
-            else:  # cv2.CAP_PROP_FRAME_COUNT returns value from the video header, which not always correct, so we can find the right value via binary search
-                last_good_position = 1
-                last_bad_position = header_frames_count
-                current_position = int((last_bad_position - last_good_position) / 2)
-                while last_bad_position - last_good_position > 1:
-                    if is_frame_readable(current_position):
-                        last_good_position = current_position
-                        current_position += int((last_bad_position - last_good_position) / 2)
-                    else:
-                        last_bad_position = current_position
-                        current_position -= int((last_bad_position - last_good_position) / 2)
-
-            capture.release()
-            self._fc = last_good_position
+            self._fc = self.metadata.fc if self.metadata.fc is not None else 0
         return self._fc
 
     @property
     def resolution(self) -> tuple[int, int]:
         if self._resolution is None:
-            capture = self.open()
-            self._resolution = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
-            capture.release()
+            self._resolution = self.metadata.resolution if self.metadata.resolution is not None else (0, 0)
         return self._resolution
 
+    def probe(self, metadata: MediaMetadata) -> None:
+        capture = self.open()
+        try:
+            metadata.fps = capture.get(cv2.CAP_PROP_FPS)
+            metadata.resolution = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            metadata.fc = self.count_frames(capture)
+            metadata.duration = metadata.fc / metadata.fps if metadata.fps else None
+        finally:
+            capture.release()
+
+    @staticmethod
+    def count_frames(capture: VideoCapture) -> int:
+        def is_frame_readable(position: int) -> bool:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, position - 1)
+            return capture.read()[0]
+
+        header_frames_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if is_frame_readable(header_frames_count):
+            return header_frames_count
+        # cv2.CAP_PROP_FRAME_COUNT returns value from the video header, which not always correct, so we can find the right value via binary search
+        last_good_position = 1
+        last_bad_position = header_frames_count
+        current_position = int((last_bad_position - last_good_position) / 2)
+        while last_bad_position - last_good_position > 1:
+            if is_frame_readable(current_position):
+                last_good_position = current_position
+                current_position += int((last_bad_position - last_good_position) / 2)
+            else:
+                last_bad_position = current_position
+                current_position -= int((last_bad_position - last_good_position) / 2)
+        return last_good_position
+
     def get_frames_paths(self, path: str, frames_range: tuple[int | None, int | None] = (None, None)) -> List[NumeratedFramePath]:
         def write_done(future_: Future[bool]) -> None:
             futures.remove(future_)
+            governor.release(frame_size)
             progress.set_postfix(self.get_postfix(len(futures)))
             progress.update()
 
+        governor = MemoryGovernor.shared(self.max_memory * 1024 ** 3)
+        frame_size = self.resolution[0] * self.resolution[1] * 3  # decoded frames are 8-bit BGR
         start = frames_range[0] if frames_range[0] is not None else 0
         stop = frames_range[1] if frames_range[1] is not None else self.fc - 1
 
@@ -112,6 +139,7 @@ class CV2VideoHandler(BaseFrameHandler):
             capture.set(cv2.CAP_PROP_POS_FRAMES, start)
             filename_length = len(str(self.fc))
             Path(path).mkdir(parents=True, exist_ok=True)
+            frame_store = FrameStore(path, self.fc) if self.temp_format == FrameStore.FORMAT else None
 
             # Initialize the progress bar
             with tqdm(
@@ -127,16 +155,18 @@ class CV2VideoHandler(BaseFrameHandler):
                     ret, frame = capture.read()
                     if not ret:
                         break
-                    filename: str = os.path.join(path, str(frame_index).zfill(filename_length) + ".png")
+                    if frame_store is not None:  # copying to the mapped file is faster than submitting
+                        frame_store.write(frame_index, frame)
+                        progress.update()
+                        continue
+                    filename: str = os.path.join(path, f'{str(frame_index).zfill(filename_length)}.{self.temp_format}')
+                    governor.acquire(frame_size)  # frames are decoded faster than written, so they wait for the memory budget
                     # Submit only the write_to_image function to the executor, excluding it processing time from the loop
-                    future: Future[bool] = executor.submit(write_to_image, frame, filename)
+                    future: Future[bool] = executor.submit(write_to_image, frame, filename, self.png_compression)
                     future.add_done_callback(write_done)
                     futures.append(future)
                     progress.set_postfix(self.get_postfix(len(futures)))
                     future_to_frame[future] = frame_index  # Keep track of which frame the future corresponds to
-                    if get_mem_usage('vms', 'g') >= self.max_memory:
-                        futures[:1][0].result()
-                        self._statistics['limits_reaches'] += 1
 
                 for future in as_completed(future_to_frame):
                     frame_index = future_to_frame[future]
@@ -148,8 +178,7 @@ class CV2VideoHandler(BaseFrameHandler):
 
                 capture.release()
 
-        frames_path = sorted(glob.glob(os.path.join(glob.escape(path), '*.png')))
-        return [(int(get_file_name(file_path)), file_path) for file_path in frames_path if is_file(file_path)]
+        return BaseFrameHandler.get_frames_paths(self, path)  # not super(), which may be another extracting handler
 
     def get_mem_usage(self) -> str:
         mem_rss = get_mem_usage()
@@ -165,35 +194,83 @@ class CV2VideoHandler(BaseFrameHandler):
         postfix = {
             'memory_usage': self.get_mem_usage(),
             'futures': futures_length,
+            **MemoryGovernor.shared().statistics,
         }
-        if self._statistics['limits_reaches'] > 0:
-            postfix['limit_reaches'] = self._statistics['limits_reaches']
         return postfix
 
     def extract_frame(self, frame_number: int) -> NumberedFrame:
         if frame_number > self.fc:
             raise EOutOfRange(frame_number, 0, self.fc)
-        capture = self.open()
-        capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number - 1)  # zero-based frames
-        ret, frame = capture.read()
-        capture.release()
-        if not ret:
+        with self._capture_lock:
+            frame = self._read_ahead_frames.pop(frame_number, None)
+            if frame is None:
+                frame = self.read_frame(frame_number)
+        if frame is None:
             raise Exception(f"Error reading frame {frame_number}")
         return NumberedFrame(frame_number, frame)
 
+    def read_frame(self, position: int) -> Frame | None:
+        """
+        Reads a frame from the persistent capture. Sequential reads just decode the next frame, small forward gaps
+        are read through (keeping skipped frames for the following requests), and only other positions require a seek
+        :param position: zero-based frame position
+        :return: the frame, or None if it can't be read
+        """
+        if self._capture is None:
+            self._capture = self.open()
+            self._capture_position = 0
+        gap = position - self._capture_position
+        if gap < 0 or gap > self._read_ahead_limit:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, position)
+            self._capture_position = position
+            self._read_ahead_frames.clear()
+        while self._capture_position < position:
+            ret, skipped_frame = self._capture.read()
+            if not ret:
+                return None
+            self._read_ahead_frames[self._capture_position] = skipped_frame
+            self._capture_position += 1
+        ret, frame = self._capture.read()
+        if not ret:
+            self.release_resources()  # the capture state is unknown, it should be reopened on the next read
+            return None
+        self._capture_position += 1
+        while len(self._read_ahead_frames) > self._read_ahead_limit:
+            self._read_ahead_frames.pop(min(self._read_ahead_frames))
+        return frame
+
+    def stream(self, start_frame: int = 0) -> Iterator[NumberedFrame]:
+        for frame_index in range(start_frame, self.fc):
+            with self._capture_lock:
+                frame = self.read_frame(frame_index)
+            if frame is None:
+                break
+            yield NumberedFrame(frame_index, frame)
+
+    def release_resources(self) -> None:
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+        self._read_ahead_frames.clear()
+
     def result(self, from_dir: str, filename: str, audio_target: str | None = None) -> bool:
         self.update_status(f"Resulting frames from {from_dir} to {filename} with {self.output_fps} FPS")
         if audio_target is not None:
             self.update_status(message='Sound copying is not supported in CV2VideoHandler', mood=Mood.NEUTRAL)
         try:
             Path(os.path.dirname(filename)).mkdir(parents=True, exist_ok=True)
-            frame_files = glob.glob(os.path.join(glob.escape(from_dir), '*.png'))
-            first_frame = read_from_image(frame_files[0])
-            height, width, channels = first_frame.shape
+            frames: Iterable[Frame]
+            if FrameStore.exists(from_dir):
+                frame_store = FrameStore(from_dir)
+                frames = (numbered_frame.frame for numbered_frame in frame_store.stream())
+                height, width, channels = frame_store.shape  # type: ignore[misc]
+            else:
+                frame_files = list_frame_files(from_dir)
+                frames = (read_from_image(frame_path) for frame_path in frame_files)
+                height, width, channels = read_from_image(frame_files[0]).shape
             fourcc = self.suggest_codec()
             video_writer = cv2.VideoWriter(filename, fourcc, self.output_fps, (width, height))
-            for frame_path in frame_files:
-                frame = read_from_image(frame_path)
+            for frame in frames:
                 video_writer.write(frame)
             video_writer.release()
             return True
@@ -1,4 +1,3 @@
-import glob
 import os
 import shutil
 from argparse import Namespace
@@ -6,10 +5,12 @@ from typing import List
 
 from sinner.handlers.frame.BaseFrameHandler import BaseFrameHandler
 from sinner.handlers.frame.EOutOfRange import EOutOfRange
-from sinner.helpers.FrameHelper import read_from_image
+from sinner.helpers.FrameHelper import read_from_image, is_frame_file, write_to_image, list_target_frames
+from sinner.models.FrameStore import FrameStore
+from sinner.models.ProgressJournal import ProgressJournal
 from sinner.models.NumberedFrame import NumberedFrame
 from sinner.typing import NumeratedFramePath
-from sinner.utilities import is_image, get_file_name, path_exists, is_dir
+from sinner.utilities import get_file_name, path_exists, is_dir
 from sinner.validators.AttributeLoader import Rules
 
 
@@ -20,6 +21,7 @@ class DirectoryHandler(BaseFrameHandler):
     _fc: int | None
     _resolution: tuple[int, int]
     _frames_path: list[str] | None = None
+    _frame_store: FrameStore | None = None  # if the directory contains a frame store, frames are read from it
 
     def rules(self) -> Rules:
         return [
@@ -31,6 +33,8 @@ class DirectoryHandler(BaseFrameHandler):
     def __init__(self, target_path: str, parameters: Namespace, fps: float | None = None, fc: int | None = None, resolution: tuple[int, int] | None = None):
         if not path_exists(target_path) or not is_dir(target_path):  # todo: move to validator
             raise Exception(f"{target_path} should point to a directory with image files")
+        if FrameStore.exists(target_path):
+            self._frame_store = FrameStore(target_path)
         super().__init__(target_path, parameters)
         self._fps = fps
         self._fc = fc
@@ -46,10 +50,12 @@ class DirectoryHandler(BaseFrameHandler):
 
     @property
     def fc(self) -> int:
+        if self._fc is None and self._frame_store is not None:
+            self._fc = len(self._frame_store)
         if self._fc is None:
             image_count = 0
             for file in os.scandir(self._target_path):
-                if is_image(file.path):
+                if is_frame_file(file.path):
                     image_count += 1
             self._fc = image_count
         return self._fc
@@ -67,20 +73,29 @@ class DirectoryHandler(BaseFrameHandler):
         self._resolution = value
 
     def get_frames_paths(self, path: str, frames_range: tuple[int | None, int | None] = (None, None)) -> List[NumeratedFramePath]:
-        if self._frames_path is None:
-            self._frames_path = sorted((file_path for file_path in glob.glob(os.path.join(glob.escape(self._target_path), '*.*')) if is_image(file_path)))
         start_frame = frames_range[0] if frames_range[0] is not None else 0
+        if self._frame_store is not None:
+            return super().get_frames_paths(self._target_path, (start_frame, frames_range[1] + 1 if frames_range[1] is not None else None))
+        if self._frames_path is None:
+            self._frames_path = list_target_frames(self._target_path)
         stop_frame = frames_range[1] + 1 if frames_range[1] is not None else len(self._frames_path)
         return [(frames_index, file_path) for frames_index, file_path in enumerate(self._frames_path)][start_frame:stop_frame]
 
     def extract_frame(self, frame_number: int) -> NumberedFrame:
         if frame_number > self.fc:
             raise EOutOfRange(frame_number, 0, self.fc)
+        if self._frame_store is not None:
+            return NumberedFrame(frame_number, self._frame_store.read(frame_number).copy())  # processors may change the frame, but not the store
         list_frame = self.get_frames_paths(self._target_path, (frame_number, frame_number))
         frame_path = list_frame[0][1]
         return NumberedFrame(frame_number, read_from_image(frame_path), get_file_name(frame_path))  # zero-based sorted frames list
 
     def result(self, from_dir: str, filename: str, audio_target: str | None = None) -> bool:
+        if FrameStore.exists(from_dir):  # frames names aren't stored, so frames are saved by their indexes
+            self.update_status(f"Saving results from the frame store in {from_dir} to {filename}")
+            for numbered_frame in FrameStore(from_dir).stream():
+                write_to_image(numbered_frame.frame, os.path.join(filename, f'{numbered_frame.index}.png'))
+            return True
         self.update_status(f"Copying results from {from_dir} to {filename}")
-        shutil.copytree(from_dir, filename, dirs_exist_ok=True)
+        shutil.copytree(from_dir, filename, dirs_exist_ok=True, ignore=shutil.ignore_patterns(f'*.{ProgressJournal.EXTENSION}'))
         return True  # Handler can't product any result
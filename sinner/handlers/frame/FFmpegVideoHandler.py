@@ -1,27 +1,35 @@
+import json
 import os
 import shutil
 import subprocess
 from argparse import Namespace
 from pathlib import Path
-from typing import List
+from typing import List, Iterator, IO, Iterable
 
-import cv2
-from numpy import uint8, frombuffer
+from numpy import uint8, empty, ascontiguousarray
 
 from sinner.Status import Mood
 from sinner.handlers.frame.BaseFrameHandler import BaseFrameHandler
 from sinner.handlers.frame.EOutOfRange import EOutOfRange
+from sinner.helpers.FrameHelper import IMAGE_FRAME_FORMATS, write_to_image, read_from_image, list_frame_files, get_frame_format
+from sinner.models.FrameIndex import FrameIndex
+from sinner.models.FrameStore import FrameStore
+from sinner.models.MediaMetadata import MediaMetadata
 from sinner.models.NumberedFrame import NumberedFrame
-from sinner.typing import NumeratedFramePath
+from sinner.typing import NumeratedFramePath, Frame, UTF8
+from sinner.utilities import is_int, is_float
 from sinner.validators.AttributeLoader import Rules
 
 
 class FFmpegVideoHandler(BaseFrameHandler):
     emoji: str = '🎥'
+    streamable: bool = True
 
     output_fps: float
     ffmpeg_resulting_parameters: str
 
+    _frame_index: FrameIndex | None = None
+
     def rules(self) -> Rules:
         return [
             {
@@ -64,67 +72,203 @@ class FFmpegVideoHandler(BaseFrameHandler):
     @property
     def fps(self) -> float:
         if self._fps is None:
-            command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=avg_frame_rate', '-of', 'default=noprint_wrappers=1:nokey=1', self._target_path]
-            output = subprocess.check_output(command).decode().strip().split('/')
-            try:
-                numerator, denominator = map(int, output)
-                self._fps = numerator / denominator
-            except Exception as exception:
-                self.update_status(message=str(exception), mood=Mood.BAD)
-                self._fps = 30.0
+            self._fps = self.metadata.fps if self.metadata.fps is not None else 30.0
         return self._fps
 
     @property
     def fc(self) -> int:
         if self._fc is None:
-            try:
-                command = ['ffprobe', '-v', 'error', '-count_frames', '-select_streams', 'v:0', '-show_entries', 'stream=nb_frames', '-of', 'default=nokey=1:noprint_wrappers=1', self._target_path]
-                output = subprocess.check_output(command, stderr=subprocess.STDOUT).decode('utf-8').strip()  # can be very slow!
-                if 'N/A' == output:
-                    return 1  # non-frame files, still processable
-                self._fc = int(output)
-            except Exception as exception:
-                self.update_status(message=str(exception), mood=Mood.BAD)
-                self._fc = 0
+            self._fc = self.metadata.fc if self.metadata.fc is not None else 0
         return self._fc
 
     @property
     def resolution(self) -> tuple[int, int]:
         if self._resolution is None:
-            try:
-                command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=width,height', '-of', 'csv=s=x:p=0', self._target_path]
-                output = subprocess.check_output(command, stderr=subprocess.STDOUT).decode('utf-8').strip()  # can be very slow!
-                if 'N/A' == output:
-                    self._resolution = (0, 0)  # non-frame files, still processable
-                w, h = output.split('x')
-                self._resolution = int(w), int(h)
-            except Exception as exception:
-                self.update_status(message=str(exception), mood=Mood.BAD)
-                self._resolution = 0, 0
+            self._resolution = self.metadata.resolution if self.metadata.resolution is not None else (0, 0)
         return self._resolution
 
+    def probe(self, metadata: MediaMetadata) -> None:
+        """
+        Reads all the target properties with a single ffprobe call. Frames are counted only when the container header
+        has no frames count, or it does not match the stream duration
+        """
+        try:
+            command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=width,height,avg_frame_rate,nb_frames,duration:format=duration', '-of', 'json', self._target_path]
+            probe = json.loads(subprocess.check_output(command, stderr=subprocess.STDOUT).decode(UTF8))
+            stream = probe['streams'][0]
+            metadata.resolution = int(stream['width']), int(stream['height'])
+            numerator, denominator = map(int, stream.get('avg_frame_rate', '0/0').split('/'))
+            metadata.fps = numerator / denominator if denominator != 0 and numerator != 0 else 30.0
+            duration = stream.get('duration', probe.get('format', {}).get('duration'))
+            metadata.duration = float(duration) if is_float(str(duration)) else None
+            header_frames_count = int(stream['nb_frames']) if is_int(str(stream.get('nb_frames'))) else 0
+            if header_frames_count > 0 and (metadata.duration is None or abs(header_frames_count - metadata.duration * metadata.fps) <= metadata.fps):
+                metadata.fc = header_frames_count
+            else:  # the header value is absent or wrong, so packets have to be counted (it doesn't require decoding)
+                metadata.fc = self.count_packets()
+            if metadata.duration is None:
+                metadata.duration = metadata.fc / metadata.fps
+        except Exception as exception:
+            self.update_status(message=str(exception), mood=Mood.BAD)
+
+    def count_packets(self) -> int:
+        command = ['ffprobe', '-v', 'error', '-count_packets', '-select_streams', 'v:0', '-show_entries', 'stream=nb_read_packets', '-of', 'default=nokey=1:noprint_wrappers=1', self._target_path]
+        output = subprocess.check_output(command, stderr=subprocess.STDOUT).decode(UTF8).strip()
+        if not is_int(output) or int(output) == 0:
+            return 1  # non-frame files, still processable
+        return int(output)
+
     def get_frames_paths(self, path: str, frames_range: tuple[int | None, int | None] = (None, None)) -> List[NumeratedFramePath]:
         filename_length = len(str(self.fc))  # a way to determine frame names length
         Path(path).mkdir(parents=True, exist_ok=True)
         start_frame = frames_range[0] if frames_range[0] is not None else 0
         stop_frame = frames_range[1] if frames_range[1] is not None else self.fc
-        self.run(['-i', self._target_path, '-vf', f"select='between(n,{start_frame},{stop_frame})'", '-vsync', '0', '-pix_fmt', 'rgb24', '-frame_pts', '1', os.path.join(path, f'%{filename_length}d.png')])
+        if self.temp_format in IMAGE_FRAME_FORMATS:
+            command = ['-i', self._target_path, '-vf', f"select='between(n,{start_frame},{stop_frame})'", '-vsync', '0', '-frame_pts', '1']
+            if self.temp_format == 'png':
+                command.extend(['-pix_fmt', 'rgb24'])
+                if self.png_compression is not None:
+                    command.extend(['-compression_level', str(self.png_compression)])
+            command.append(os.path.join(path, f'%{filename_length}d.{self.temp_format}'))
+            self.run(command)
+        else:  # ffmpeg can't write numpy arrays
+            frame_store = FrameStore(path, self.fc) if self.temp_format == FrameStore.FORMAT else None
+            for numbered_frame in self.stream(start_frame):
+                if numbered_frame.index > stop_frame:
+                    break
+                if frame_store is not None:
+                    frame_store.write(numbered_frame.index, numbered_frame.frame)
+                else:
+                    write_to_image(numbered_frame.frame, os.path.join(path, f'{str(numbered_frame.index).zfill(filename_length)}.{self.temp_format}'))
         return super().get_frames_paths(path)
 
+    @property
+    def frame_index(self) -> FrameIndex | None:
+        if self._frame_index is None:
+            try:
+                self._frame_index = FrameIndex(self._target_path, self.cache_path(self.temp_dir, FrameIndex.__name__, self._target_path))
+            except Exception as exception:
+                self.update_status(message=str(exception), mood=Mood.BAD)
+        return self._frame_index
+
+    def seek_arguments(self, frame_number: int) -> List[str]:
+        """
+        Returns ffmpeg input and filter arguments, which make the output start from the certain frame. If the frame index
+        is available, decoding starts at the nearest preceding keyframe, so no more than one GOP is decoded before it
+        """
+        if frame_number == 0:
+            return ['-i', self._target_path]
+        index = self.frame_index
+        if index is not None and frame_number < len(index):
+            return ['-ss', f'{index.seek_time(frame_number):.6f}', '-noaccurate_seek', '-copyts', '-i', self._target_path, '-vf', f"select='gte(t,{index.select_time(frame_number):.6f})'", '-vsync', '0']
+        return ['-i', self._target_path, '-vf', f"select='gte(n,{frame_number})'", '-vsync', '0']
+
     def extract_frame(self, frame_number: int) -> NumberedFrame:
         if frame_number > self.fc:
             raise EOutOfRange(frame_number, 0, self.fc)
-        command = ['ffmpeg', '-i', self._target_path, '-pix_fmt', 'rgb24', '-vf', f"select='eq(n,{frame_number})',setpts=N/FRAME_RATE/TB", '-vframes', '1', '-f', 'image2pipe', '-c:v', 'png', '-']
-        output = subprocess.check_output(command, stderr=subprocess.DEVNULL)
-        return NumberedFrame(frame_number, cv2.imdecode(frombuffer(output, uint8), cv2.IMREAD_COLOR))
+        width, height = self.resolution
+        command = ['ffmpeg', '-hide_banner', '-loglevel', 'error']
+        command.extend(self.seek_arguments(frame_number))
+        command.extend(['-frames:v', '1', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'])
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        frame: Frame = empty((height, width, 3), dtype=uint8)
+        is_read = self.read_into(process.stdout, frame)  # type: ignore[arg-type]
+        process.communicate()
+        if not is_read:
+            raise Exception(f"Error reading frame {frame_number}")
+        return NumberedFrame(frame_number, frame)
+
+    def stream(self, start_frame: int = 0) -> Iterator[NumberedFrame]:
+        """
+        Decodes frames with a single ffmpeg process, that writes raw BGR frames into the pipe
+        """
+        width, height = self.resolution
+        command = ['ffmpeg', '-hide_banner', '-loglevel', 'error']
+        command.extend(self.seek_arguments(start_frame))
+        command.extend(['-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'])
+        self.update_status(message=' '.join(command), mood=Mood.NEUTRAL)
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=width * height * 3)
+        frame_index = start_frame
+        try:
+            while True:
+                frame: Frame = empty((height, width, 3), dtype=uint8)  # the frame buffer is filled directly from the pipe
+                if not self.read_into(process.stdout, frame):  # type: ignore[arg-type]
+                    break
+                yield NumberedFrame(frame_index, frame)
+                frame_index += 1
+        finally:
+            process.kill()
+            process.communicate()
+
+    @staticmethod
+    def read_into(pipe: IO[bytes], frame: Frame) -> bool:
+        """
+        Fills the frame buffer with data from the pipe
+        :return: False, if the pipe is ended before the frame is filled
+        """
+        buffer = frame.data.cast('B')
+        filled = 0
+        while filled < len(buffer):
+            read = pipe.readinto(buffer[filled:])  # type: ignore[attr-defined]
+            if not read:
+                return False
+            filled += read
+        return True
+
+    def result_arguments(self, filename: str, audio_target: str | None = None) -> List[str]:
+        """
+        Returns ffmpeg arguments, which follow the frames input to encode the resulting video
+        """
+        arguments = self.ffmpeg_resulting_parameters.split(' ')
+        arguments.extend(['-r', str(self.output_fps), filename])
+        if audio_target:
+            arguments.extend(['-i', audio_target, '-shortest'])
+        return arguments
 
     def result(self, from_dir: str, filename: str, audio_target: str | None = None) -> bool:
         self.update_status(f"Resulting frames from {from_dir} to {filename} with {self.output_fps} FPS")
+        if FrameStore.exists(from_dir):  # frames are piped as views of the mapped store file
+            return self.encode(FrameStore(from_dir).stream(), filename, audio_target)
+        if self.temp_format not in IMAGE_FRAME_FORMATS:  # ffmpeg can't read numpy arrays, so they are piped
+            frames_files = [frame_path for frame_path in list_frame_files(from_dir) if get_frame_format(frame_path) == self.temp_format]
+            return self.encode((NumberedFrame(frame_index, read_from_image(frame_path)) for frame_index, frame_path in enumerate(frames_files)), filename, audio_target)
         filename_length = len(str(self.fc))  # a way to determine frame names length
         Path(os.path.dirname(filename)).mkdir(parents=True, exist_ok=True)
-        command = ['-framerate', str(self.output_fps), '-i', os.path.join(from_dir, f'%0{filename_length}d.png')]
-        command.extend(self.ffmpeg_resulting_parameters.split(' '))
-        command.extend(['-r', str(self.output_fps), filename])
-        if audio_target:
-            command.extend(['-i', audio_target, '-shortest'])
+        command = ['-framerate', str(self.output_fps), '-i', os.path.join(from_dir, f'%0{filename_length}d.{self.temp_format}')]
+        command.extend(self.result_arguments(filename, audio_target))
         return self.run(command)
+
+    def encode(self, frames: Iterable[NumberedFrame], filename: str, audio_target: str | None = None) -> bool:
+        """
+        Encodes the resulting video from frames, written as raw BGR data into the ffmpeg input pipe, so processed
+        frames aren't saved to (and read back from) temp files. The encoder starts with the first frame, as it defines
+        the resulting resolution
+        :param frames: frames in the resulting order
+        :return: True, if all frames are encoded
+        """
+        self.update_status(f"Encoding frames stream to {filename} with {self.output_fps} FPS")
+        Path(os.path.dirname(filename)).mkdir(parents=True, exist_ok=True)
+        process: subprocess.Popen[bytes] | None = None
+        try:
+            for numbered_frame in frames:
+                if process is None:
+                    height, width = numbered_frame.frame.shape[:2]
+                    command = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-framerate', str(self.output_fps), '-i', '-']
+                    command.extend(self.result_arguments(filename, audio_target))
+                    self.update_status(message=' '.join(command), mood=Mood.NEUTRAL)
+                    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+                process.stdin.write(ascontiguousarray(numbered_frame.frame).data)  # type: ignore[union-attr]
+        except Exception as exception:
+            self.update_status(message=str(exception), mood=Mood.BAD)
+            if process is not None:
+                process.kill()
+                process.communicate()
+            return False
+        if process is None:
+            self.update_status(message='There are no frames to encode', mood=Mood.BAD)
+            return False
+        _, errors = process.communicate()
+        if process.returncode != 0:
+            self.update_status(message=errors.decode(UTF8, errors='replace'), mood=Mood.BAD)
+            return False
+        return True
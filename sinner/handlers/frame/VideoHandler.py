@@ -1,5 +1,9 @@
+from typing import Iterator
+
 from sinner.handlers.frame.CV2VideoHandler import CV2VideoHandler
 from sinner.handlers.frame.FFmpegVideoHandler import FFmpegVideoHandler
+from sinner.models.MediaMetadata import MediaMetadata
+from sinner.models.NumberedFrame import NumberedFrame
 from sinner.validators.AttributeLoader import Rules
 
 
@@ -25,6 +29,16 @@ class VideoHandler(CV2VideoHandler, FFmpegVideoHandler):
             }
         ]
 
+    def probe(self, metadata: MediaMetadata) -> None:
+        if FFmpegVideoHandler.available():
+            return FFmpegVideoHandler.probe(self, metadata)
+        return super().probe(metadata)
+
+    def stream(self, start_frame: int = 0) -> Iterator[NumberedFrame]:
+        if FFmpegVideoHandler.available():
+            return FFmpegVideoHandler.stream(self, start_frame)
+        return super().stream(start_frame)
+
     def result(self, from_dir: str, filename: str, audio_target: str | None = None) -> bool:
         if FFmpegVideoHandler.available():
             return FFmpegVideoHandler.result(self, from_dir, filename, audio_target)
@@ -1,22 +1,132 @@
 # helper methods to work with frames entity
+import glob
+import io
 import os.path
 from pathlib import Path
+from typing import List, Any, Callable, Set
 
 import cv2
+import numpy
+from PIL import Image
 from numpy import fromfile, uint8, full
 from psutil import WINDOWS
 
+from sinner.models.FrameStore import FrameStore
 from sinner.typing import Frame
+from sinner.utilities import is_image, is_file
+from sinner.validators.AttributeLoader import Rules
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
 
 EmptyFrame = full([1, 1, 3], 255, dtype=uint8)
 
+# formats to store temporary frames: images, written by OpenCV, and numpy arrays (raw or losslessly compressed)
+IMAGE_FRAME_FORMATS = ['png', 'bmp']
+ARRAY_FRAME_FORMATS = ['npy', 'zst', 'lz4']
+FRAME_FORMATS = IMAGE_FRAME_FORMATS + ARRAY_FRAME_FORMATS
+# compressed arrays formats and their (compress, decompress) methods, None if the library isn't installed
+ARRAY_COMPRESSORS: dict[str, tuple[Callable[[Any], bytes], Callable[[bytes], bytes]] | None] = {
+    'zst': (lambda data: zstandard.compress(data, 1), zstandard.decompress) if zstandard is not None else None,
+    'lz4': (lz4.frame.compress, lz4.frame.decompress) if lz4 is not None else None,
+}
+
 
 # be noticed that frames shapes have HEIGHT, WIDTH order, so all methods here use that order too
 def create(size: tuple[int, int] = (1, 1)) -> Frame:
     return full([*size, 3], 255, dtype=uint8)
 
 
+def get_frame_format(path: str) -> str:
+    return os.path.splitext(path)[1].lstrip('.').lower()
+
+
+def available_frame_formats() -> List[str]:
+    """
+    Returns formats, which can be used to store temporary frames. Compressed arrays need optional libraries
+    """
+    return [frame_format for frame_format in FRAME_FORMATS if frame_format not in ARRAY_COMPRESSORS or ARRAY_COMPRESSORS[frame_format] is not None]
+
+
+def temp_frames_rules() -> Rules:
+    """
+    Returns rules of temporary frames parameters, shared by frame handlers (extracted frames) and the state (processed frames)
+    """
+    return [
+        {
+            'parameter': 'temp-format',
+            'default': 'png',
+            'choices': available_frame_formats() + [FrameStore.FORMAT],
+            'help': 'The format of temporary frames'
+        },
+        {
+            'parameter': 'png-compression',
+            'filter': lambda value: None if value is None else int(value),
+            'valid': lambda attribute, value: value is None or 0 <= int(value) <= 9,
+            'help': 'The compression level (0-9) of temporary png frames'
+        },
+    ]
+
+
+def is_frame_file(path: str) -> bool:
+    return is_image(path) or (is_file(path) and get_frame_format(path) in ARRAY_FRAME_FORMATS)
+
+
+def list_target_frames(directory: str) -> List[str]:
+    """
+    Returns sorted paths of all frames (images and frames arrays) of the directory target, so a frame index is its position
+    """
+    return sorted(file_path for file_path in glob.glob(os.path.join(glob.escape(directory), '*.*')) if is_frame_file(file_path))
+
+
+def get_frame_shape(path: str) -> tuple[int, ...]:
+    """
+    Returns the shape of the frame file, as it is read by read_from_image(), reading only the image header, when possible
+    """
+    frame_format = get_frame_format(path)
+    if frame_format == 'npy':
+        return tuple(numpy.load(path, mmap_mode='r').shape)
+    if frame_format in ARRAY_FRAME_FORMATS:
+        return tuple(read_from_array(path, frame_format).shape)
+    with Image.open(path) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in (5, 6, 7, 8):  # OpenCV applies the EXIF orientation, which swaps sides
+            width, height = height, width
+    return height, width, 3  # images are read as BGR frames
+
+
+def has_same_shapes(frames_paths: List[str]) -> bool:
+    """
+    Checks if all frames files have the same shape (e.g. to store them in one FrameStore)
+    """
+    shapes: Set[tuple[int, ...]] = set()
+    for frame_path in frames_paths:
+        shapes.add(get_frame_shape(frame_path))
+        if len(shapes) > 1:
+            return False
+    return True
+
+
+def list_frame_files(directory: str) -> List[str]:
+    """
+    Returns sorted paths of all frames files in the directory
+    """
+    if not os.path.isdir(directory):
+        return []
+    with os.scandir(directory) as entries:
+        return sorted(entry.path for entry in entries if entry.is_file() and get_frame_format(entry.name) in FRAME_FORMATS)
+
+
 def read_from_image(path: str) -> Frame:
+    frame_format = get_frame_format(path)
+    if frame_format in ARRAY_FRAME_FORMATS:
+        return read_from_array(path, frame_format)
     if WINDOWS:  # issue #511
         image = cv2.imdecode(fromfile(path, dtype=uint8), cv2.IMREAD_UNCHANGED)
         if len(image.shape) == 2:  # fixes the b/w images issue
@@ -28,14 +138,47 @@ def read_from_image(path: str) -> Frame:
         return cv2.imread(path)
 
 
-def write_to_image(image: Frame, path: str) -> bool:
+def write_to_image(image: Frame, path: str, png_compression: int | None = None) -> bool:
+    """
+    Saves the frame to the file, the file extension sets the format (see FRAME_FORMATS)
+    :param png_compression: PNG compression level (0-9), if None, the OpenCV default is used
+    """
     Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+    frame_format = get_frame_format(path)
+    if frame_format in ARRAY_FRAME_FORMATS:
+        return write_to_array(image, path, frame_format)
+    parameters = [cv2.IMWRITE_PNG_COMPRESSION, png_compression] if png_compression is not None and frame_format == 'png' else []
     if WINDOWS:  # issue #511
-        is_success, im_buf_arr = cv2.imencode(".png", image)
+        is_success, im_buf_arr = cv2.imencode(f".{frame_format or 'png'}", image, parameters)
         im_buf_arr.tofile(path)
         return is_success
     else:
-        return cv2.imwrite(path, image)
+        return cv2.imwrite(path, image, parameters)
+
+
+def read_from_array(path: str, frame_format: str) -> Frame:
+    if frame_format == 'npy':
+        return numpy.load(path)
+    compressor = ARRAY_COMPRESSORS.get(frame_format)
+    if compressor is None:
+        raise Exception(f"The {frame_format} frames format is not available")
+    with open(path, 'rb') as array_file:
+        data = compressor[1](array_file.read())
+    return numpy.load(io.BytesIO(data))
+
+
+def write_to_array(frame: Frame, path: str, frame_format: str) -> bool:
+    if frame_format == 'npy':
+        numpy.save(path, frame)
+        return True
+    compressor = ARRAY_COMPRESSORS.get(frame_format)
+    if compressor is None:
+        raise Exception(f"The {frame_format} frames format is not available")
+    buffer = io.BytesIO()
+    numpy.save(buffer, frame)
+    with open(path, 'wb') as array_file:
+        array_file.write(compressor[0](buffer.getbuffer()))
+    return True
 
 
 def scale(frame: Frame, scale_: float = 0.2) -> Frame:
@@ -0,0 +1,67 @@
+import math
+import threading
+from collections import deque
+from typing import List, Deque
+
+from insightface.app.common import Face
+
+
+class DetectionSize:
+    """
+    Chooses the faces detector input size for frames. The size is the longer side of the detector input, the shorter
+    one is fitted to the frame proportions, so the detector doesn't waste time on the padding. The auto size is chosen
+    from the frame resolution and the largest face, detected on recent frames: the input is scaled so that face stays
+    large enough for the detector, but the frame is never upscaled. The detector maps found faces back to the frame
+    coordinates, so the input size affects only the detection speed and the smallest detectable face
+    """
+    AUTO: str = 'auto'
+    DEFAULT: int = 640
+    STEP: int = 32  # detector strides require input sides, that are multiples of 32
+    MIN_SIZE: int = 320
+    MAX_SIZE: int = 1920
+    FACE_SIZE: int = 64  # the auto size keeps the largest face side on the detector input about this value
+    RECENT: int = 30  # count of recent detections, the largest face is chosen from
+
+    size: int
+    auto: bool
+
+    _faces_sizes: Deque[float]  # the largest face side (in frame pixels) of each recent detection
+    _lock: threading.Lock
+
+    def __init__(self, size: int | str = DEFAULT):
+        """
+        :param size: the detector input longer side, or 'auto'
+        """
+        self.auto = str(size) == self.AUTO
+        self.size = self.DEFAULT if self.auto else int(size)
+        self._faces_sizes = deque(maxlen=self.RECENT)
+        self._lock = threading.Lock()
+
+    def for_frame(self, shape: tuple[int, ...]) -> tuple[int, int]:
+        """
+        Returns the detector input size (width, height) for the frame shape
+        """
+        height, width = shape[:2]
+        long_side = max(height, width)
+        scale = (self.auto_size(long_side) if self.auto else self.size) / long_side
+        return self.fit(width * scale), self.fit(height * scale)
+
+    def auto_size(self, long_side: int) -> float:
+        with self._lock:
+            largest_face = max(self._faces_sizes, default=0)
+        if largest_face <= 0:  # no recent faces, small faces may be anywhere
+            size: float = min(long_side, self.DEFAULT)
+        else:
+            size = long_side * self.FACE_SIZE / largest_face
+        return min(max(size, self.MIN_SIZE), max(min(long_side, self.MAX_SIZE), self.MIN_SIZE))
+
+    def fit(self, value: float) -> int:
+        return max(math.ceil(value / self.STEP) * self.STEP, self.STEP)
+
+    def remember(self, faces: List[Face]) -> None:
+        """
+        Remembers the largest face of a detection for the auto size
+        """
+        if self.auto:
+            with self._lock:
+                self._faces_sizes.append(max((max(face.bbox[2] - face.bbox[0], face.bbox[3] - face.bbox[1]) for face in faces), default=0))
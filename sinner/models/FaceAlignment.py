@@ -0,0 +1,108 @@
+from typing import Callable, List
+
+import cv2
+import numpy
+from insightface.app.common import Face
+
+from sinner.models.FacePaste import FacePaste
+from sinner.typing import Frame
+
+
+class FaceAlignment:
+    """
+    Aligns faces to the FFHQ face template by their five keypoints (eyes, nose and mouth corners), the way facexlib
+    prepares faces for GFPGAN, and pastes restored aligned faces back into the frame with a soft square mask
+    """
+    SIZE: int = 512  # the aligned face side
+    TEMPLATE: numpy.ndarray = numpy.array([[192.98138, 239.94708], [318.90277, 240.1936], [256.63416, 314.01935], [201.26117, 371.41043], [313.08905, 371.15118]], dtype=numpy.float32)  # type: ignore[type-arg]
+    BORDER_VALUE: tuple[int, int, int] = (135, 133, 132)  # the gray, the outside of the frame is filled with
+
+    @staticmethod
+    def align(frame: Frame, kps: numpy.ndarray) -> tuple[Frame, numpy.ndarray]:  # type: ignore[type-arg]
+        """
+        Returns the aligned face crop and the affine matrix, that maps the frame to the crop
+        :param frame: the frame
+        :param kps: five face keypoints in the frame coordinates, in the insightface (and facexlib) order
+        """
+        affine = cv2.estimateAffinePartial2D(numpy.asarray(kps, dtype=numpy.float32), FaceAlignment.TEMPLATE, method=cv2.LMEDS)[0]
+        crop = cv2.warpAffine(frame, affine, (FaceAlignment.SIZE, FaceAlignment.SIZE), borderMode=cv2.BORDER_CONSTANT, borderValue=FaceAlignment.BORDER_VALUE)
+        return crop, affine
+
+    @staticmethod
+    def enhance(frame: Frame, faces: List[Face], restore: Callable[[List[Frame]], List[Frame]], factor: float = 1, roi: bool = False) -> Frame:
+        """
+        Returns the frame (upscaled) with restored faces
+        :param frame: the frame
+        :param faces: faces with keypoints
+        :param restore: restores aligned faces
+        :param factor: the upscale factor
+        :param roi: paste faces inside their regions only, see FacePaste
+        """
+        result = FaceAlignment.upscale(frame, factor)
+        aligned = [FaceAlignment.align(frame, face.kps) for face in faces]
+        for (_, affine), restored in zip(aligned, restore([crop for crop, _ in aligned])):
+            if roi:
+                FacePaste.paste(result, restored, FaceAlignment.inverse_affine(affine, factor), FaceAlignment.feather_mask())
+            else:
+                result = FaceAlignment.paste(result, restored, affine, factor)
+        return result
+
+    @staticmethod
+    def to_tensor(crop: Frame) -> numpy.ndarray:  # type: ignore[type-arg]
+        """
+        BGR uint8 image -> RGB float NCHW tensor in the [-1, 1] range
+        """
+        image = crop[:, :, ::-1].astype(numpy.float32) / 255
+        return ((image - 0.5) / 0.5).transpose(2, 0, 1)[None]
+
+    @staticmethod
+    def to_image(output: numpy.ndarray) -> Frame:  # type: ignore[type-arg]
+        """
+        RGB float CHW tensor in the [-1, 1] range -> BGR uint8 image, like basicsr tensor2img does
+        """
+        image = (numpy.clip(output, -1, 1) + 1) / 2
+        return numpy.ascontiguousarray((image.transpose(1, 2, 0)[:, :, ::-1] * 255).round().astype(numpy.uint8))
+
+    @staticmethod
+    def upscale(frame: Frame, factor: float) -> Frame:
+        if factor == 1:
+            return frame.copy()
+        height, width = frame.shape[:2]
+        return cv2.resize(frame, (int(width * factor), int(height * factor)), interpolation=cv2.INTER_LANCZOS4)
+
+    @staticmethod
+    def paste(frame: Frame, face: Frame, affine: numpy.ndarray, factor: float = 1) -> Frame:  # type: ignore[type-arg]
+        """
+        Pastes the restored aligned face into the frame
+        :param frame: the frame, already upscaled by the factor
+        :param face: the restored aligned face
+        :param affine: the affine matrix of the face alignment on the original frame
+        :param factor: the upscale factor
+        """
+        height, width = frame.shape[:2]
+        inverse_affine = FaceAlignment.inverse_affine(affine, factor)
+        restored = cv2.warpAffine(face, inverse_affine, (width, height))
+        mask = cv2.warpAffine(numpy.ones((FaceAlignment.SIZE, FaceAlignment.SIZE), dtype=numpy.float32), inverse_affine, (width, height))
+        mask = cv2.erode(mask, numpy.ones((max(int(2 * factor), 1), max(int(2 * factor), 1)), numpy.uint8))  # removes black borders
+        edge = max(int(numpy.sum(mask) ** 0.5) // 20, 1)  # the blending edge depends on the face area
+        mask = cv2.erode(mask, numpy.ones((edge * 2, edge * 2), numpy.uint8))
+        mask = cv2.GaussianBlur(mask, (edge * 2 + 1, edge * 2 + 1), 0)[:, :, None]
+        return (mask * restored + (1 - mask) * frame).astype(numpy.uint8)
+
+    @staticmethod
+    def inverse_affine(affine: numpy.ndarray, factor: float = 1) -> numpy.ndarray:  # type: ignore[type-arg]
+        """
+        Returns the affine matrix, that maps the aligned face to the frame, upscaled by the factor
+        """
+        inverse_affine = cv2.invertAffineTransform(affine) * factor
+        if factor > 1:  # facexlib offset for a more precise back alignment
+            inverse_affine[:, 2] += 0.5 * factor
+        return inverse_affine
+
+    @staticmethod
+    def feather_mask() -> numpy.ndarray:  # type: ignore[type-arg]
+        """
+        The aligned face mask, close to the one paste() makes: the blending edge is about 1/20 of the face side
+        """
+        edge = FaceAlignment.SIZE // 20
+        return FacePaste.feather_mask(FaceAlignment.SIZE, edge + 1, edge * 2 + 1)
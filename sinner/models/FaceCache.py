@@ -0,0 +1,53 @@
+import hashlib
+import os
+from pathlib import Path
+
+import numpy
+from insightface.app.common import Face
+
+from sinner.utilities import is_file
+
+
+class FaceCache:
+    """
+    Analysed faces of source images, stored in files, so each source image is analysed only once. Faces are keyed by
+    the image contents hash and the analyser signature (models and their options), so a changed image, or a face,
+    analysed differently, is never taken from the cache
+    """
+    EXTENSION: str = 'npz'
+
+    _cache_dir: str
+
+    def __init__(self, cache_dir: str):
+        self._cache_dir = cache_dir
+
+    @staticmethod
+    def key(image_path: str, signature: str) -> str:
+        """
+        Returns the cache key of the image face, analysed by the analyser with the signature
+        """
+        digest = hashlib.sha256(signature.encode())
+        with open(image_path, 'rb') as image_file:
+            for chunk in iter(lambda: image_file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f'{key}.{self.EXTENSION}')
+
+    def load(self, key: str) -> Face | None:
+        cache_path = self.get_path(key)
+        if not is_file(cache_path):
+            return None
+        try:
+            with numpy.load(cache_path, allow_pickle=False) as data:
+                return Face({name: data[name].item() if data[name].ndim == 0 else data[name] for name in data.files})
+        except Exception:  # a broken cache file is analysed again
+            return None
+
+    def save(self, key: str, face: Face) -> None:
+        cache_path = self.get_path(key)
+        Path(self._cache_dir).mkdir(parents=True, exist_ok=True)
+        temp_path = f'{cache_path}.tmp.{self.EXTENSION}'  # numpy adds the extension to paths without it
+        numpy.savez(temp_path, **{name: numpy.asarray(value) for name, value in face.items() if value is not None})  # type: ignore[arg-type]
+        os.replace(temp_path, cache_path)
@@ -0,0 +1,68 @@
+import math
+from functools import lru_cache
+
+import cv2
+import numpy
+
+from sinner.typing import Frame
+
+
+class FacePaste:
+    """
+    Pastes processed aligned faces back into the frame inside the region of interest only: the face is warped and
+    blended in the padded region around it, and only that region of the frame is written. The feather mask is
+    the same for all faces of the same aligned size, so it is made once in the aligned face coordinates and warped
+    with the face, instead of eroding and blurring a full-frame mask for each face
+    """
+    PADDING: int = 2  # pixels around the warped face, so the interpolated border isn't cut
+
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def feather_mask(size: int, margin: int, blur: int) -> numpy.ndarray:  # type: ignore[type-arg]
+        """
+        Returns the soft square mask of the aligned face (read-only, as it is shared)
+        :param size: the aligned face side
+        :param margin: the mask border, that is cut from each side (like the erosion of the mask)
+        :param blur: the gaussian blur kernel size (odd)
+        """
+        square = numpy.zeros((size, size), dtype=numpy.float32)
+        square[margin:size - margin, margin:size - margin] = 1
+        mask = cv2.GaussianBlur(square, (blur, blur), 0)
+        mask.setflags(write=False)
+        return mask
+
+    @staticmethod
+    def region(inverse_affine: numpy.ndarray, size: int, shape: tuple[int, ...]) -> tuple[int, int, int, int]:  # type: ignore[type-arg]
+        """
+        Returns the (left, top, right, bottom) frame region, covered by the aligned face, clipped by the frame
+        :param inverse_affine: the affine matrix, that maps the aligned face to the frame
+        :param size: the aligned face side
+        :param shape: the frame shape
+        """
+        corners = numpy.array([[0, 0, 1], [size, 0, 1], [0, size, 1], [size, size, 1]], dtype=numpy.float32) @ numpy.asarray(inverse_affine, dtype=numpy.float32).T
+        left = max(math.floor(corners[:, 0].min()) - FacePaste.PADDING, 0)
+        top = max(math.floor(corners[:, 1].min()) - FacePaste.PADDING, 0)
+        right = min(math.ceil(corners[:, 0].max()) + FacePaste.PADDING, shape[1])
+        bottom = min(math.ceil(corners[:, 1].max()) + FacePaste.PADDING, shape[0])
+        return left, top, max(right, left), max(bottom, top)
+
+    @staticmethod
+    def paste(frame: Frame, face: Frame, inverse_affine: numpy.ndarray, mask: numpy.ndarray) -> Frame:  # type: ignore[type-arg]
+        """
+        Blends the aligned face into the frame in place, and returns the frame
+        :param frame: the frame
+        :param face: the aligned face
+        :param inverse_affine: the affine matrix, that maps the aligned face to the frame
+        :param mask: the feather mask of the aligned face
+        """
+        left, top, right, bottom = FacePaste.region(inverse_affine, face.shape[0], frame.shape)
+        if right == left or bottom == top:  # the face is outside the frame
+            return frame
+        region_affine = numpy.array(inverse_affine, dtype=numpy.float64)
+        region_affine[:, 2] -= [left, top]
+        region_size = (right - left, bottom - top)
+        warped_face = cv2.warpAffine(face, region_affine, region_size)
+        warped_mask = cv2.warpAffine(mask, region_affine, region_size)[:, :, None]
+        region = frame[top:bottom, left:right]
+        region[:] = (warped_mask * warped_face + (1 - warped_mask) * region).astype(numpy.uint8)
+        return frame
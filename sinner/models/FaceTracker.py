@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, List, Dict
+
+import cv2
+import numpy
+from insightface.app.common import Face
+
+from sinner.typing import Frame
+
+
+@dataclass
+class Track:
+    faces: List[Face]
+    shape: tuple[int, ...]
+    thumbnail: Frame = field(repr=False)  # the downscaled grayscale frame to detect scene cuts
+
+
+class FaceTracker:
+    """
+    Tracks faces between frames: the full frame detection runs on keyframes (every N-th frame), and other frames
+    detect faces only inside expanded regions around faces of a recent frame, on the small detector input.
+    It falls back to the full detection, if there is no recent frame with faces, the scene is cut, or a face
+    is lost or its detection score drops. Frames can come in any order (e.g. from many processing threads),
+    a frame is tracked from the nearest preceding frame, which is already known
+    """
+    EXPANSION: float = 2.0  # the tracking region side, relative to the longer side of the previous face box
+    REGION_SIZE: tuple[int, int] = (192, 192)  # the detector input size for tracking regions (a multiple of 32)
+    MIN_SCORE: float = 0.6  # a tracked face with the lower detection score is considered lost
+    SCENE_CUT: float = 0.15  # the mean absolute difference (0..1) of frames thumbnails, which means a scene cut
+    THUMBNAIL_SIZE: tuple[int, int] = (32, 32)
+
+    interval: int  # keyframes interval, in frames
+    _detect: Callable[[Frame, tuple[int, int] | None], List[Face]]  # detects faces on the image with the detector input size (None for the default)
+    _tracks: OrderedDict[int, Track]  # recent frames faces by frames indexes
+    _tracks_limit: int
+    _lock: threading.Lock
+    _keyframes: int
+    _tracked: int
+
+    def __init__(self, interval: int, detect: Callable[[Frame, tuple[int, int] | None], List[Face]]):
+        """
+        :param interval: the full detection runs on every interval-th frame
+        :param detect: the faces detector
+        """
+        self.interval = interval
+        self._detect = detect
+        self._tracks = OrderedDict()
+        self._tracks_limit = max(interval * 2, 64)
+        self._lock = threading.Lock()
+        self._keyframes = 0
+        self._tracked = 0
+
+    def track(self, index: int, frame: Frame) -> List[Face]:
+        """
+        Returns faces (boxes, detection scores and keypoints) on the frame with the given index
+        """
+        thumbnail = self.thumbnail(frame)
+        reference = self.reference(index, frame.shape)
+        faces = None
+        if reference is not None and not self.is_scene_cut(reference.thumbnail, thumbnail):
+            faces = self.track_faces(frame, reference.faces)
+        with self._lock:
+            if faces is None:
+                self._keyframes += 1
+            else:
+                self._tracked += 1
+        if faces is None:
+            faces = self._detect(frame, None)
+        self.remember(index, Track(faces, frame.shape, thumbnail))
+        return faces
+
+    def reference(self, index: int, shape: tuple[int, ...]) -> Track | None:
+        """
+        Returns the nearest preceding track in the keyframes interval, if faces can be tracked from it
+        """
+        if self.interval <= 1 or index % self.interval == 0:
+            return None
+        with self._lock:
+            indexes = [track_index for track_index in self._tracks if index - self.interval < track_index < index]
+            if not indexes:
+                return None
+            track = self._tracks[max(indexes)]
+        if track.shape != shape or not track.faces:  # faces can't appear without the full detection
+            return None
+        return track
+
+    def remember(self, index: int, track: Track) -> None:
+        with self._lock:
+            self._tracks[index] = track
+            self._tracks.move_to_end(index)
+            while len(self._tracks) > self._tracks_limit:
+                self._tracks.popitem(last=False)
+
+    def track_faces(self, frame: Frame, faces: List[Face]) -> List[Face] | None:
+        """
+        Detects each face inside the region around its previous position
+        :return: None, if any face is lost
+        """
+        tracked_faces: List[Face] = []
+        for face in faces:
+            left, top, right, bottom = self.region(face.bbox, frame.shape)
+            found_faces = [found for found in self._detect(frame[top:bottom, left:right], self.REGION_SIZE) if found.det_score >= self.MIN_SCORE]
+            if not found_faces:
+                return None
+            center = (numpy.array(face.bbox[:2]) + numpy.array(face.bbox[2:4])) / 2 - [left, top]
+            found_face = min(found_faces, key=lambda found: float(numpy.linalg.norm((found.bbox[:2] + found.bbox[2:4]) / 2 - center)))
+            tracked_faces.append(self.shift_face(found_face, left, top))
+        return tracked_faces
+
+    def region(self, bbox: numpy.ndarray, shape: tuple[int, ...]) -> tuple[int, int, int, int]:  # type: ignore[type-arg]
+        """
+        Returns the square region (clipped by the frame) around the face box
+        """
+        center_x, center_y = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+        half_side = max(bbox[2] - bbox[0], bbox[3] - bbox[1]) * self.EXPANSION / 2
+        return max(int(center_x - half_side), 0), max(int(center_y - half_side), 0), min(int(center_x + half_side), shape[1]), min(int(center_y + half_side), shape[0])
+
+    @staticmethod
+    def shift_face(face: Face, shift_x: int, shift_y: int) -> Face:
+        bbox = numpy.array(face.bbox, dtype=numpy.float32) + numpy.array([shift_x, shift_y, shift_x, shift_y], dtype=numpy.float32)
+        kps = None if face.kps is None else numpy.array(face.kps, dtype=numpy.float32) + numpy.array([shift_x, shift_y], dtype=numpy.float32)
+        return Face(bbox=bbox, kps=kps, det_score=face.det_score)
+
+    def thumbnail(self, frame: Frame) -> Frame:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+    def is_scene_cut(self, previous: Frame, current: Frame) -> bool:
+        return float(numpy.mean(cv2.absdiff(previous, current))) / 255 > self.SCENE_CUT
+
+    @property
+    def statistics(self) -> Dict[str, int]:
+        with self._lock:
+            return {'keyframes': self._keyframes, 'tracked': self._tracked}
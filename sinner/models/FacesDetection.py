@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+from typing import List
+
+import numpy
+from insightface.app.common import Face
+
+from sinner.typing import Frame
+
+# face properties, that are coordinates on the frame, and should be scaled with it
+GEOMETRY_KEYS: List[str] = ['bbox', 'kps', 'landmark_2d_106', 'landmark_3d_68']
+
+
+@dataclass
+class FacesDetection:
+    """
+    Faces, detected on a frame, with the frame shape they were detected on. Processors keep the faces geometry
+    (a swapped or an enhanced face stays in place), so the detection can be reused by next processors of the frame
+    """
+    faces: List[Face]
+    shape: tuple[int, ...]
+
+    def for_frame(self, frame: Frame) -> List[Face] | None:
+        """
+        Returns faces for the frame: as is, if the frame geometry is the same, or scaled, if the frame was resized.
+        Returns None, if the frame proportions were changed, so the detection can't be reused
+        """
+        if frame.shape[:2] == self.shape[:2]:
+            return self.faces
+        scale_y = frame.shape[0] / self.shape[0]
+        scale_x = frame.shape[1] / self.shape[1]
+        if abs(scale_x - scale_y) > 0.01:
+            return None
+        return [self.scale_face(face, scale_x, scale_y) for face in self.faces]
+
+    @staticmethod
+    def scale_face(face: Face, scale_x: float, scale_y: float) -> Face:
+        scaled_face = Face(face)
+        for key in GEOMETRY_KEYS:
+            points = face.get(key)
+            if points is None:
+                continue
+            points = numpy.array(points, dtype=numpy.float32)
+            if key == 'bbox':
+                points *= numpy.array([scale_x, scale_y, scale_x, scale_y], dtype=numpy.float32)
+            else:
+                points[..., 0] *= scale_x
+                points[..., 1] *= scale_y
+            scaled_face[key] = points
+        return scaled_face
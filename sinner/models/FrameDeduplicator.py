@@ -0,0 +1,138 @@
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List
+
+import cv2
+import numpy
+
+from sinner.models.NumberedFrame import NumberedFrame
+from sinner.typing import Frame
+
+
+@dataclass
+class ProcessedFrame:
+    fingerprint: numpy.ndarray = field(repr=False)  # type: ignore[type-arg]
+    shape: tuple[int, ...]
+    frame: Frame = field(repr=False)  # the processing result (read-only, when remembered)
+
+
+class FrameDeduplicator:
+    """
+    Reuses processing results of duplicate frames (static scenes, slideshows, screen recordings, an image camera input).
+    Each frame is compared with recently processed frames by a fingerprint: the frame, downscaled to a small size,
+    so every fingerprint pixel is the mean of a frame area. A frame is a duplicate, if no area differs from the same
+    area of a recent frame more than the threshold, then the result of that frame is reused instead of processing.
+    Frames can come in any order (e.g. from many processing threads), a frame, which is still in processing,
+    isn't matched. Results are kept as read-only copies, and reused results are returned as copies, so in-place changes
+    of returned frames (e.g. by FacePaste) don't change other frames
+    """
+    FINGERPRINT_SIZE: tuple[int, int] = (32, 32)
+    RECENT: int = 4  # count of recent results, frames are compared with (results are kept in memory)
+
+    threshold: float  # the maximal difference of frames areas, in brightness levels (0..255)
+
+    _recent: Deque[ProcessedFrame]
+    _lock: threading.Lock
+    _hits: int
+    _misses: int
+
+    def __init__(self, threshold: float, recent: int = RECENT):
+        """
+        :param threshold: the maximal difference of frames areas to consider frames duplicates
+        :param recent: count of recent results to compare frames with
+        """
+        self.threshold = threshold
+        self._recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def fingerprint(frame: Frame) -> numpy.ndarray:  # type: ignore[type-arg]
+        return cv2.resize(frame, FrameDeduplicator.FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA).astype(numpy.int16)
+
+    def find(self, fingerprint: numpy.ndarray, shape: tuple[int, ...]) -> Frame | None:  # type: ignore[type-arg]
+        """
+        Returns the processed frame of the recent duplicate, or None
+        """
+        with self._lock:
+            recent = list(self._recent)
+        for processed in reversed(recent):  # the latest frame is the most probable duplicate
+            if self.is_duplicate(processed, fingerprint, shape):
+                return processed.frame
+        return None
+
+    def is_duplicate(self, processed: ProcessedFrame, fingerprint: numpy.ndarray, shape: tuple[int, ...]) -> bool:  # type: ignore[type-arg]
+        return processed.shape == shape and numpy.abs(processed.fingerprint - fingerprint).max() <= self.threshold
+
+    def remember(self, fingerprint: numpy.ndarray, shape: tuple[int, ...], frame: Frame) -> None:  # type: ignore[type-arg]
+        frame = frame.copy()  # the returned result can be changed by its user
+        frame.setflags(write=False)
+        with self._lock:
+            self._recent.append(ProcessedFrame(fingerprint, shape, frame))
+
+    def count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def process(self, numbered_frame: NumberedFrame, process: Callable[[NumberedFrame], NumberedFrame]) -> NumberedFrame:
+        """
+        Returns the reused result for a duplicate frame, or processes the frame
+        """
+        fingerprint = self.fingerprint(numbered_frame.frame)
+        shape = numbered_frame.frame.shape
+        processed_frame = self.find(fingerprint, shape)
+        self.count(processed_frame is not None)
+        if processed_frame is not None:
+            return NumberedFrame(numbered_frame.index, processed_frame.copy(), numbered_frame.name)
+        numbered_frame = process(numbered_frame)
+        self.remember(fingerprint, shape, numbered_frame.frame)
+        return numbered_frame
+
+    def process_batch(self, numbered_frames: List[NumberedFrame], process_batch: Callable[[List[NumberedFrame]], List[NumberedFrame]]) -> List[NumberedFrame]:
+        """
+        Reuses results for duplicate frames of the batch (including duplicates inside the batch), and processes
+        other frames in one batch
+        """
+        results: List[NumberedFrame] = list(numbered_frames)
+        unique: List[ProcessedFrame] = []  # frames to process (with their input frames)
+        unique_positions: List[int] = []
+        duplicates: Dict[int, int] = {}  # positions of duplicates inside the batch -> the unique frame number
+        for position, numbered_frame in enumerate(numbered_frames):
+            fingerprint = self.fingerprint(numbered_frame.frame)
+            processed_frame = self.find(fingerprint, numbered_frame.frame.shape)
+            if processed_frame is not None:
+                results[position] = NumberedFrame(numbered_frame.index, processed_frame.copy(), numbered_frame.name)
+            else:
+                duplicate = next((number for number, frame in enumerate(unique) if self.is_duplicate(frame, fingerprint, numbered_frame.frame.shape)), None)
+                if duplicate is None:
+                    unique.append(ProcessedFrame(fingerprint, numbered_frame.frame.shape, numbered_frame.frame))
+                    unique_positions.append(position)
+                else:
+                    duplicates[position] = duplicate
+            self.count(processed_frame is not None or position in duplicates)
+        if unique:
+            for number, processed in enumerate(process_batch([numbered_frames[position] for position in unique_positions])):
+                results[unique_positions[number]] = processed
+                unique[number].frame = processed.frame
+                self.remember(unique[number].fingerprint, unique[number].shape, processed.frame)
+        for position, number in duplicates.items():
+            results[position] = NumberedFrame(numbered_frames[position].index, unique[number].frame.copy(), numbered_frames[position].name)
+        return results
+
+    def clear(self) -> None:
+        """
+        Forgets recent results (e.g. when processing parameters are changed)
+        """
+        with self._lock:
+            self._recent.clear()
+
+    @property
+    def statistics(self) -> Dict[str, str]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {'duplicates': f'{self._hits}/{total} ({self._hits / total if total else 0:.0%})'}
@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Any, Dict
+
+from sinner.typing import UTF8
+from sinner.utilities import is_file, get_file_fingerprint
+
+
+class FrameIndex:
+    """
+    The index of the video target frames: presentation timestamps of every frame and positions of keyframes.
+    It is built with a single ffprobe packets pass (without decoding) and stored in a file, so it can be reused
+    """
+    _target_path: str
+    _index_path: str
+
+    pts: List[float]  # frames presentation timestamps (in seconds), in the presentation order
+    keyframes: List[int]  # indexes of keyframes in the presentation order
+    start_time: float  # the target stream start time, ffmpeg counts seek positions from it
+
+    def __init__(self, target_path: str, index_path: str):
+        self._target_path = target_path
+        self._index_path = index_path
+        self.pts = []
+        self.keyframes = []
+        self.start_time = 0
+        if not self.load():
+            self.build()
+            self.save()
+
+    @property
+    def fingerprint(self) -> Dict[str, Any]:
+        """
+        Target file properties, used to detect that the stored index is outdated
+        """
+        return get_file_fingerprint(self._target_path)
+
+    def load(self) -> bool:
+        if not is_file(self._index_path):
+            return False
+        try:
+            with open(self._index_path, encoding=UTF8) as index_file:
+                index = json.load(index_file)
+            if index['fingerprint'] != self.fingerprint:
+                return False
+            self.pts = index['pts']
+            self.keyframes = index['keyframes']
+            self.start_time = index['start_time']
+            return True
+        except Exception:
+            return False
+
+    def save(self) -> None:
+        if not self.pts:
+            return
+        Path(os.path.dirname(self._index_path)).mkdir(parents=True, exist_ok=True)
+        with open(self._index_path, 'w', encoding=UTF8) as index_file:
+            json.dump({'fingerprint': self.fingerprint, 'start_time': self.start_time, 'pts': self.pts, 'keyframes': self.keyframes}, index_file)
+
+    def build(self) -> None:
+        command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=start_time:packet=pts_time,flags', '-of', 'json', self._target_path]
+        probe = json.loads(subprocess.check_output(command, stderr=subprocess.DEVNULL).decode(UTF8))
+        streams = probe.get('streams', [])
+        if streams and 'start_time' in streams[0]:
+            self.start_time = float(streams[0]['start_time'])
+        packets = [(float(packet['pts_time']), 'K' in packet.get('flags', '')) for packet in probe.get('packets', []) if 'pts_time' in packet]
+        packets.sort()  # packets are stored in the decoding order, frames are presented in the timestamps order
+        self.pts = [pts for pts, _ in packets]
+        self.keyframes = [frame_index for frame_index, (_, is_keyframe) in enumerate(packets) if is_keyframe]
+
+    def __len__(self) -> int:
+        return len(self.pts)
+
+    def keyframe(self, frame_index: int) -> int:
+        """
+        Returns the index of the nearest keyframe before (or at) the frame
+        """
+        position = bisect_right(self.keyframes, frame_index)
+        return self.keyframes[position - 1] if position > 0 else 0
+
+    def seek_time(self, frame_index: int) -> float:
+        """
+        Returns the seek position (relative to the stream start), which makes decoding start at the nearest preceding
+        keyframe. It points between the keyframe and the next frame, so timestamps rounding can't move it to another GOP
+        """
+        keyframe = self.keyframe(frame_index)
+        if keyframe + 1 < len(self.pts):
+            return max((self.pts[keyframe] + self.pts[keyframe + 1]) / 2 - self.start_time, 0)
+        return max(self.pts[keyframe] - self.start_time, 0)
+
+    def select_time(self, frame_index: int) -> float:
+        """
+        Returns the timestamp threshold, that separates the frame from the previous one
+        """
+        if frame_index == 0:
+            return self.pts[0] - 1
+        return (self.pts[frame_index - 1] + self.pts[frame_index]) / 2
@@ -0,0 +1,140 @@
+import os
+import threading
+from pathlib import Path
+from typing import List, Iterator
+
+import numpy
+from numpy import uint8
+
+from sinner.models.NumberedFrame import NumberedFrame
+from sinner.typing import Frame
+from sinner.utilities import is_file
+
+
+class FrameStore:
+    """
+    Temporary frames storage in a single preallocated memory-mapped file of fixed-shape frames, with a bitmap of
+    written frames. It avoids creating a file per frame, and frames are read as views of the mapped file.
+    The store is created with the first written frame, as it defines the frames shape, so targets with frames
+    of different shapes use the per-file FALLBACK_FORMAT instead
+    """
+    FORMAT: str = 'mmap'  # the temporary frames format name
+    FALLBACK_FORMAT: str = 'npy'  # the raw per-file format for targets, which frames can't be stored together
+    FRAMES_FILE: str = 'frames.npy'
+    BITMAP_FILE: str = 'frames.bitmap'
+
+    _path: str
+    _frames_count: int | None
+    _frames: numpy.memmap | None = None  # type: ignore[type-arg]
+    _bitmap: numpy.memmap | None = None  # type: ignore[type-arg]
+    _lock: threading.Lock
+
+    def __init__(self, path: str, frames_count: int | None = None):
+        """
+        :param path: the store directory
+        :param frames_count: the frames count to create the store. If None, the store can be opened only for reading
+        """
+        self._path = path
+        self._frames_count = frames_count
+        self._lock = threading.Lock()
+        self.open()
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return is_file(os.path.join(path, FrameStore.FRAMES_FILE)) and is_file(os.path.join(path, FrameStore.BITMAP_FILE))
+
+    @property
+    def frames_path(self) -> str:
+        return os.path.join(self._path, self.FRAMES_FILE)
+
+    @property
+    def bitmap_path(self) -> str:
+        return os.path.join(self._path, self.BITMAP_FILE)
+
+    def open(self) -> bool:
+        """
+        Maps the existing store files, if they are suitable for the configured frames count
+        """
+        if self._frames is not None:
+            return True
+        if not self.exists(self._path):
+            return False
+        frames = numpy.load(self.frames_path, mmap_mode='r+')
+        if self._frames_count is not None and frames.shape[0] != self._frames_count:  # the store is made for another target, it will be recreated
+            return False
+        self._frames_count = frames.shape[0]
+        self._bitmap = numpy.memmap(self.bitmap_path, dtype=uint8, mode='r+')
+        self._frames = frames
+        return True
+
+    def create(self, shape: tuple[int, ...]) -> None:
+        if self._frames_count is None:
+            raise Exception("The frames count is required to create a frame store")
+        Path(self._path).mkdir(parents=True, exist_ok=True)
+        self._bitmap = numpy.memmap(self.bitmap_path, dtype=uint8, mode='w+', shape=((self._frames_count + 7) // 8,))
+        self._frames = numpy.lib.format.open_memmap(self.frames_path, mode='w+', dtype=uint8, shape=(self._frames_count, *shape))
+
+    def __len__(self) -> int:
+        return self._frames_count or 0
+
+    @property
+    def shape(self) -> tuple[int, ...] | None:
+        return self._frames.shape[1:] if self.open() else None  # type: ignore[union-attr]
+
+    def _bits(self) -> numpy.ndarray:  # type: ignore[type-arg]
+        """
+        Returns the bitmap as an array of written flags, one per frame
+        """
+        return numpy.unpackbits(self._bitmap, bitorder='little')[:len(self)]  # type: ignore[call-overload]
+
+    @property
+    def count(self) -> int:
+        """
+        Returns the count of written frames (the population count of the bitmap)
+        """
+        if not self.open():
+            return 0
+        return int(self._bits().sum())
+
+    def is_written(self, index: int) -> bool:
+        if not self.open():
+            return False
+        return bool(self._bitmap[index // 8] & (1 << (index % 8)))  # type: ignore[index]
+
+    def written(self) -> List[int]:
+        if not self.open():
+            return []
+        return numpy.flatnonzero(self._bits()).tolist()
+
+    def missing(self) -> List[int]:
+        if not self.open():
+            return list(range(len(self)))
+        return numpy.flatnonzero(self._bits() == 0).tolist()
+
+    def write(self, index: int, frame: Frame) -> None:
+        with self._lock:
+            if not self.open():
+                self.create(frame.shape)
+        if frame.shape != self._frames.shape[1:]:  # type: ignore[union-attr]
+            raise Exception(f"The frame {index} shape {frame.shape} doesn't match the frame store shape {self._frames.shape[1:]}")  # type: ignore[union-attr]
+        self._frames[index] = frame  # type: ignore[index]
+        with self._lock:  # frames are written from many threads, but a bitmap byte is shared between eight frames
+            self._bitmap[index // 8] |= 1 << (index % 8)  # type: ignore[index]
+
+    def read(self, index: int) -> Frame:
+        """
+        Returns the frame as a view of the mapped file, without copying
+        """
+        if not self.is_written(index):
+            raise Exception(f"The frame {index} isn't written to the frame store")
+        return self._frames[index]  # type: ignore[index]
+
+    def stream(self) -> Iterator[NumberedFrame]:
+        for index in self.written():
+            yield NumberedFrame(index, self.read(index))
+
+    def flush(self) -> None:
+        if self._frames is not None:
+            self._frames.flush()
+        if self._bitmap is not None:
+            self._bitmap.flush()
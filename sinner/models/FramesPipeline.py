@@ -0,0 +1,245 @@
+import threading
+import time
+from queue import Queue, Empty, Full
+from typing import Callable, Iterable, Iterator, Dict, List, Any
+
+from sinner.models.MemoryGovernor import MemoryGovernor
+from sinner.models.NumberedFrame import NumberedFrame
+
+END: object = object()  # the marker of the end of frames in a stage input
+
+
+class FramesPipeline:
+    """
+    Processes frames in three stages: decode, process and save. Each stage has its own worker threads, and stages
+    are connected by bounded queues, so a faster stage waits for a slower one instead of accumulating frames in memory.
+    The time, that workers of each stage spend waiting for input frames or for the space in the next stage queue,
+    shows the pipeline bottleneck. If the memory governor is set, decoded frames wait for its budget before entering
+    the pipeline, and release it when saved
+    """
+    STAGES: List[str] = ['decode', 'process', 'save']
+
+    _extract: Callable[[int], NumberedFrame]
+    _process: Callable[[NumberedFrame], NumberedFrame]
+    _process_batch: Callable[[List[NumberedFrame]], List[NumberedFrame]] | None
+    _save: Callable[[NumberedFrame], None]
+    _batch_size: int
+    _batch_latency: float  # seconds
+    _batches: List[int]  # count of processed batches and frames in them
+    _workers: Dict[str, int]  # worker threads count of each stage
+    _queues: Dict[str, Queue]  # type: ignore[type-arg]  # input queues of the process and the save stages
+    _waits: Dict[str, List[float]]  # seconds, that stage workers waited for input and for output
+    _running: Dict[str, int]  # count of still running workers of each stage
+    _source: Iterator[int | NumberedFrame] | None = None
+    _source_lock: threading.Lock
+    _lock: threading.Lock
+    _stopped: threading.Event
+    _on_stop: Callable[[], None] | None = None
+    _error: BaseException | None = None
+    _governor: MemoryGovernor | None
+    _held: int  # bytes of in-flight frames, acquired from the governor by this pipeline
+
+    def __init__(self, extract: Callable[[int], NumberedFrame], process: Callable[[NumberedFrame], NumberedFrame], save: Callable[[NumberedFrame], None], decode_workers: int = 1, process_workers: int = 1, save_workers: int = 1, queue_size: int = 2, governor: MemoryGovernor | None = None, process_batch: Callable[[List[NumberedFrame]], List[NumberedFrame]] | None = None, batch_size: int = 1, batch_latency: float = 0.05):
+        """
+        :param extract: extracts a frame by its index (frames, that are already decoded, are passed as is)
+        :param process: processes a frame (data, attached to the frame, like detected faces, is kept between processors)
+        :param save: saves a processed frame
+        :param queue_size: the capacity (in frames) of each queue between stages
+        :param governor: the memory governor to account in-flight frames
+        :param process_batch: processes several frames at once
+        :param batch_size: the maximal count of frames, passed to process_batch
+        :param batch_latency: the maximal time (in seconds) to wait for next frames of a batch
+        """
+        self._extract = extract
+        self._process = process
+        self._process_batch = process_batch
+        self._save = save
+        self._batch_size = max(batch_size, 1) if process_batch is not None else 1
+        self._batch_latency = batch_latency
+        self._batches = [0, 0]
+        self._workers = {'decode': max(decode_workers, 1), 'process': max(process_workers, 1), 'save': max(save_workers, 1)}
+        self._queues = {'process': Queue(maxsize=max(queue_size, 1)), 'save': Queue(maxsize=max(queue_size, 1))}
+        self._waits = {stage: [0.0, 0.0] for stage in self.STAGES}
+        self._running = {}
+        self._source_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._governor = governor
+        self._held = 0
+
+    def run(self, frames: Iterable[int] | Iterable[NumberedFrame], on_done: Callable[[NumberedFrame], None] | None = None, on_stop: Callable[[], None] | None = None) -> None:
+        """
+        Passes all frames through the pipeline and returns when the last frame is saved.
+        An exception in any stage stops the pipeline, and it is raised here
+        :param frames: frames indexes or already decoded frames (e.g. from a handler stream)
+        :param on_done: called (from a single thread at a time) after each frame is saved
+        :param on_stop: called once, if the pipeline is stopped before frames are over (e.g. by an error). It should
+        release the frames source, if the source can wait for something, that the pipeline will never do
+        """
+        self._source = iter(frames)  # type: ignore[assignment]
+        self._on_stop = on_stop
+        self._running = dict(self._workers)
+        threads: List[threading.Thread] = []
+        for stage in self.STAGES:
+            for number in range(self._workers[stage]):
+                thread = threading.Thread(target=self._work, args=(stage, on_done), name=f'{self.__class__.__name__}-{stage}-{number}', daemon=True)
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+        if self._governor is not None and self._held > 0:  # frames, left in queues of the stopped pipeline
+            self._governor.release(self._held)
+            self._held = 0
+        if self._error is not None:
+            raise self._error
+
+    def stop(self) -> None:
+        with self._lock:
+            is_stopped = self._stopped.is_set()
+            self._stopped.set()
+        if not is_stopped and self._on_stop is not None:
+            self._on_stop()
+
+    @property
+    def depths(self) -> Dict[str, int]:
+        """
+        Returns the count of frames, waiting in the input queue of each stage
+        """
+        return {stage: stage_queue.qsize() for stage, stage_queue in self._queues.items()}
+
+    @property
+    def statistics(self) -> Dict[str, Any]:
+        """
+        Returns queues depths and stages stall times (waiting for input/waiting for output), suitable for the tqdm postfix
+        """
+        statistics: Dict[str, Any] = {
+            'queues': ', '.join([f'{stage} {depth}/{self._queues[stage].maxsize}' for stage, depth in self.depths.items()]),
+            'stalls': ', '.join([f'{stage} {waits[0]:.1f}/{waits[1]:.1f}s' for stage, waits in self._waits.items()]),
+        }
+        if self._batch_size > 1 and self._batches[0] > 0:
+            statistics['batch'] = f'{self._batches[1] / self._batches[0]:.1f}/{self._batch_size}'
+        return statistics
+
+    def _work(self, stage: str, on_done: Callable[[NumberedFrame], None] | None) -> None:
+        try:
+            while not self._stopped.is_set():
+                item = self._get(stage)
+                if item is END:
+                    break
+                if stage == 'decode':
+                    numbered_frame = item if isinstance(item, NumberedFrame) else self._extract(item)
+                    if self._acquire(numbered_frame.frame.nbytes):
+                        self._put(stage, numbered_frame)
+                elif stage == 'process':
+                    batch, is_end = self._batch(item)
+                    sizes = [numbered_frame.frame.nbytes for numbered_frame in batch]
+                    processed = self._process_batch(batch) if self._process_batch is not None and len(batch) > 1 else [self._process(batch[0])]
+                    with self._lock:
+                        self._batches[0] += 1
+                        self._batches[1] += len(batch)
+                    for size, numbered_frame in zip(sizes, processed):
+                        self._account(size, numbered_frame.frame.nbytes)
+                        self._put(stage, numbered_frame)
+                    if is_end:
+                        break
+                else:
+                    self._save(item)
+                    self._account(item.frame.nbytes, 0)
+                    if on_done is not None:
+                        with self._lock:
+                            on_done(item)
+        except BaseException as exception:
+            with self._lock:
+                if self._error is None:
+                    self._error = exception
+            self.stop()
+        finally:
+            self._finish(stage)
+
+    def _get(self, stage: str) -> Any:
+        if stage == 'decode':  # the source is read by decode workers one at a time, its reading time is the decoding itself
+            with self._source_lock:
+                return next(self._source, END)  # type: ignore[arg-type]
+        started = time.perf_counter()
+        try:
+            while True:
+                try:
+                    return self._queues[stage].get(timeout=0.1)
+                except Empty:
+                    if self._stopped.is_set():
+                        return END
+        finally:
+            self._waits[stage][0] += time.perf_counter() - started
+
+    def _batch(self, first: NumberedFrame) -> tuple[List[NumberedFrame], bool]:
+        """
+        Collects the batch of frames, that are available in the batch latency
+        :return: the batch and True, if frames are over
+        """
+        batch = [first]
+        started = time.perf_counter()
+        try:
+            while len(batch) < self._batch_size:
+                remaining = started + self._batch_latency - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queues['process'].get(timeout=remaining)
+                except Empty:
+                    break
+                if item is END:
+                    return batch, True
+                batch.append(item)
+        finally:
+            self._waits['process'][0] += time.perf_counter() - started
+        return batch, False
+
+    def _put(self, stage: str, item: Any) -> None:
+        next_queue = self._queues[self.STAGES[self.STAGES.index(stage) + 1]]
+        started = time.perf_counter()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    next_queue.put(item, timeout=0.1)
+                    return
+                except Full:
+                    pass
+        finally:
+            self._waits[stage][1] += time.perf_counter() - started
+
+    def _acquire(self, size: int) -> bool:
+        """
+        Waits for the governor budget (the time is counted as the decode stage output stall)
+        :return: False, if the pipeline was stopped while waiting
+        """
+        if self._governor is None:
+            return True
+        started = time.perf_counter()
+        try:
+            while not self._governor.acquire(size, timeout=0.1):
+                if self._stopped.is_set():
+                    return False
+        finally:
+            self._waits['decode'][1] += time.perf_counter() - started
+        self._account(0, size, False)
+        return True
+
+    def _account(self, size: int, new_size: int, update_governor: bool = True) -> None:
+        if self._governor is None:
+            return
+        with self._lock:
+            self._held += new_size - size
+        if update_governor:
+            self._governor.resize(size, new_size)
+
+    def _finish(self, stage: str) -> None:
+        """
+        When the last worker of the stage finishes, it tells every worker of the next stage that frames are over
+        """
+        with self._lock:
+            self._running[stage] -= 1
+            is_last = self._running[stage] == 0
+        if is_last and stage != self.STAGES[-1]:
+            next_stage = self.STAGES[self.STAGES.index(stage) + 1]
+            for _ in range(self._workers[next_stage]):
+                self._put(stage, END)
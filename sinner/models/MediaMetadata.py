@@ -0,0 +1,66 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from sinner.typing import UTF8
+from sinner.utilities import is_file, get_file_fingerprint
+
+
+class MediaMetadata:
+    """
+    The target media properties (fps, frames count, resolution and duration), stored in a file, so probing the target
+    is needed only once. The stored metadata is invalidated, when the target path, size or modification time changes
+    """
+    _target_path: str
+    _cache_path: str
+
+    fps: float | None
+    fc: int | None
+    resolution: tuple[int, int] | None
+    duration: float | None  # in seconds
+
+    loaded: bool  # True, if the metadata was loaded from the stored file
+
+    def __init__(self, target_path: str, cache_path: str):
+        self._target_path = target_path
+        self._cache_path = cache_path
+        self.fps = None
+        self.fc = None
+        self.resolution = None
+        self.duration = None
+        self.loaded = self.load()
+
+    @property
+    def fingerprint(self) -> Dict[str, Any]:
+        """
+        Target file properties, used to detect that the stored metadata is outdated
+        """
+        return get_file_fingerprint(self._target_path)
+
+    @property
+    def complete(self) -> bool:
+        return self.fps is not None and self.fc is not None and self.resolution is not None
+
+    def load(self) -> bool:
+        if not is_file(self._cache_path):
+            return False
+        try:
+            with open(self._cache_path, encoding=UTF8) as cache_file:
+                metadata = json.load(cache_file)
+            if metadata['fingerprint'] != self.fingerprint:
+                return False
+            self.fps = float(metadata['fps'])
+            self.fc = int(metadata['fc'])
+            self.resolution = (int(metadata['resolution'][0]), int(metadata['resolution'][1]))
+            self.duration = None if metadata['duration'] is None else float(metadata['duration'])
+            return True
+        except Exception:
+            return False
+
+    def save(self) -> None:
+        if not self.complete:  # do not store partially probed metadata
+            return
+        Path(os.path.dirname(self._cache_path)).mkdir(parents=True, exist_ok=True)
+        with open(self._cache_path, 'w', encoding=UTF8) as cache_file:
+            json.dump({'fingerprint': self.fingerprint, 'fps': self.fps, 'fc': self.fc, 'resolution': self.resolution, 'duration': self.duration}, cache_file)
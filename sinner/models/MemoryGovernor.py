@@ -0,0 +1,94 @@
+import threading
+import time
+from typing import Dict, Any
+
+
+class MemoryGovernor:
+    """
+    Accounts the memory, held by in-flight frames (the sizes of their arrays), and makes frames producers wait while
+    the budget is exhausted. Unlike the process memory statistics, it doesn't count arenas, mapped by inference
+    libraries. The governor is process-wide, so all frames producers share the same budget
+    """
+    _shared: 'MemoryGovernor | None' = None
+
+    budget: int  # bytes, 0 means no limit
+    _used: int
+    _peak: int
+    _waits: int  # count of producers waits for the budget
+    _wait_time: float
+    _condition: threading.Condition
+
+    def __init__(self, budget: int = 0):
+        self.budget = budget
+        self._used = 0
+        self._peak = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def shared(budget: int | None = None) -> 'MemoryGovernor':
+        """
+        Returns the process-wide governor
+        :param budget: if set, changes the governor budget (in bytes)
+        """
+        if MemoryGovernor._shared is None:
+            MemoryGovernor._shared = MemoryGovernor()
+        if budget is not None:
+            MemoryGovernor._shared.budget = budget
+        return MemoryGovernor._shared
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+    @property
+    def peak(self) -> int:
+        return self._peak
+
+    def _fits(self, size: int) -> bool:
+        # a frame, that is larger than the whole budget, still can be processed alone
+        return self.budget <= 0 or self._used == 0 or self._used + size <= self.budget
+
+    def acquire(self, size: int, timeout: float | None = None) -> bool:
+        """
+        Accounts the frame memory, waiting until it fits the budget
+        :return: False, if the memory wasn't acquired in the timeout
+        """
+        with self._condition:
+            if not self._fits(size):
+                self._waits += 1
+                started = time.perf_counter()
+                fits = self._condition.wait_for(lambda: self._fits(size), timeout)
+                self._wait_time += time.perf_counter() - started
+                if not fits:
+                    return False
+            self._used += size
+            self._peak = max(self._peak, self._used)
+            return True
+
+    def resize(self, size: int, new_size: int) -> None:
+        """
+        Accounts the size change of an already acquired frame (e.g. after upscaling) without waiting
+        """
+        with self._condition:
+            self._used += new_size - size
+            self._peak = max(self._peak, self._used)
+            self._condition.notify_all()
+
+    def release(self, size: int) -> None:
+        with self._condition:
+            self._used = max(self._used - size, 0)
+            self._condition.notify_all()
+
+    @property
+    def statistics(self) -> Dict[str, Any]:
+        """
+        Returns the accounting, suitable for the tqdm postfix
+        """
+        megabyte = 1024 ** 2
+        budget = f'{self.budget / megabyte:.0f}MB' if self.budget > 0 else 'unlimited'
+        statistics: Dict[str, Any] = {'frames_memory': f'{self._used / megabyte:.2f}MB [MAX:{self._peak / megabyte:.2f}MB]/{budget}'}
+        if self._waits > 0:
+            statistics['memory_waits'] = f'{self._waits} ({self._wait_time:.1f}s)'
+        return statistics
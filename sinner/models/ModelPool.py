@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+from queue import LifoQueue
+from typing import Any, Callable, Iterator
+
+
+class ModelPool:
+    """
+    A bounded pool of instances of a model, that can't run from many threads at once. Each user takes a free instance,
+    waiting, while all instances are busy. Instances are loaded on demand, and the most recently used instance
+    is taken first, so with a few busy threads only a few instances are loaded
+    """
+    size: int
+
+    _load: Callable[[int], Any]
+    _free: LifoQueue[int]  # free instances slots
+
+    def __init__(self, size: int, load: Callable[[int], Any]):
+        """
+        :param size: the maximal count of instances
+        :param load: returns the instance for the slot (loading it, if needed)
+        """
+        self.size = max(size, 1)
+        self._load = load
+        self._free = LifoQueue()
+        for slot in reversed(range(self.size)):
+            self._free.put(slot)
+
+    @contextmanager
+    def instance(self) -> Iterator[Any]:
+        slot = self._free.get()
+        try:
+            yield self._load(slot)
+        finally:
+            self._free.put(slot)
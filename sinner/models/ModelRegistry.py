@@ -0,0 +1,112 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Hashable
+
+from sinner.utilities import get_mem_usage
+
+
+@dataclass
+class ModelRecord:
+    name: str
+    providers: List[str]
+    options: Dict[str, Any]
+    thread: str | None  # the thread name for per-thread instances
+    generation: int = 0  # the registry generation, the model was requested last time in
+    load_time: float = 0.0  # seconds
+    memory: int = 0  # the process resident memory growth while loading, in bytes (approximate, if models are loaded simultaneously)
+    instance: Any = field(default=None, repr=False)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class ModelRegistry:
+    """
+    The process-wide registry of loaded models. Each model is loaded once per (model, providers, options) key, and
+    shared between all users, or loaded once per thread, depending on the policy. Different models can be loaded
+    simultaneously, but the same model is loaded only by one thread, others wait for it.
+    Per-thread instances are keyed by the thread identifier, as many threads can have the same name
+    """
+    SHARED: str = 'shared'  # one instance for all threads (ONNX Runtime sessions can run from many threads)
+    PER_THREAD: str = 'thread'  # an instance for each thread, for models, that aren't thread-safe or to avoid contention
+    POLICIES: List[str] = [SHARED, PER_THREAD]
+
+    _shared: 'ModelRegistry | None' = None
+    _shared_lock: threading.Lock = threading.Lock()
+
+    _records: Dict[Hashable, ModelRecord]
+    _lock: threading.Lock
+    _generation: int
+
+    def __init__(self) -> None:
+        self._records = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @staticmethod
+    def shared() -> 'ModelRegistry':
+        with ModelRegistry._shared_lock:
+            if ModelRegistry._shared is None:
+                ModelRegistry._shared = ModelRegistry()
+        return ModelRegistry._shared
+
+    @staticmethod
+    def make_key(name: str, providers: List[str], options: Dict[str, Any], thread: int | None) -> Hashable:
+        return name, tuple(providers), tuple(sorted((key, repr(value)) for key, value in options.items())), thread
+
+    def get(self, name: str, loader: Callable[[], Any], providers: List[str], options: Dict[str, Any] | None = None, policy: str = SHARED) -> Any:
+        """
+        Returns the loaded model, loading it on the first request
+        :param name: the model name
+        :param loader: loads the model instance
+        :param providers: execution providers, the model is loaded with
+        :param options: other options, that make the model instance different
+        :param policy: shares the model between threads, or loads an instance for each thread
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown models policy: {policy}")
+        options = options or {}
+        thread = threading.get_ident() if policy == self.PER_THREAD else None
+        key = self.make_key(name, providers, options, thread)
+        with self._lock:
+            if key not in self._records:
+                # instances of this model, that weren't requested since renew(), were loaded with previous parameters
+                self._records = {record_key: record for record_key, record in self._records.items() if record.name != name or record.generation == self._generation}
+                self._records[key] = ModelRecord(name=name, providers=list(providers), options=options, thread=threading.current_thread().name if thread is not None else None, generation=self._generation)
+            record = self._records[key]
+            record.generation = self._generation
+        if record.instance is None:
+            with record.lock:  # only this model loading is locked
+                if record.instance is None:
+                    memory = get_mem_usage('rss', 'b')
+                    started = time.perf_counter()
+                    record.instance = loader()
+                    record.load_time = time.perf_counter() - started
+                    record.memory = max(get_mem_usage('rss', 'b') - memory, 0)
+        return record.instance
+
+    @property
+    def records(self) -> List[ModelRecord]:
+        with self._lock:
+            return [record for record in self._records.values() if record.instance is not None]
+
+    def release(self) -> None:
+        """
+        Forgets all loaded models, so they can be collected
+        """
+        with self._lock:
+            self._records = {}
+
+    def renew(self) -> None:
+        """
+        Starts a new generation of requests (e.g. when processing parameters are changed). When a model is loaded
+        with a new key, instances of this model, that weren't requested in the new generation, are forgotten
+        """
+        with self._lock:
+            self._generation += 1
+
+    @property
+    def statistics(self) -> str:
+        """
+        Returns the load time and memory of each loaded model
+        """
+        return ', '.join([f'{record.name}{"@" + record.thread if record.thread else ""} ({record.load_time:.2f}s, {record.memory / 1024 ** 2:.0f}MB)' for record in self.records])
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 
+from sinner.models.FacesDetection import FacesDetection
 from sinner.typing import Frame
 
 
@@ -8,6 +9,7 @@ class NumberedFrame:
     index: int
     frame: Frame = field(compare=False)
     name: str | None = field(compare=False, default=None)
+    detection: FacesDetection | None = field(compare=False, default=None)  # faces, detected on the frame by a previous processor
 
     def __eq__(self, o: object) -> bool:
         if not isinstance(o, NumberedFrame):
@@ -0,0 +1,97 @@
+import inspect
+import os
+from pathlib import Path
+from typing import List, Any
+
+import numpy
+import onnxruntime
+from insightface.app.common import Face
+
+from sinner.models.FaceAlignment import FaceAlignment
+from sinner.typing import Frame
+
+
+class OnnxFaceEnhancer:
+    """
+    The GFPGAN face enhancer, that runs the exported GFPGAN network with ONNX Runtime. Faces are aligned by keypoints,
+    found by the faces analyser, so neither torch, nor facexlib are needed to enhance. The network is exported from
+    the torch model once, see export()
+    """
+    OPSET: int = 17
+
+    upscale: float
+
+    _session: onnxruntime.InferenceSession
+    _input_name: str
+    _batchable: bool  # the network accepts faces batches
+
+    def __init__(self, model_path: str, providers: List[str], upscale: float = 1):
+        """
+        :param model_path: the exported network path
+        :param providers: ONNX Runtime execution providers
+        :param upscale: the frame upscale factor
+        """
+        self._session = onnxruntime.InferenceSession(model_path, providers=providers)
+        session_input = self._session.get_inputs()[0]
+        self._input_name = session_input.name
+        self._batchable = not isinstance(session_input.shape[0], int)
+        self.upscale = upscale
+
+    def enhance(self, frame: Frame, faces: List[Face], roi: bool = False) -> Frame:
+        """
+        Returns the frame (upscaled) with enhanced faces
+        :param roi: paste faces inside their regions only, see FacePaste
+        """
+        return FaceAlignment.enhance(frame, faces, self.restore, self.upscale, roi)
+
+    def restore(self, crops: List[Frame]) -> List[Frame]:
+        """
+        Restores aligned faces, all faces of the frame are restored in one session run, when possible
+        """
+        if not crops:
+            return []
+        if self._batchable:
+            outputs = self._session.run(None, {self._input_name: numpy.concatenate([FaceAlignment.to_tensor(crop) for crop in crops])})[0]
+        else:
+            outputs = numpy.concatenate([self._session.run(None, {self._input_name: FaceAlignment.to_tensor(crop)})[0] for crop in crops])
+        return [FaceAlignment.to_image(output) for output in outputs]
+
+    @staticmethod
+    def export(model_path: str, onnx_path: str) -> None:
+        """
+        Exports the GFPGANv1.4 (the "clean" architecture) torch model to the ONNX graph. Torch and gfpgan are needed only here
+        :param model_path: the torch model (.pth) path
+        :param onnx_path: the exported graph path
+        """
+        import torch
+        from gfpgan.archs.gfpganv1_clean_arch import GFPGANv1Clean
+
+        network = GFPGANv1Clean(out_size=512, num_style_feat=512, channel_multiplier=2, decoder_load_path=None, fix_decoder=False, num_mlp=8, input_is_latent=True, different_w=True, narrow=1, sft_half=True)
+        state = torch.load(model_path, map_location='cpu')
+        network.load_state_dict(state['params_ema' if 'params_ema' in state else 'params'], strict=True)
+        OnnxFaceEnhancer.export_network(network, onnx_path)
+
+    @staticmethod
+    def export_network(network: Any, onnx_path: str) -> None:
+        """
+        Exports the GFPGAN network, that takes a batch of aligned faces, and returns only restored faces.
+        The noise is fixed (as the network registered it), so the graph is deterministic
+        """
+        import torch
+
+        class RestoredFaces(torch.nn.Module):
+            def __init__(self, gfpgan: torch.nn.Module):
+                super().__init__()
+                self.gfpgan = gfpgan
+
+            def forward(self, faces: torch.Tensor) -> torch.Tensor:
+                return self.gfpgan(faces, return_rgb=False, randomize_noise=False)[0]  # type: ignore[no-any-return]
+
+        options: dict[str, Any] = {}
+        if 'dynamo' in inspect.signature(torch.onnx.export).parameters:  # newer torch versions use the dynamo exporter by default
+            options['dynamo'] = False
+        Path(os.path.dirname(onnx_path)).mkdir(parents=True, exist_ok=True)
+        temp_path = f'{onnx_path}.tmp'
+        with torch.no_grad():
+            torch.onnx.export(RestoredFaces(network).eval(), (torch.rand(1, 3, FaceAlignment.SIZE, FaceAlignment.SIZE),), temp_path, input_names=['input'], output_names=['output'], dynamic_axes={'input': {0: 'batch'}, 'output': {0: 'batch'}}, opset_version=OnnxFaceEnhancer.OPSET, **options)
+        os.replace(temp_path, onnx_path)
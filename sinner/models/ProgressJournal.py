@@ -0,0 +1,78 @@
+import os
+import threading
+from typing import Dict, List, ItemsView
+
+from sinner.typing import UTF8
+from sinner.utilities import is_file
+
+
+class ProgressJournal:
+    """
+    The append-only journal of processed frames: every saved frame appends a line with its index and file name.
+    The journal is replayed on opening, so progress queries don't need to scan the frames directory
+    """
+    EXTENSION: str = 'journal'
+
+    _path: str
+    _frames: Dict[int, str]  # processed frames indexes and their files names
+    _lock: threading.Lock
+
+    loaded: bool  # True, if the journal was replayed from the existing file
+
+    def __init__(self, path: str):
+        self._path = path
+        self._frames = {}
+        self._lock = threading.Lock()
+        self.loaded = self.load()
+
+    def load(self) -> bool:
+        if not is_file(self._path):
+            return False
+        with open(self._path, encoding=UTF8) as journal_file:
+            lines = journal_file.readlines()
+        for line in lines:
+            if not line.endswith('\n'):  # the last write was interrupted
+                self.save()  # so next lines won't be appended to the broken one
+                break
+            index, _, file_name = line.rstrip('\n').partition('\t')
+            if index.isdigit() and file_name:
+                self._frames[int(index)] = file_name
+        return True
+
+    def save(self) -> None:
+        """
+        Rewrites the journal with the current frames (one line per frame)
+        """
+        temp_path = f'{self._path}.tmp'
+        with open(temp_path, 'w', encoding=UTF8) as journal_file:
+            journal_file.writelines(f'{index}\t{file_name}\n' for index, file_name in sorted(self._frames.items()))
+        os.replace(temp_path, self._path)
+
+    def append(self, index: int, file_name: str) -> None:
+        with self._lock:  # frames are saved from many threads
+            with open(self._path, 'a', encoding=UTF8) as journal_file:
+                journal_file.write(f'{index}\t{file_name}\n')
+            self._frames[index] = file_name
+
+    def replace(self, frames: Dict[int, str]) -> None:
+        with self._lock:
+            self._frames = dict(frames)
+            self.save()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._frames
+
+    def file_name(self, index: int) -> str | None:
+        return self._frames.get(index)
+
+    def items(self) -> ItemsView[int, str]:
+        return self._frames.items()
+
+    def indexes(self) -> List[int]:
+        return sorted(self._frames)
+
+    def missing(self, frames_count: int) -> List[int]:
+        return [index for index in range(frames_count) if index not in self._frames]
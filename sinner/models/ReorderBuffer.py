@@ -0,0 +1,68 @@
+import threading
+from typing import Iterator, Dict
+
+from sinner.models.NumberedFrame import NumberedFrame
+
+
+class ReorderBuffer:
+    """
+    Collects frames, processed out of order (e.g. by a thread pool), and yields them strictly in the frames order.
+    Producers put frames from any thread, a single consumer iterates over the buffer
+    """
+    _frames: Dict[int, NumberedFrame]
+    _next_index: int  # the index of the frame, which the consumer waits for
+    _capacity: int  # the count of buffered frames, after which producers should wait
+    _closed: bool
+    _condition: threading.Condition
+
+    def __init__(self, capacity: int, start_index: int = 0):
+        self._frames = {}
+        self._next_index = start_index
+        self._capacity = max(capacity, 1)
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def next_index(self) -> int:
+        return self._next_index
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def put(self, numbered_frame: NumberedFrame) -> None:
+        with self._condition:
+            if numbered_frame.index >= self._next_index:  # frames, that already consumed, are ignored
+                self._frames[numbered_frame.index] = numbered_frame
+                self._condition.notify_all()
+
+    def wait_for_space(self) -> None:
+        """
+        Blocks the producer while the buffer is full. Should be called before submitting the next frame, not from the
+        processing threads: the frame, awaited by the consumer, must have a chance to be processed. If that frame
+        can't be processed (e.g. the processing has failed), the buffer should be closed to release the producer
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._frames) < self._capacity or self._closed)
+
+    def close(self) -> None:
+        """
+        Tells the consumer that no more frames will be put (or tells producers that no more frames will be consumed)
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __iter__(self) -> Iterator[NumberedFrame]:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._next_index in self._frames or self._closed)
+                if self._next_index not in self._frames:  # closed, and the next frame will never come
+                    return
+                numbered_frame = self._frames.pop(self._next_index)
+                self._next_index += 1
+                self._condition.notify_all()
+            yield numbered_frame
@@ -0,0 +1,125 @@
+import copy
+from typing import Any, Callable, Dict, List, TypeVar
+
+import insightface
+import numpy
+
+T = TypeVar('T')
+
+
+class Recorded(Exception):
+    """
+    Stops a model call at its session run, carrying the session inputs and requested outputs
+    """
+    output_names: List[str]
+    feeds: Dict[str, numpy.ndarray]  # type: ignore[type-arg]
+
+    def __init__(self, output_names: List[str], feeds: Dict[str, numpy.ndarray]):  # type: ignore[type-arg]
+        super().__init__()
+        self.output_names = output_names
+        self.feeds = feeds
+
+
+class RecordingSession:
+    def run(self, output_names: List[str], feeds: Dict[str, numpy.ndarray], *args: Any, **kwargs: Any) -> Any:  # type: ignore[type-arg]
+        raise Recorded(list(output_names), feeds)
+
+
+class ReplayingSession:
+    """
+    Returns outputs of the recorded call, checking, that the call runs the session once, with the recorded inputs
+    """
+    runs: int
+
+    _recorded: Recorded
+    _outputs: List[numpy.ndarray]  # type: ignore[type-arg]
+
+    def __init__(self, recorded: Recorded, outputs: List[numpy.ndarray]):  # type: ignore[type-arg]
+        self.runs = 0
+        self._recorded = recorded
+        self._outputs = outputs
+
+    def run(self, output_names: List[str], feeds: Dict[str, numpy.ndarray], *args: Any, **kwargs: Any) -> List[numpy.ndarray]:  # type: ignore[type-arg]
+        self.runs += 1
+        if self.runs > 1:
+            raise RuntimeError("The model call runs the session more than once, it can't be batched")
+        if list(output_names) != self._recorded.output_names or feeds.keys() != self._recorded.feeds.keys() or not all(numpy.array_equal(value, self._recorded.feeds[name]) for name, value in feeds.items()):
+            raise RuntimeError("The model call runs the session with other inputs, than recorded, it can't be batched")
+        return self._outputs
+
+
+class SessionBatch:
+    """
+    Runs several calls of an insightface model (a detector, a swapper), as one ONNX Runtime session run. Model wrappers
+    prepare inputs and decode outputs in the same method, that runs the session once per call, so each call is made
+    twice on a shallow copy of the model: first with a session, that only records inputs, then, after the real session
+    runs on the stacked inputs, with a session, that returns outputs of the call. The model itself isn't changed,
+    so it still can be used by other threads.
+    This relies on insightface wrappers internals, so models of insightface are batched only with versions, which
+    wrappers are checked (see tests). A replayed call, that doesn't run the session exactly once with the recorded
+    inputs, raises an error instead of returning wrong results
+    """
+    INSIGHTFACE_VERSIONS: List[str] = ['0.7.3']  # RetinaFace and INSwapper run the session once per call, and don't catch exceptions
+
+    @staticmethod
+    def is_batchable(model: Any) -> bool:
+        """
+        Checks, if the model session accepts a batch of inputs (the batch dimension is dynamic)
+        """
+        if model.__class__.__module__.split('.')[0] == insightface.__name__ and insightface.__version__ not in SessionBatch.INSIGHTFACE_VERSIONS:
+            return False
+        session = getattr(model, 'session', None)
+        return session is not None and all(not isinstance(session_input.shape[0], int) for session_input in session.get_inputs())
+
+    @staticmethod
+    def run(model: Any, calls: List[Callable[[Any], T]]) -> List[T]:
+        """
+        Runs calls, each receives the model to use, and returns results of calls in the same order.
+        Inputs of different shapes (e.g. frames of different sizes) are batched separately
+        """
+        if len(calls) < 2 or not SessionBatch.is_batchable(model):
+            return [call(model) for call in calls]
+        recorder = copy.copy(model)
+        recorder.session = RecordingSession()
+        groups: Dict[tuple[Any, ...], List[int]] = {}  # calls indexes by their inputs shapes
+        records: List[Recorded] = []
+        for index, call in enumerate(calls):
+            try:
+                call(recorder)
+                raise RuntimeError(f"{model.__class__.__name__} call has no session run")
+            except Recorded as recorded:
+                records.append(recorded)
+            record = records[index]
+            groups.setdefault((tuple(record.output_names), *((name, value.shape[1:]) for name, value in sorted(record.feeds.items()))), []).append(index)
+        outputs: Dict[int, List[numpy.ndarray]] = {}  # type: ignore[type-arg]
+        for indexes in groups.values():
+            outputs.update(SessionBatch.run_group(model, [records[index] for index in indexes], indexes))
+        results: List[T] = []
+        for index, call in enumerate(calls):
+            replayer = copy.copy(model)
+            replayer.session = ReplayingSession(records[index], outputs[index])
+            results.append(call(replayer))
+            if replayer.session.runs != 1:
+                raise RuntimeError(f"{model.__class__.__name__} call has no session run")
+        return results
+
+    @staticmethod
+    def run_group(model: Any, records: List[Recorded], indexes: List[int]) -> Dict[int, List[numpy.ndarray]]:  # type: ignore[type-arg]
+        """
+        Runs stacked inputs and splits outputs by calls. An output can have either the batch dimension, or samples rows,
+        concatenated along the first dimension (like detectors, exported without the batch dimension), in both cases
+        each sample has the same count of rows
+        """
+        sizes = [next(iter(record.feeds.values())).shape[0] for record in records]
+        total = sum(sizes)
+        stacked = {name: numpy.concatenate([record.feeds[name] for record in records]) for name in records[0].feeds}
+        batch_outputs = model.session.run(records[0].output_names, stacked)
+        result: Dict[int, List[numpy.ndarray]] = {}  # type: ignore[type-arg]
+        offset = 0
+        for index, size in zip(indexes, sizes):
+            result[index] = []
+            for output in batch_outputs:
+                rows = output.shape[0] // total
+                result[index].append(output[offset * rows:(offset + size) * rows])
+            offset += size
+        return result
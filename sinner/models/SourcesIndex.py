@@ -0,0 +1,72 @@
+import io
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable
+
+from PIL import Image
+
+
+class SourcesIndex:
+    """
+    The index of sources library images thumbnails, stored in a sqlite database, so the library doesn't need to open
+    every image on each start. A thumbnail is rebuilt only when its image modification time or size is changed,
+    or when thumbnails of another size are requested
+    """
+    _connection: sqlite3.Connection
+    _lock: threading.Lock
+    _thumbnail_size: int
+    _make_thumbnail: Callable[[Image.Image, int], Image.Image]
+
+    def __init__(self, index_path: str, thumbnail_size: int, make_thumbnail: Callable[[Image.Image, int], Image.Image]):
+        """
+        :param index_path: the database file path
+        :param thumbnail_size: the thumbnail side
+        :param make_thumbnail: makes a thumbnail of the given size from an image
+        """
+        Path(os.path.dirname(index_path)).mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(index_path, check_same_thread=False)  # the index is used from the indexing thread and the GUI thread
+        self._connection.execute('CREATE TABLE IF NOT EXISTS thumbnails (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, thumbnail_size INTEGER, thumbnail BLOB)')
+        self._connection.commit()
+        self._lock = threading.Lock()
+        self._thumbnail_size = thumbnail_size
+        self._make_thumbnail = make_thumbnail
+
+    def get(self, image_path: str) -> Image.Image | None:
+        """
+        Returns the indexed thumbnail, or None, if the image isn't indexed, or was changed since indexing
+        """
+        stat = os.stat(image_path)
+        with self._lock:
+            row = self._connection.execute('SELECT thumbnail FROM thumbnails WHERE path = ? AND mtime = ? AND size = ? AND thumbnail_size = ?', (image_path, stat.st_mtime, stat.st_size, self._thumbnail_size)).fetchone()
+        return None if row is None else Image.open(io.BytesIO(row[0]))
+
+    def update(self, image_path: str) -> Image.Image:
+        """
+        Makes the image thumbnail and stores it in the index
+        """
+        stat = os.stat(image_path)
+        with Image.open(image_path) as image:
+            thumbnail = self._make_thumbnail(image, self._thumbnail_size)
+        buffer = io.BytesIO()
+        thumbnail.convert('RGB').save(buffer, format='JPEG', quality=90)
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?)', (image_path, stat.st_mtime, stat.st_size, self._thumbnail_size, buffer.getvalue()))
+            self._connection.commit()
+        return thumbnail
+
+    def thumbnail(self, image_path: str) -> Image.Image:
+        """
+        Returns the indexed thumbnail, indexing the image, if needed
+        """
+        thumbnail = self.get(image_path)
+        return self.update(image_path) if thumbnail is None else thumbnail
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._connection.execute('SELECT COUNT(*) FROM thumbnails').fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
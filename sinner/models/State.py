@@ -4,9 +4,12 @@ from pathlib import Path
 from typing import Any, Dict, List
 
 from sinner.Status import Status, Mood
-from sinner.helpers.FrameHelper import write_to_image, EmptyFrame
+from sinner.helpers.FrameHelper import write_to_image, EmptyFrame, read_from_image, temp_frames_rules, list_target_frames, has_same_shapes
+from sinner.models.FrameStore import FrameStore
 from sinner.models.NumberedFrame import NumberedFrame
-from sinner.utilities import is_absolute_path, format_sequences, path_exists, is_file, normalize_path
+from sinner.models.ProgressJournal import ProgressJournal
+from sinner.typing import Frame
+from sinner.utilities import is_absolute_path, format_sequences, path_exists, normalize_path, is_dir, get_file_name
 from sinner.validators.AttributeLoader import Rules
 
 
@@ -21,6 +24,10 @@ class State(Status):
     processor_name: str
     _temp_dir: str
     _zfill_length: int | None
+    _frame_store: FrameStore | None = None
+    _journal: ProgressJournal | None = None
+    temp_format: str
+    png_compression: int | None
 
     final_check_state: bool = True
     final_check_empty: bool = True
@@ -38,6 +45,7 @@ class State(Status):
                 'attribute': 'initial_target_path',  # issue 29: need to know this parameter to avoid names collisions
                 'filter': lambda: normalize_path(self.initial_target_path)
             },
+            *temp_frames_rules(),
             {
                 'module_help': 'The state control module'
             }
@@ -50,6 +58,9 @@ class State(Status):
         self.frames_count = frames_count
         self.processor_name = processor_name
         self._zfill_length = None
+        if self.temp_format == FrameStore.FORMAT and not self.is_storable_target():
+            self.update_status(f'Target frames have different shapes, so they are stored as {FrameStore.FALLBACK_FORMAT} files instead of the {FrameStore.FORMAT} frame store', mood=Mood.NEUTRAL)
+            self.temp_format = FrameStore.FALLBACK_FORMAT
         state: List[Dict[str, Any]] = [
             {"Source": getattr(self, "source_path", "None")},
             {"Target": self.target_path},
@@ -58,6 +69,15 @@ class State(Status):
         state_string = "\n".join([f"\t{key}: {value}" for dict_line in state for key, value in dict_line.items()])
         self.update_status(f'The processing state:\n{state_string}')
 
+    def is_storable_target(self) -> bool:
+        """
+        Checks if processed frames of the target can be stored in one frame store, which requires the same frames shape.
+        Frames of a video (or of a frame store) have the same shape, and files of a directory are checked before processing
+        """
+        if self.target_path is None or not is_dir(self.target_path) or FrameStore.exists(self.target_path):
+            return True
+        return has_same_shapes(list_target_frames(self.target_path))
+
     @property
     def temp_dir(self) -> str:
         return self._temp_dir
@@ -102,11 +122,79 @@ class State(Status):
     @path.setter
     def path(self, path: str) -> None:
         self._path = path
+        self._frame_store = None
+        self._journal = None
         self.make_path(self._path)
 
+    @property
+    def frame_store(self) -> FrameStore | None:
+        """
+        Returns the single-file frames storage, if it is used as the temporary frames format
+        """
+        if self._frame_store is None and self.temp_format == FrameStore.FORMAT:
+            self._frame_store = FrameStore(self.path, self.frames_count)
+        return self._frame_store
+
+    @property
+    def journal(self) -> ProgressJournal:
+        """
+        Returns the journal of processed frames. If there is no journal yet (e.g. frames were made by a previous
+        version), it is built from the frames directory once
+        """
+        if self._journal is None:
+            self._journal = ProgressJournal(os.path.join(self.path, f'.{self.temp_format}.{ProgressJournal.EXTENSION}'))
+            if not self._journal.loaded:
+                self.sync()
+        return self._journal
+
+    def sync(self) -> int:
+        """
+        Reconciles the journal with the frames directory in a single scan: frames files, that are missing in
+        the journal (e.g. extracted by a handler), are added, and journaled frames without files are dropped.
+        Named frames (frames of a directory target, see DirectoryHandler) are indexed by their target files positions
+        :return: count of zero-sized frames files
+        """
+        if self.frame_store is not None:  # the frame store keeps its own bitmap of written frames
+            return 0
+        extension = f'.{self.temp_format}'
+        files_sizes: Dict[str, int] = {}
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(extension):
+                    files_sizes[entry.name] = entry.stat().st_size
+        frames = {index: file_name for index, file_name in self.journal.items() if file_name in files_sizes}
+        journaled_files = set(frames.values())
+        named_frames: Dict[str, int] | None = None
+        for file_name in files_sizes:
+            name = file_name[:-len(extension)]
+            if file_name in journaled_files:
+                continue
+            if name.isdigit():
+                frames[int(name)] = file_name
+                continue
+            if named_frames is None:  # the target is listed once, and only if there are named frames to index
+                named_frames = self.named_frames_indexes()
+            if name in named_frames:
+                frames[named_frames[name]] = file_name
+        self.journal.replace(frames)
+        return sum(1 for file_name in frames.values() if files_sizes[file_name] == 0)
+
+    def named_frames_indexes(self) -> Dict[str, int]:
+        """
+        Returns indexes of frames of the directory target by their names
+        """
+        if self.target_path is None or not is_dir(self.target_path):
+            return {}
+        return {get_file_name(file_path): index for index, file_path in enumerate(list_target_frames(self.target_path))}
+
     def save_temp_frame(self, frame: NumberedFrame) -> None:
-        if not write_to_image(frame.frame, self.get_frame_processed_name(frame)):
-            raise Exception(f"Error saving frame: {self.get_frame_processed_name(frame)}")
+        if self.frame_store is not None:
+            self.frame_store.write(frame.index, frame.frame)
+            return
+        frame_processed_name = self.get_frame_processed_name(frame)
+        if not write_to_image(frame.frame, frame_processed_name, self.png_compression):
+            raise Exception(f"Error saving frame: {frame_processed_name}")
+        self.journal.append(frame.index, os.path.basename(frame_processed_name))
 
     #  Checks if some frame already processed
     @property
@@ -118,19 +206,33 @@ class State(Status):
     def is_finished(self) -> bool:
         return self.frames_count <= self.processed_frames_count != 0
 
+    #  Returns paths of already processed frames (as they are journaled)
     @property
     def processed_frames(self) -> List[str]:
-        png_files = []
-        with os.scandir(self.path) as entries:
-            for entry in entries:
-                if entry.is_file() and entry.name.endswith(".png"):
-                    png_files.append(entry.path)
-        return png_files
+        return [os.path.join(self.path, file_name) for _, file_name in sorted(self.journal.items())]
+
+    #  Returns indexes of already processed frames
+    @property
+    def processed_frames_indexes(self) -> List[int]:
+        if self.frame_store is not None:
+            return self.frame_store.written()
+        return self.journal.indexes()
 
     #  Returns count of already processed frame for this target (0, if none).
     @property
     def processed_frames_count(self) -> int:
-        return len(self.processed_frames)
+        if self.frame_store is not None:
+            return self.frame_store.count
+        return len(self.journal)
+
+    #  Returns the already processed frame
+    def read_temp_frame(self, frame_index: int) -> Frame:
+        if self.frame_store is not None:
+            return self.frame_store.read(frame_index)
+        file_name = self.journal.file_name(frame_index)  # named frames are found by the journal
+        if file_name is not None:
+            return read_from_image(os.path.join(self.path, file_name))
+        return read_from_image(self.get_frame_processed_name(NumberedFrame(frame_index, EmptyFrame)))
 
     #  Returns count of still unprocessed frame for this target (0, if none).
     @property
@@ -140,9 +242,9 @@ class State(Status):
     #  Returns a processed file name for an unprocessed frame index
     def get_frame_processed_name(self, frame: NumberedFrame) -> str:
         if frame.name:
-            filename = frame.name + '.png'
+            filename = f'{frame.name}.{self.temp_format}'
         else:
-            filename = str(frame.index).zfill(self.zfill_length) + '.png'
+            filename = f'{str(frame.index).zfill(self.zfill_length)}.{self.temp_format}'
         return str(os.path.join(self.path, filename))
 
     @property
@@ -153,19 +255,15 @@ class State(Status):
 
     def final_check(self) -> tuple[bool, List[int]]:
         result = True
+        zero_sized_files_count = self.sync() if self.final_check_empty else 0  # the only check, that looks into the directory
         processed_frames_count = self.processed_frames_count
         if self.final_check_state and not self.is_finished:
             self.update_status(message=f"The final processing check failed: processing is done, but state is not finished. Check in {self.path}, may be some frames lost?", mood=Mood.BAD)
             result = False
 
-        if self.final_check_empty:  # check if all frames are non zero-sized
-            zero_sized_files_count = 0
-            for file_path in self.processed_frames:
-                if is_file(file_path) and os.path.getsize(file_path) == 0:
-                    zero_sized_files_count += 1
-            if zero_sized_files_count > 0:
-                self.update_status(message=f"There are zero-sized files in {self.path} temp directory ({zero_sized_files_count} of {processed_frames_count}). Check for free disk space and access rights.", mood=Mood.BAD)
-                result = False
+        if zero_sized_files_count > 0:  # check if all frames are non zero-sized
+            self.update_status(message=f"There are zero-sized files in {self.path} temp directory ({zero_sized_files_count} of {processed_frames_count}). Check for free disk space and access rights.", mood=Mood.BAD)
+            result = False
         lost_frames = []
         if self.final_check_integrity and not self.is_finished:
             lost_frames = self.check_integrity()
@@ -176,9 +274,6 @@ class State(Status):
         return result, lost_frames
 
     def check_integrity(self) -> List[int]:
-        result: List[int] = []
-        for frame_index in range(self.frames_count):
-            f_name = self.get_frame_processed_name(NumberedFrame(frame_index, EmptyFrame))
-            if not path_exists(f_name):
-                result.append(frame_index)
-        return result
+        if self.frame_store is not None:
+            return self.frame_store.missing()
+        return self.journal.missing(self.frames_count)
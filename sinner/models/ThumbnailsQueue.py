@@ -0,0 +1,69 @@
+from bisect import bisect
+from queue import Queue, Empty
+from typing import Generic, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class ThumbnailsQueue(Generic[T]):
+    """
+    Passes thumbnails, made by pool threads in any order, to the GUI thread in batches. Thumbnails are shown in
+    the order of addition, so each taken thumbnail gets its position among already shown ones. Thumbnails, added
+    before the last clearing, are skipped. Thumbnails are added, taken and cleared from the GUI thread only, and put
+    from any thread
+    """
+    generation: int  # increased on clearing, so thumbnails, added before, are not shown
+
+    _ready: Queue[Tuple[int, int, T | None]]  # generation, order and thumbnail (None for a skipped one)
+    _orders: List[int]  # the addition order of each shown thumbnail
+    _added: int  # count of added thumbnails
+    _pending: int  # count of added thumbnails, which are not taken yet
+
+    def __init__(self) -> None:
+        self.generation = 0
+        self._ready = Queue()
+        self._orders = []
+        self._added = 0
+        self._pending = 0
+
+    def add(self) -> Tuple[int, int]:
+        """
+        Registers a new thumbnail, and returns its generation and order, which are passed to put()
+        """
+        order = self._added
+        self._added += 1
+        self._pending += 1
+        return self.generation, order
+
+    def put(self, generation: int, order: int, thumbnail: T | None) -> None:
+        """
+        Passes the made thumbnail. Each added thumbnail should be put, even if it is skipped (as None)
+        """
+        self._ready.put((generation, order, thumbnail))
+
+    def take(self) -> List[Tuple[int, T]]:
+        """
+        Returns ready thumbnails of the current generation with their positions. Positions are valid, when
+        thumbnails are inserted in the returned order
+        """
+        taken: List[Tuple[int, T]] = []
+        while True:
+            try:
+                generation, order, thumbnail = self._ready.get_nowait()
+            except Empty:
+                break
+            self._pending -= 1
+            if generation != self.generation or thumbnail is None:
+                continue
+            position = bisect(self._orders, order)
+            self._orders.insert(position, order)
+            taken.append((position, thumbnail))
+        return taken
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def clear(self) -> None:
+        self._orders = []
+        self.generation += 1
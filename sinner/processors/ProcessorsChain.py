@@ -0,0 +1,54 @@
+from argparse import Namespace
+from typing import List, Callable
+
+from sinner.models.NumberedFrame import NumberedFrame
+from sinner.models.State import State
+from sinner.processors.frame.BaseFrameProcessor import BaseFrameProcessor
+from sinner.typing import Frame
+
+
+class ProcessorsChain(BaseFrameProcessor):
+    """
+    Runs several frame processors one after another on each frame, so the whole chain needs a single pass over
+    the target frames, and only the final result is saved
+    """
+    emoji: str = '⛓'
+
+    _processors: List[BaseFrameProcessor]
+
+    def __init__(self, processors_names: List[str], parameters: Namespace) -> None:
+        self._processors = [BaseFrameProcessor.create(processor_name, parameters) for processor_name in processors_names]
+        super().__init__(parameters)
+
+    @property
+    def name(self) -> str:
+        return '+'.join([processor.__class__.__name__ for processor in self._processors])
+
+    def process_frame(self, frame: Frame) -> Frame:
+        return self.process_numbered_frame(NumberedFrame(0, frame)).frame
+
+    def process_numbered_frame(self, numbered_frame: NumberedFrame) -> NumberedFrame:
+        for processor in self._processors:  # faces, detected by a processor, are reused by next ones
+            numbered_frame = processor.process_numbered_frame(numbered_frame)
+        return numbered_frame
+
+    def process_numbered_frames(self, numbered_frames: List[NumberedFrame]) -> List[NumberedFrame]:
+        for processor in self._processors:
+            numbered_frames = processor.process_numbered_frames(numbered_frames)
+        return numbered_frames
+
+    def release_resources(self) -> None:
+        for processor in self._processors:
+            processor.release_resources()
+
+    def prepare_source(self, source_path: str) -> None:
+        for processor in self._processors:
+            processor.prepare_source(source_path)
+
+    def configure_state(self, state: State) -> None:
+        for processor in self._processors:
+            processor.configure_state(state)
+
+    def configure_output_filename(self, callback: Callable[[str], None]) -> None:
+        for processor in self._processors:
+            processor.configure_output_filename(callback)
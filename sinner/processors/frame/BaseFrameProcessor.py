@@ -5,6 +5,8 @@ from typing import List, Any, Callable
 from argparse import Namespace
 
 from sinner.handlers.frame.BaseFrameHandler import BaseFrameHandler
+from sinner.models.ModelRegistry import ModelRegistry
+from sinner.models.NumberedFrame import NumberedFrame
 from sinner.models.State import State
 from sinner.Status import Status
 from sinner.validators.AttributeLoader import Rules
@@ -14,6 +16,7 @@ from sinner.utilities import load_class, suggest_execution_providers, decode_exe
 
 class BaseFrameProcessor(ABC, Status):
     execution_provider: List[str]
+    models_policy: str
     self_processing: bool = False
 
     parameters: Namespace
@@ -36,6 +39,12 @@ class BaseFrameProcessor(ABC, Status):
                 'default': ['cpu'],
                 'choices': suggest_execution_providers(),
                 'help': 'The execution provider, from available on your hardware/software'
+            },
+            {
+                'parameter': 'models-policy',
+                'default': ModelRegistry.SHARED,
+                'choices': ModelRegistry.POLICIES,
+                'help': 'Share loaded models between processing threads, or load a model instance for each thread'
             }
         ]
 
@@ -47,9 +56,29 @@ class BaseFrameProcessor(ABC, Status):
     def process_frame(self, frame: Frame) -> Frame:
         pass
 
+    def process_numbered_frame(self, numbered_frame: NumberedFrame) -> NumberedFrame:
+        """
+        Processes the frame, keeping data, attached to the frame (e.g. detected faces), for next processors.
+        Processors, that can use this data, override this method
+        """
+        numbered_frame.frame = self.process_frame(numbered_frame.frame)
+        return numbered_frame
+
+    def process_numbered_frames(self, numbered_frames: List[NumberedFrame]) -> List[NumberedFrame]:
+        """
+        Processes a batch of frames. Processors, that can run models on several frames at once, override this method
+        """
+        return [self.process_numbered_frame(numbered_frame) for numbered_frame in numbered_frames]
+
     def release_resources(self) -> None:
         pass
 
+    def prepare_source(self, source_path: str) -> None:
+        """
+        Prepares data of a source in advance (e.g. analyses and caches the source face), so switching to it is fast
+        """
+        pass
+
     def configure_state(self, state: State) -> None:
         pass
 
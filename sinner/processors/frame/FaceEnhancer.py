@@ -1,30 +1,48 @@
 import contextlib
 import io
-import threading
+import os
 from argparse import Namespace
+from typing import TYPE_CHECKING, List, Iterator
 
-import gfpgan
-import torch
-from gfpgan import GFPGANer  # type: ignore[attr-defined]
+import numpy
+from insightface.app.common import Face
 
 from sinner.FaceAnalyser import FaceAnalyser
+from sinner.models.DetectionSize import DetectionSize
+from sinner.models.FaceAlignment import FaceAlignment
+from sinner.models.ModelPool import ModelPool
+from sinner.models.ModelRegistry import ModelRegistry
+from sinner.models.NumberedFrame import NumberedFrame
+from sinner.models.OnnxFaceEnhancer import OnnxFaceEnhancer
 from sinner.validators.AttributeLoader import Rules
 from sinner.processors.frame.BaseFrameProcessor import BaseFrameProcessor
 from sinner.typing import Frame
-from sinner.utilities import conditional_download, get_app_dir, is_float
+from sinner.utilities import conditional_download, get_app_dir, is_float, is_int, is_file
+
+if TYPE_CHECKING:
+    from gfpgan import GFPGANer  # type: ignore[attr-defined]
 
 
 class FaceEnhancer(BaseFrameProcessor):
     emoji: str = '👍'
 
-    thread_semaphore = threading.Semaphore()
-    thread_lock = threading.Lock()
+    TORCH: str = 'torch'  # GFPGAN with torch and its own faces detection
+    ONNX: str = 'onnx'  # the exported GFPGAN network with ONNX Runtime and faces of the faces analyser
+    ENGINES: List[str] = [TORCH, ONNX]
+    MODEL_PATH: str = get_app_dir('models/GFPGANv1.4.pth')
+    ONNX_MODEL_PATH: str = get_app_dir('models/GFPGANv1.4.onnx')
 
     upscale: float
+    enhancer_engine: str
+    gfpgan_detection: bool = False
+    roi_paste: bool = False
+    enhancer_instances: int
     less_output: bool = True
+    face_tracking: int = 0
+    det_size: int | str = DetectionSize.DEFAULT
 
     _face_analyser: FaceAnalyser | None = None
-    _face_enhancer: GFPGANer | None = None
+    _pool: ModelPool | None = None
 
     def rules(self) -> Rules:
         return [
@@ -40,6 +58,42 @@ class FaceEnhancer(BaseFrameProcessor):
                 'valid': lambda attribute, value: is_float(value),
                 'help': 'Select the upscale factor for FaceEnhancer'
             },
+            {
+                'parameter': 'face-tracking',
+                'type': int,
+                'default': 0,
+                'valid': lambda attribute, value: is_int(value) and int(value) >= 0,
+                'help': 'Run the full faces detection on every N-th frame only, and track faces between them (0 disables tracking)'
+            },
+            {
+                'parameter': 'det-size',
+                'default': DetectionSize.DEFAULT,
+                'valid': lambda attribute, value: value == DetectionSize.AUTO or (is_int(value) and int(value) >= DetectionSize.STEP),
+                'help': 'The faces detector resolution (the longer side), or auto to choose it from frames and faces sizes'
+            },
+            {
+                'parameter': 'enhancer-instances',
+                'type': int,
+                'default': 1,
+                'valid': lambda attribute, value: is_int(value) and int(value) > 0,
+                'help': 'The count of face enhancer instances, that enhance frames simultaneously'
+            },
+            {
+                'parameter': 'enhancer-engine',
+                'default': self.TORCH,
+                'choices': self.ENGINES,
+                'help': 'The face enhancer engine: torch runs GFPGAN with PyTorch, onnx runs the exported GFPGAN network with ONNX Runtime'
+            },
+            {
+                'parameter': 'gfpgan-detection',
+                'default': False,
+                'help': 'Detect and align faces with the GFPGAN own detector instead of reusing faces of the faces analyser (the torch engine only)'
+            },
+            {
+                'parameter': 'roi-paste',
+                'default': False,
+                'help': 'Warp and blend processed faces inside regions around faces only, instead of the whole frame'
+            },
             {
                 'module_help': 'This module enhances faces on images'
             }
@@ -48,36 +102,125 @@ class FaceEnhancer(BaseFrameProcessor):
     @property
     def face_analyser(self) -> FaceAnalyser:
         if self._face_analyser is None:
-            self._face_analyser = FaceAnalyser(self.execution_providers, self.less_output)
+            self._face_analyser = FaceAnalyser(self.execution_providers, self.less_output, self.models_policy, self.face_tracking, self.det_size)
         return self._face_analyser
 
+    def load(self, parameters: Namespace, validate: bool = True) -> bool:
+        self._face_analyser = None
+        self._pool = None
+        if not super().load(parameters, validate):
+            return False
+        self.configure_torch_threads()
+        return True
+
+    def configure_torch_threads(self) -> None:
+        """
+        On CPU, torch threads are divided between enhancer instances, so simultaneous enhancements don't compete for cores
+        """
+        if self.enhancer_engine == self.TORCH and self.enhancer_instances > 1:
+            import torch
+            if not torch.cuda.is_available():
+                torch.set_num_threads(max((os.cpu_count() or 1) // self.enhancer_instances, 1))
+
+    def load_face_enhancer(self) -> 'GFPGANer':
+        import gfpgan  # torch and facexlib are imported only for the torch engine
+        if self.less_output:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return gfpgan.GFPGANer(model_path=self.MODEL_PATH, upscale=self.upscale)  # type: ignore[attr-defined]
+        return gfpgan.GFPGANer(model_path=self.MODEL_PATH, upscale=self.upscale)  # type: ignore[attr-defined]
+
+    @property
+    def face_enhancer(self) -> 'GFPGANer':
+        return self.get_face_enhancer(0)
+
+    def get_face_enhancer(self, slot: int) -> 'GFPGANer':
+        return ModelRegistry.shared().get('GFPGANv1.4', self.load_face_enhancer, self.execution_providers, {'upscale': self.upscale, 'instance': slot}, self.models_policy)
+
+    @staticmethod
+    def export_onnx() -> str:
+        """
+        Exports the GFPGAN network for the onnx engine, if it isn't exported yet, and returns the exported graph path
+        """
+        if not is_file(FaceEnhancer.ONNX_MODEL_PATH):
+            conditional_download(get_app_dir('models'), ['https://github.com/TencentARC/GFPGAN/releases/download/v1.3.4/GFPGANv1.4.pth'])
+            OnnxFaceEnhancer.export(FaceEnhancer.MODEL_PATH, FaceEnhancer.ONNX_MODEL_PATH)
+        return FaceEnhancer.ONNX_MODEL_PATH
+
+    def export(self) -> None:
+        """
+        Exports the GFPGAN network for the onnx engine (see export_onnx()) and reports the exported graph path
+        """
+        self.update_status(f'The face enhancer network is exported to {self.export_onnx()}')
+
+    def load_onnx_enhancer(self) -> OnnxFaceEnhancer:
+        return OnnxFaceEnhancer(self.export_onnx(), self.execution_providers, self.upscale)
+
+    @property
+    def onnx_enhancer(self) -> OnnxFaceEnhancer:
+        """
+        ONNX Runtime sessions can run from many threads, so the enhancer isn't pooled
+        """
+        return ModelRegistry.shared().get('GFPGANv1.4-onnx', self.load_onnx_enhancer, self.execution_providers, {'upscale': self.upscale}, self.models_policy)
+
     @property
-    def face_enhancer(self) -> GFPGANer:
-        if self._face_enhancer is None:
-            model_path = get_app_dir('models/GFPGANv1.4.pth')
-            with self.thread_lock:
-                if self.less_output:
-                    with contextlib.redirect_stdout(io.StringIO()):
-                        self._face_enhancer = gfpgan.GFPGANer(model_path=model_path, upscale=self.upscale)  # type: ignore[attr-defined]
-                else:
-                    self._face_enhancer = gfpgan.GFPGANer(model_path=model_path, upscale=self.upscale)  # type: ignore[attr-defined]
-        return self._face_enhancer
+    def pool(self) -> ModelPool:
+        """
+        GFPGANer isn't thread-safe (its face helper keeps the state of the current enhancement), so each thread takes
+        an instance from the pool, with any models policy
+        """
+        if self._pool is None:
+            self._pool = ModelPool(self.enhancer_instances, self.get_face_enhancer)
+        return self._pool
 
     def __init__(self, parameters: Namespace) -> None:
-        download_directory_path = get_app_dir('models')
-        conditional_download(download_directory_path, ['https://github.com/TencentARC/GFPGAN/releases/download/v1.3.4/GFPGANv1.4.pth'])
         super().__init__(parameters)
+        if self.enhancer_engine == self.TORCH or not is_file(self.ONNX_MODEL_PATH):
+            download_directory_path = get_app_dir('models')
+            conditional_download(download_directory_path, ['https://github.com/TencentARC/GFPGAN/releases/download/v1.3.4/GFPGANv1.4.pth'])
+
+    @contextlib.contextmanager
+    def enhancer_instance(self) -> Iterator['GFPGANer']:
+        with self.pool.instance() as face_enhancer:
+            yield face_enhancer
 
     def enhance_face(self, temp_frame: Frame) -> Frame:
-        with self.thread_semaphore:
-            _, _, temp_frame = self.face_enhancer.enhance(temp_frame)
+        with self.enhancer_instance() as face_enhancer:
+            _, _, temp_frame = face_enhancer.enhance(temp_frame)
         return temp_frame
 
+    def enhance_faces(self, frame: Frame, faces: List[Face]) -> Frame:
+        """
+        Enhances faces, found by the faces analyser: the GFPGAN network restores faces, aligned by their keypoints,
+        so GFPGANer doesn't run its own faces detection
+        """
+        with self.enhancer_instance() as face_enhancer:
+            return FaceAlignment.enhance(frame, faces, lambda crops: self.restore_faces(face_enhancer, crops), self.upscale, self.roi_paste)
+
+    @staticmethod
+    def restore_faces(face_enhancer: 'GFPGANer', crops: List[Frame]) -> List[Frame]:
+        import torch
+        if not crops:
+            return []
+        with torch.no_grad():
+            faces = torch.from_numpy(numpy.concatenate([FaceAlignment.to_tensor(crop) for crop in crops])).to(face_enhancer.device)
+            restored = face_enhancer.gfpgan(faces, return_rgb=False)[0]
+        return [FaceAlignment.to_image(output) for output in restored.float().cpu().numpy()]
+
     def process_frame(self, frame: Frame) -> Frame:
-        if self.face_analyser.get_one_face(frame):
-            frame = self.enhance_face(frame)
-        return frame
+        return self.process_numbered_frame(NumberedFrame(0, frame)).frame
+
+    def process_numbered_frame(self, numbered_frame: NumberedFrame) -> NumberedFrame:
+        faces = self.face_analyser.get_frame_faces(numbered_frame)  # faces of a previous processor are reused
+        if faces:
+            if self.enhancer_engine == self.ONNX:
+                numbered_frame.frame = self.onnx_enhancer.enhance(numbered_frame.frame, faces, self.roi_paste)
+            elif self.gfpgan_detection:
+                numbered_frame.frame = self.enhance_face(numbered_frame.frame)
+            else:
+                numbered_frame.frame = self.enhance_faces(numbered_frame.frame, faces)
+        return numbered_frame
 
     def release_resources(self) -> None:
-        if 'CUDAExecutionProvider' in self.execution_providers:
+        if self.enhancer_engine == self.TORCH and 'CUDAExecutionProvider' in self.execution_providers:
+            import torch
             torch.cuda.empty_cache()
@@ -1,21 +1,29 @@
 import contextlib
 import io
 import os
-import threading
 from argparse import Namespace
+from functools import partial
 from typing import List, Dict, Any, Callable
 
+import cv2
 import insightface
+import numpy
 import torch
 from insightface.app.common import Face
 
 from sinner.FaceAnalyser import FaceAnalyser
 from sinner.Status import Mood
 from sinner.helpers.FrameHelper import read_from_image
+from sinner.models.DetectionSize import DetectionSize
+from sinner.models.FaceCache import FaceCache
+from sinner.models.FacePaste import FacePaste
+from sinner.models.ModelRegistry import ModelRegistry
+from sinner.models.NumberedFrame import NumberedFrame
+from sinner.models.SessionBatch import SessionBatch
 from sinner.validators.AttributeLoader import Rules
 from sinner.processors.frame.BaseFrameProcessor import BaseFrameProcessor
 from sinner.typing import Frame, FaceSwapperType
-from sinner.utilities import conditional_download, get_app_dir, is_image, normalize_path
+from sinner.utilities import conditional_download, get_app_dir, is_image, normalize_path, is_int, suggest_temp_dir
 
 
 class FaceSwapper(BaseFrameProcessor):
@@ -24,10 +32,13 @@ class FaceSwapper(BaseFrameProcessor):
     source_path: str
     many_faces: bool = False
     less_output: bool = True
+    face_tracking: int = 0
+    temp_dir: str
+    det_size: int | str = DetectionSize.DEFAULT
+    roi_paste: bool = False
 
     _source_face: Face | None = None
     _face_analyser: FaceAnalyser | None = None
-    _face_swapper: FaceSwapperType | None = None
 
     def rules(self) -> Rules:
         return [
@@ -50,6 +61,29 @@ class FaceSwapper(BaseFrameProcessor):
                 'action': True,
                 'help': 'Silence noisy runtime console output'
             },
+            {
+                'parameter': 'temp-dir',
+                'default': lambda: suggest_temp_dir(),
+                'help': 'Select the directory for temporary files (analysed source faces are cached there)'
+            },
+            {
+                'parameter': 'face-tracking',
+                'type': int,
+                'default': 0,
+                'valid': lambda attribute, value: is_int(value) and int(value) >= 0,
+                'help': 'Run the full faces detection on every N-th frame only, and track faces between them (0 disables tracking)'
+            },
+            {
+                'parameter': 'det-size',
+                'default': DetectionSize.DEFAULT,
+                'valid': lambda attribute, value: value == DetectionSize.AUTO or (is_int(value) and int(value) >= DetectionSize.STEP),
+                'help': 'The faces detector resolution (the longer side), or auto to choose it from frames and faces sizes'
+            },
+            {
+                'parameter': 'roi-paste',
+                'default': False,
+                'help': 'Warp and blend processed faces inside regions around faces only, instead of the whole frame'
+            },
             {
                 'module_help': 'This module swaps faces on images'
             }
@@ -57,6 +91,7 @@ class FaceSwapper(BaseFrameProcessor):
 
     def load(self, parameters: Namespace, validate: bool = True) -> bool:
         self._source_face = None
+        self._face_analyser = None
         return super().load(parameters, validate)
 
     @property
@@ -65,7 +100,7 @@ class FaceSwapper(BaseFrameProcessor):
             if self.source_path is None:
                 # self.update_status(f"There is no source path is provided, ignoring", mood=Mood.BAD)
                 return self._source_face
-            self._source_face = self.face_analyser.get_one_face(read_from_image(self.source_path))
+            self._source_face = self.analyse_source(self.source_path)
             if self._source_face is None:
                 self.update_status(f"There is no face found on {self.source_path}", mood=Mood.BAD)
             else:
@@ -78,22 +113,40 @@ class FaceSwapper(BaseFrameProcessor):
                 self.update_status(f'Recognized face:\n{face_info}')
         return self._source_face
 
+    @property
+    def face_cache(self) -> FaceCache:
+        return FaceCache(os.path.join(suggest_temp_dir(self.temp_dir), FaceCache.__name__))
+
+    def analyse_source(self, source_path: str) -> Face | None:
+        """
+        Returns the face of the source image, taking it from the cache, if the image was already analysed
+        """
+        cache_key = FaceCache.key(source_path, self.face_analyser.signature)
+        face = self.face_cache.load(cache_key)
+        if face is None:
+            face = self.face_analyser.get_one_face(read_from_image(source_path))
+            if face is not None:
+                self.face_cache.save(cache_key, face)
+        return face
+
+    def prepare_source(self, source_path: str) -> None:
+        self.analyse_source(source_path)
+
     @property
     def face_analyser(self) -> FaceAnalyser:
         if self._face_analyser is None:
-            self._face_analyser = FaceAnalyser(self.execution_providers, self.less_output)
+            self._face_analyser = FaceAnalyser(self.execution_providers, self.less_output, self.models_policy, self.face_tracking, self.det_size)
         return self._face_analyser
 
+    def load_face_swapper(self) -> FaceSwapperType:
+        if self.less_output:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return insightface.model_zoo.get_model(get_app_dir('models/inswapper_128.onnx'), providers=self.execution_providers)
+        return insightface.model_zoo.get_model(get_app_dir('models/inswapper_128.onnx'), providers=self.execution_providers)
+
     @property
     def face_swapper(self) -> FaceSwapperType:
-        if self._face_swapper is None:
-            with threading.Lock():
-                if self.less_output:
-                    with contextlib.redirect_stdout(io.StringIO()):
-                        self._face_swapper = insightface.model_zoo.get_model(get_app_dir('models/inswapper_128.onnx'), providers=self.execution_providers)
-                else:
-                    self._face_swapper = insightface.model_zoo.get_model(get_app_dir('models/inswapper_128.onnx'), providers=self.execution_providers)
-        return self._face_swapper
+        return ModelRegistry.shared().get('inswapper_128', self.load_face_swapper, self.execution_providers, policy=self.models_policy)
 
     def __init__(self, parameters: Namespace) -> None:
         download_directory_path = get_app_dir('models')
@@ -105,17 +158,47 @@ class FaceSwapper(BaseFrameProcessor):
             _, _, _ = self.face_analyser, self.face_swapper, self.face_analyser.face_analyser
 
     def process_frame(self, frame: Frame) -> Frame:
+        return self.process_numbered_frame(NumberedFrame(0, frame)).frame
+
+    def process_numbered_frame(self, numbered_frame: NumberedFrame) -> NumberedFrame:
         if self.source_face is not None:
-            if self.many_faces:
-                many_faces = self.face_analyser.get_many_faces(frame)
-                if many_faces:
-                    for target_face in many_faces:
-                        frame = self.face_swapper.get(frame, target_face, self.source_face)
-            else:
-                target_face = self.face_analyser.get_one_face(frame)
-                if target_face:
-                    frame = self.face_swapper.get(frame, target_face, self.source_face)
-        return frame
+            faces = self.face_analyser.get_frame_faces(numbered_frame)
+            target_faces = [target_face for target_face in (faces if self.many_faces else [self.face_analyser.leftmost_face(faces)]) if target_face]
+            if target_faces and self.roi_paste:
+                numbered_frame.frame = numbered_frame.frame.copy()  # faces are pasted in place, the source frame may be used elsewhere
+            for target_face in target_faces:
+                self.swap_face(self.face_swapper, numbered_frame, target_face)
+        return numbered_frame
+
+    def process_numbered_frames(self, numbered_frames: List[NumberedFrame]) -> List[NumberedFrame]:
+        """
+        Detects faces on all frames in one detector run, then swaps all faces of all frames in one swapper run
+        """
+        if self.source_face is None:
+            return numbered_frames
+        calls: List[Callable[[FaceSwapperType], None]] = []
+        for numbered_frame, faces in zip(numbered_frames, self.face_analyser.get_frames_faces(numbered_frames)):
+            target_faces = [target_face for target_face in (faces if self.many_faces else [self.face_analyser.leftmost_face(faces)]) if target_face]
+            if target_faces and self.roi_paste:
+                numbered_frame.frame = numbered_frame.frame.copy()  # faces are pasted in place, the source frame may be used elsewhere
+            calls.extend(partial(self.swap_face, numbered_frame=numbered_frame, target_face=target_face) for target_face in target_faces)
+        SessionBatch.run(self.face_swapper, calls)
+        return numbered_frames
+
+    def swap_face(self, face_swapper: FaceSwapperType, numbered_frame: NumberedFrame, target_face: Face) -> None:
+        if self.roi_paste:
+            swapped_face, affine = face_swapper.get(numbered_frame.frame, target_face, self.source_face, paste_back=False)
+            FacePaste.paste(numbered_frame.frame, swapped_face, cv2.invertAffineTransform(affine), self.feather_mask(swapped_face.shape[0]))
+        else:
+            numbered_frame.frame = face_swapper.get(numbered_frame.frame, target_face, self.source_face)
+
+    @staticmethod
+    def feather_mask(size: int) -> numpy.ndarray:  # type: ignore[type-arg]
+        """
+        The swapped face mask, close to the one INSwapper makes: 1/20 of the face side is cut from each mask side, and the mask is blurred with the kernel of about 1/10 of the face side
+        """
+        edge = size // 20
+        return FacePaste.feather_mask(size, edge, edge * 2 + 1)
 
     def release_resources(self) -> None:
         if 'CUDAExecutionProvider' in self.execution_providers:
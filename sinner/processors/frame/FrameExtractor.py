@@ -34,6 +34,7 @@ class FrameExtractor(BaseFrameProcessor):
 
     def process(self, handler: BaseFrameHandler, state: State) -> None:
         handler.get_frames_paths(path=state.path, frames_range=(state.processed_frames_count, None))
+        state.sync()  # frames are extracted by the handler, not saved through the state
         _, lost_frames = state.final_check()
         if lost_frames:
             with tqdm(
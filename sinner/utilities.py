@@ -14,9 +14,10 @@ from typing import List, Literal, Any, get_type_hints, Callable
 import onnxruntime
 import psutil
 import tensorflow
-from psutil import WINDOWS, MACOS
 from tqdm import tqdm
 
+from sinner.models.MemoryGovernor import MemoryGovernor
+
 TEMP_DIRECTORY = 'temp'
 
 
@@ -25,18 +26,9 @@ def limit_resources(max_memory: int) -> None:
     gpus = tensorflow.config.experimental.list_physical_devices('GPU')
     for gpu in gpus:
         tensorflow.config.experimental.set_memory_growth(gpu, True)
-    # limit memory usage
+    # limit memory, held by frames in processing. A hard process limit would kill the process, when inference libraries map their arenas
     if max_memory:
-        memory = max_memory * 1024 ** 3
-        if MACOS:
-            memory = max_memory * 1024 ** 6
-        if WINDOWS:
-            import ctypes
-            kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
-            kernel32.SetProcessWorkingSetSize(-1, ctypes.c_size_t(memory), ctypes.c_size_t(memory))
-        else:
-            import resource
-            resource.setrlimit(resource.RLIMIT_DATA, (memory, memory))  # type: ignore[attr-defined]
+        MemoryGovernor.shared(max_memory * 1024 ** 3)
 
 
 def path_exists(path: str) -> bool:
@@ -194,6 +186,12 @@ def get_file_name(file_path: str) -> str:
     return os.path.splitext(os.path.basename(file_path))[0]
 
 
+# returns file properties, which change together with the file contents, so they can be used to invalidate cached data
+def get_file_fingerprint(file_path: str) -> dict[str, Any]:
+    stat = os.stat(file_path)
+    return {'path': file_path, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
 # unused
 def delete_subdirectories(root_dir: str, subdirectories: List[str]) -> None:
     for subdirectory in list(set(subdirectories)):
@@ -12,6 +12,8 @@ from psutil import WINDOWS, LINUX, MACOS
 from pyvirtualcam import Camera
 
 from sinner.Status import Status, Mood
+from sinner.models.FrameDeduplicator import FrameDeduplicator
+from sinner.models.NumberedFrame import NumberedFrame
 from sinner.models.PerfCounter import PerfCounter
 from sinner.processors.frame.BaseFrameProcessor import BaseFrameProcessor
 from sinner.typing import Frame
@@ -36,11 +38,13 @@ class WebCam(Status):
     fps: int
     print_fps: bool
     auto_restart: bool
+    duplicate_threshold: float
 
     _camera_input: VideoCapture
     _processors: List[BaseFrameProcessor] = []
     _device: Camera
     _fps_delay: float
+    _deduplicator: FrameDeduplicator | None = None
 
     PreviewWindow: tk.Tk
     canvas: Canvas
@@ -102,6 +106,13 @@ class WebCam(Status):
                 'default': True,
                 'help': 'Try to restart input camera on error (may help with buggy drivers/hardware)'
             },
+            {
+                'parameter': 'duplicate-threshold',
+                'type': float,
+                'default': 0,
+                'valid': lambda: self.duplicate_threshold >= 0,
+                'help': 'Reuse the processed result for a frame, which differs from a recent frame less than the threshold (0 disables)'
+            },
             {
                 'module_help': 'The virtual camera module'
             }
@@ -133,6 +144,8 @@ class WebCam(Status):
         for processor_name in self.frame_processor:
             self._processors.append(BaseFrameProcessor.create(processor_name, self.parameters))
         self._fps_delay = 1 / self.fps
+        if self.duplicate_threshold > 0:
+            self._deduplicator = FrameDeduplicator(self.duplicate_threshold)
 
     def open_camera(self) -> VideoCapture:
         if isinstance(self.input_device, str):
@@ -152,6 +165,7 @@ class WebCam(Status):
         return self._camera_input
 
     def process(self) -> None:
+        frame_index = 0  # camera frames are numbered, so processors can track faces between them
         with self._device as camera:
             while not self.stop:
                 with PerfCounter() as render_time:
@@ -163,8 +177,13 @@ class WebCam(Status):
                             self._camera_input.release()
                             self.open_camera()
                         continue
-                    for processor in self._processors:
-                        frame = processor.process_frame(frame)
+                    numbered_frame = NumberedFrame(frame_index, frame)
+                    if self._deduplicator is None:
+                        numbered_frame = self.process_chain(numbered_frame)
+                    else:
+                        numbered_frame = self._deduplicator.process(numbered_frame, self.process_chain)
+                    frame = numbered_frame.frame
+                    frame_index += 1
                     if self.preview:
                         self._frames_queue.put(frame)
 
@@ -173,10 +192,16 @@ class WebCam(Status):
                 self._frame_render_time = render_time.execution_time
                 if self._frame_render_time < self._fps_delay:
                     time.sleep(self._fps_delay - self._frame_render_time)
-                self.update_status(f"Real fps is {(1 / self._frame_render_time):.2f}", position=(-1, 0))
+                duplicates = f", duplicates: {self._deduplicator.statistics['duplicates']}" if self._deduplicator is not None else ''
+                self.update_status(f"Real fps is {(1 / self._frame_render_time):.2f}{duplicates}", position=(-1, 0))
                 if hasattr(self._camera_input, '_last_frame_render_time'):
                     setattr(self._camera_input, '_last_frame_render_time', self._frame_render_time)
 
+    def process_chain(self, numbered_frame: NumberedFrame) -> NumberedFrame:
+        for processor in self._processors:
+            numbered_frame = processor.process_numbered_frame(numbered_frame)
+        return numbered_frame
+
     def run(self) -> None:
         if self.preview:
             self.show_preview()
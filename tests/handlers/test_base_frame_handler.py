@@ -1,3 +1,4 @@
+import os
 from argparse import Namespace
 
 import pytest
@@ -22,3 +23,10 @@ def test_handlers_factory() -> None:
     assert (BaseFrameHandler.create(handler_name='ImageHandler', parameters=parameters, target_path=target_png), ImageHandler)
     with pytest.raises(Exception):
         BaseFrameHandler.create(handler_name='UnknownHandler', parameters=parameters, target_path=target_png)
+
+
+def test_cache_path() -> None:
+    cache_path = BaseFrameHandler.cache_path('temp', 'FrameIndex', '/videos/a/target.mp4')
+    assert os.path.dirname(cache_path) == os.path.join('temp', 'FrameIndex')
+    assert BaseFrameHandler.cache_path('temp', 'FrameIndex', '/videos/a/../a/target.mp4') == cache_path
+    assert BaseFrameHandler.cache_path('temp', 'FrameIndex', '/videos/b/target.mp4') != cache_path  # the same file name in another directory
@@ -136,3 +136,26 @@ def tests_iterator() -> None:
         assert isinstance(frame_index, int)
         frame_counter += 1
     assert frame_counter == 2
+
+
+def test_extract_frame_sequential() -> None:
+    test_object = get_test_object()
+    for frame_index in [0, 1, 2, 5, 4, 3, 8, 0, 9]:  # sequential, skipping forward, backward and random reads
+        extracted_frame = test_object.extract_frame(frame_index)
+        assert frame_index == extracted_frame.index
+        assert (get_test_object().extract_frame(frame_index).frame == extracted_frame.frame).all()
+    test_object.release_resources()
+    assert test_object._capture is None
+
+
+def test_stream() -> None:
+    test_object = get_test_object()
+    frames = list(test_object.stream())
+    assert TARGET_FC == len(frames)
+    assert [frame.index for frame in frames] == list(range(TARGET_FC))
+    assert frames[0].frame.shape == FRAME_SHAPE
+    assert (frames[3].frame == test_object.extract_frame(3).frame).all()
+
+    frames = list(test_object.stream(start_frame=7))
+    assert [frame.index for frame in frames] == [7, 8, 9]
+    assert (frames[0].frame == test_object.extract_frame(7).frame).all()
@@ -109,6 +109,14 @@ def test_result() -> None:
     assert target.fps == TARGET_FPS
 
 
+def test_result_temp_format() -> None:
+    frames_dir = os.path.join(tmp_dir, 'frames')
+    shutil.copytree(state_frames_dir, frames_dir)
+    shutil.copy(os.path.join(state_frames_dir, '00.png'), os.path.join(frames_dir, '0.bmp'))  # a foreign file is listed first
+    assert get_test_object().result(from_dir=frames_dir, filename=result_mp4) is True
+    assert FFmpegVideoHandler(target_path=result_mp4, parameters=Namespace()).fc == TARGET_FC
+
+
 def tests_iterator() -> None:
     cv2 = get_test_object()
     assert isinstance(cv2, Iterator)
@@ -124,3 +132,24 @@ def tests_iterator() -> None:
         assert isinstance(frame_index, int)
         frame_counter += 1
     assert frame_counter == 2
+
+
+def test_stream() -> None:
+    test_object = get_test_object()
+    frames = list(test_object.stream())
+    assert TARGET_FC == len(frames)
+    assert [frame.index for frame in frames] == list(range(TARGET_FC))
+    assert frames[0].frame.shape == FRAME_SHAPE
+    assert (frames[3].frame == test_object.extract_frame(3).frame).all()
+
+    frames = list(test_object.stream(start_frame=7))
+    assert [frame.index for frame in frames] == [7, 8, 9]
+    assert (frames[0].frame == test_object.extract_frame(7).frame).all()
+
+
+def test_extract_frame_indexed() -> None:
+    test_object = get_test_object()
+    assert test_object.frame_index is not None
+    assert TARGET_FC == len(test_object.frame_index)
+    for numbered_frame in test_object.stream():
+        assert (test_object.extract_frame(numbered_frame.index).frame == numbered_frame.frame).all()
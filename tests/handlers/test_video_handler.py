@@ -129,3 +129,10 @@ def tests_iterator() -> None:
         assert isinstance(frame_index, int)
         frame_counter += 1
     assert frame_counter == 2
+
+
+def test_stream_numbering() -> None:
+    test_object = get_test_object()
+    for numbered_frame in test_object.stream(start_frame=4):  # decoders can differ slightly, but frames should match the extracted ones
+        differences = [abs(test_object.extract_frame(frame_index).frame.astype(int) - numbered_frame.frame).mean() for frame_index in range(TARGET_FC)]
+        assert differences.index(min(differences)) == numbered_frame.index
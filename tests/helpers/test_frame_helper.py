@@ -136,3 +136,33 @@ def test_resize_proportional_image() -> None:
     # new proportions bounds are not equal (width is bigger)
     resized_image = FrameHelper.resize_proportionally(test_image, (1, 1))
     assert resized_image.shape == (1, 1, 3)
+
+
+def test_frame_formats() -> None:
+    image = FrameHelper.read_from_image(target_png)
+    for frame_format in FrameHelper.available_frame_formats():
+        file_path = os.path.join(tmp_dir, f'save.{frame_format}')
+        assert FrameHelper.write_to_image(image, file_path) is True
+        assert (FrameHelper.read_from_image(file_path) == image).all()  # all formats are lossless
+    assert [FrameHelper.get_frame_format(file_path) for file_path in FrameHelper.list_frame_files(tmp_dir)] == sorted(FrameHelper.available_frame_formats())
+
+
+def test_png_compression() -> None:
+    image = FrameHelper.read_from_image(target_png)
+    fast_path = os.path.join(tmp_dir, 'fast.png')
+    best_path = os.path.join(tmp_dir, 'best.png')
+    assert FrameHelper.write_to_image(image, fast_path, 0) is True
+    assert FrameHelper.write_to_image(image, best_path, 9) is True
+    assert os.path.getsize(fast_path) > os.path.getsize(best_path)
+    assert (FrameHelper.read_from_image(fast_path) == FrameHelper.read_from_image(best_path)).all()
+
+
+def test_frame_shape() -> None:
+    image = FrameHelper.read_from_image(target_png)
+    paths = [os.path.join(tmp_dir, f'shape.{frame_format}') for frame_format in FrameHelper.available_frame_formats()]
+    for file_path in paths:
+        FrameHelper.write_to_image(image, file_path)
+        assert FrameHelper.get_frame_shape(file_path) == image.shape
+    assert FrameHelper.has_same_shapes(paths) is True
+    FrameHelper.write_to_image(FrameHelper.scale(image, 0.5), os.path.join(tmp_dir, 'small.png'))
+    assert FrameHelper.has_same_shapes(paths + [os.path.join(tmp_dir, 'small.png')]) is False
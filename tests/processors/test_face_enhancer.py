@@ -1,11 +1,17 @@
 import multiprocessing
+import os
 from argparse import Namespace
+from types import SimpleNamespace
 
+import numpy
+import torch
 from gfpgan import GFPGANer  # type: ignore[attr-defined]
 from sinner.Parameters import Parameters
 
 from sinner.FaceAnalyser import FaceAnalyser
 from sinner.helpers.FrameHelper import read_from_image
+from sinner.models.FaceAlignment import FaceAlignment
+from sinner.models.OnnxFaceEnhancer import OnnxFaceEnhancer
 from sinner.processors.frame.FaceEnhancer import FaceEnhancer
 from sinner.models.State import State
 from sinner.typing import Frame
@@ -47,3 +53,37 @@ def test_process_frame_upscale():
     processed_frame = test_object.process_frame(read_from_image(target_png))
     assert (processed_frame, Frame)
     assert processed_frame.shape[:2] == (2160, 1722)
+
+
+def test_onnx_parity():
+    test_object = get_test_object()
+    onnx_path = os.path.join(tmp_dir, 'GFPGANv1.4.onnx')
+    OnnxFaceEnhancer.export(FaceEnhancer.MODEL_PATH, onnx_path)
+    frame = read_from_image(target_png)
+    crop, _ = FaceAlignment.align(frame, test_object.face_analyser.get_one_face(frame).kps)
+    network = test_object.face_enhancer.gfpgan
+    with torch.no_grad():
+        expected = FaceAlignment.to_image(network(torch.from_numpy(FaceAlignment.to_tensor(crop)).to(next(network.parameters()).device), return_rgb=False, randomize_noise=False)[0][0].cpu().numpy())
+    restored = OnnxFaceEnhancer(onnx_path, ['CPUExecutionProvider']).restore([crop])[0]
+    assert numpy.abs(restored.astype(numpy.int16) - expected.astype(numpy.int16)).mean() < 1
+
+
+def test_process_frame_onnx():
+    test_object = FaceEnhancer(parameters=Parameters(f'--execution-provider=cpu --execution-threads={multiprocessing.cpu_count()} --max-memory=12 --target-path="{target_png}" --output-path="{tmp_dir}" --enhancer-engine=onnx --upscale=2').parameters)
+    processed_frame = test_object.process_frame(read_from_image(target_png))
+    assert processed_frame.shape[:2] == (2160, 1722)
+
+
+def test_restore_faces():
+    face_enhancer = SimpleNamespace(device='cpu', gfpgan=lambda faces, return_rgb: (faces, None))  # the identity network
+    crop = read_from_image(target_png)[:FaceAlignment.SIZE, :FaceAlignment.SIZE]
+    restored = FaceEnhancer.restore_faces(face_enhancer, [crop, crop])
+    assert len(restored) == 2
+    assert numpy.array_equal(restored[0], crop)
+    assert FaceEnhancer.restore_faces(face_enhancer, []) == []
+
+
+def test_process_frame_gfpgan_detection():
+    test_object = FaceEnhancer(parameters=Parameters(f'--execution-provider=cpu --execution-threads={multiprocessing.cpu_count()} --max-memory=12 --target-path="{target_png}" --output-path="{tmp_dir}" --gfpgan-detection').parameters)
+    processed_frame = test_object.process_frame(read_from_image(target_png))
+    assert processed_frame.shape == IMAGE_SHAPE
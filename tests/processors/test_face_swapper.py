@@ -1,15 +1,17 @@
 import multiprocessing
 from argparse import Namespace
 
+import numpy
 from colorama import Fore, Back
 from insightface.app.common import Face
 
 from sinner.Parameters import Parameters
 from sinner.FaceAnalyser import FaceAnalyser
 from sinner.helpers.FrameHelper import read_from_image
+from sinner.models.NumberedFrame import NumberedFrame
 from sinner.processors.frame.FaceSwapper import FaceSwapper
 from sinner.typing import Frame, FaceSwapperType
-from tests.constants import source_jpg, target_png, IMAGE_SHAPE, tmp_dir, no_face_jpg
+from tests.constants import source_jpg, target_png, IMAGE_SHAPE, tmp_dir, no_face_jpg, target_faces
 
 parameters: Namespace = Parameters(f'--execution-provider=cpu --execution-threads={multiprocessing.cpu_count()} --max-memory=12 --source-path="{source_jpg}" --target-path="{target_png}" --output-path="{tmp_dir}"').parameters
 
@@ -22,7 +24,7 @@ def test_init():
     test_object = get_test_object()
     assert (test_object, FaceSwapper)
     assert (test_object._face_analyser, FaceAnalyser)
-    assert (test_object._face_swapper, FaceSwapperType)
+    assert (test_object.face_swapper, FaceSwapperType)
 
 
 def test_face_analysis():
@@ -44,3 +46,20 @@ def test_process_frame():
     processed_frame = get_test_object().process_frame(read_from_image(target_png))
     assert (processed_frame, Frame)
     assert processed_frame.shape == IMAGE_SHAPE
+
+
+def test_process_frame_roi():
+    frame = read_from_image(target_png)
+    test_object = FaceSwapper(parameters=Parameters(f'--execution-provider=cpu --source-path="{source_jpg}" --target-path="{target_png}" --output-path="{tmp_dir}" --roi-paste').parameters)
+    processed_frame = test_object.process_frame(frame)
+    assert processed_frame.shape == IMAGE_SHAPE
+    assert numpy.array_equal(frame, read_from_image(target_png))  # the source frame isn't changed
+    assert numpy.abs(processed_frame.astype(numpy.int16) - get_test_object().process_frame(frame).astype(numpy.int16)).mean() < 1
+
+
+def test_process_frames():
+    frames = [read_from_image(target_png), read_from_image(target_faces), read_from_image(target_png)]
+    test_object = FaceSwapper(parameters=Parameters(f'--execution-provider=cpu --source-path="{source_jpg}" --target-path="{target_png}" --output-path="{tmp_dir}" --many-faces').parameters)
+    batched = test_object.process_numbered_frames([NumberedFrame(index, frame.copy()) for index, frame in enumerate(frames)])  # batched with the real swapper wrapper
+    for numbered_frame, frame in zip(batched, frames):
+        assert numpy.abs(numbered_frame.frame.astype(numpy.int16) - test_object.process_frame(frame.copy()).astype(numpy.int16)).max() <= 1
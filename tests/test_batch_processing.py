@@ -3,12 +3,17 @@ import glob
 import multiprocessing
 import os.path
 import shutil
+import threading
+from typing import List
 
 import pytest
 
 from sinner.Parameters import Parameters
 from sinner.BatchProcessingCore import BatchProcessingCore
+from sinner.handlers.frame.VideoHandler import VideoHandler
+from sinner.models.NumberedFrame import NumberedFrame
 from sinner.models.State import State
+from sinner.processors.frame.BaseFrameProcessor import BaseFrameProcessor
 from sinner.processors.frame.DummyProcessor import DummyProcessor
 from sinner.utilities import limit_resources, suggest_max_memory, get_file_name, get_app_dir, resolve_relative_path
 from sinner.validators.LoaderException import LoadingException
@@ -163,3 +168,102 @@ def test_reprocess_lost_frames() -> None:
     assert len(glob.glob(os.path.join(case_temp_dir, '*.png'))) == 8
     batch_processor.process(current_processor, handler, state)
     assert len(glob.glob(os.path.join(case_temp_dir, '*.png'))) == 10
+
+
+def test_dummy_mp4_pipe_result() -> None:
+    assert os.path.exists(result_mp4) is False
+    params = Parameters(f'--frame-processor DummyProcessor --target-path="{target_mp4}" --output-path="{result_mp4}" --pipe-result --keep-frames --temp-dir="{tmp_dir}"')
+    BatchProcessingCore(parameters=params.parameters).run()
+    assert os.path.exists(result_mp4) is True
+    assert VideoHandler(result_mp4, params.parameters).fc == TARGET_FC
+    assert len(glob.glob(os.path.join(tmp_dir, 'DummyProcessor', 'target.mp4', '*.png'))) == 0
+
+
+def test_dummy_mp4_frame_store() -> None:
+    assert os.path.exists(result_mp4) is False
+    params = Parameters(f'--frame-processor DummyProcessor --target-path="{target_mp4}" --output-path="{result_mp4}" --temp-format=mmap --keep-frames --temp-dir="{tmp_dir}"')
+    BatchProcessingCore(parameters=params.parameters).run()
+    assert os.path.exists(os.path.join(tmp_dir, 'DummyProcessor', 'target.mp4', 'frames.npy')) is True
+    assert glob.glob(os.path.join(tmp_dir, 'DummyProcessor', 'target.mp4', '*.png')) == []
+    assert VideoHandler(result_mp4, params.parameters).fc == TARGET_FC
+
+
+def test_dummy_images_frame_store() -> None:
+    output_dir = os.path.join(tmp_dir, 'images_result')
+    params = Parameters(f'--frame-processor DummyProcessor --target-path="{images_dir}" --output-path="{output_dir}" --temp-format=mmap --keep-frames --temp-dir="{tmp_dir}"')
+    BatchProcessingCore(parameters=params.parameters).run()  # images of different sizes can't be stored in one frame store
+    assert os.path.exists(os.path.join(tmp_dir, 'DummyProcessor', 'images', 'frames.npy')) is False
+    result_image_names = [get_file_name(filepath) for filepath in glob.glob(os.path.join(output_dir, '*.*'))]
+    assert sorted(result_image_names) == ['juel', 'olivia', 'scarlett']
+
+
+def test_dummy_mp4_pipe_result_resume() -> None:
+    params = Parameters(f'--frame-processor DummyProcessor --target-path="{target_mp4}" --output-path="{result_mp4}" --pipe-result --pipe-checkpoint --keep-frames --temp-dir="{tmp_dir}"')
+    BatchProcessingCore(parameters=params.parameters).run()
+    frames_dir = os.path.join(tmp_dir, 'DummyProcessor', 'target.mp4')
+    assert len(glob.glob(os.path.join(frames_dir, '*.png'))) == TARGET_FC
+    os.remove(result_mp4)
+    for frame_path in sorted(glob.glob(os.path.join(frames_dir, '*.png')))[5:]:  # emulate the interrupted processing
+        os.remove(frame_path)
+    BatchProcessingCore(parameters=params.parameters).run()
+    assert len(glob.glob(os.path.join(frames_dir, '*.png'))) == TARGET_FC
+    assert VideoHandler(result_mp4, params.parameters).fc == TARGET_FC
+
+
+def test_dummy_mp4_pipe_result_error(monkeypatch) -> None:
+    def failing_process(self: BaseFrameProcessor, numbered_frame: NumberedFrame) -> NumberedFrame:
+        if numbered_frame.index == 1:
+            raise Exception('Processing error')
+        return numbered_frame
+
+    def run() -> None:
+        try:
+            BatchProcessingCore(parameters=params.parameters).run()
+        except Exception as exception:
+            errors.append(exception)
+
+    params = Parameters(f'--frame-processor DummyProcessor --target-path="{target_mp4}" --output-path="{result_mp4}" --pipe-result --pipe-checkpoint --keep-frames --execution-threads=1 --temp-dir="{tmp_dir}"')
+    BatchProcessingCore(parameters=params.parameters).run()
+    frames_dir = os.path.join(tmp_dir, 'DummyProcessor', 'target.mp4')
+    os.remove(result_mp4)
+    os.remove(sorted(glob.glob(os.path.join(frames_dir, '*.png')))[1])
+    monkeypatch.setattr(BaseFrameProcessor, 'process_numbered_frame', failing_process)  # processors classes are loaded by their paths
+    errors: List[Exception] = []
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    runner.join(60)  # saved frames after the failed one fill the reorder buffer, and they must not block the source
+    assert runner.is_alive() is False
+    assert len(errors) == 1 and 'Processing error' in str(errors[0])
+
+
+def test_suggest_processors_chains() -> None:
+    params = Parameters(f'--frame-processor FrameExtractor DummyProcessor FrameResizer --target-path="{target_mp4}" --fuse-processors')
+    assert BatchProcessingCore(parameters=params.parameters).suggest_processors_chains() == [['FrameExtractor'], ['DummyProcessor', 'FrameResizer']]
+    params = Parameters(f'--frame-processor FrameExtractor DummyProcessor FrameResizer --target-path="{target_mp4}"')
+    assert BatchProcessingCore(parameters=params.parameters).suggest_processors_chains() == [['FrameExtractor'], ['DummyProcessor'], ['FrameResizer']]
+
+
+def test_fused_processors_mp4() -> None:
+    assert os.path.exists(result_mp4) is False
+    params = Parameters(f'--frame-processor DummyProcessor FrameResizer --scale=0.5 --target-path="{target_mp4}" --output-path="{result_mp4}" --fuse-processors --keep-frames --temp-dir="{tmp_dir}"')
+    BatchProcessingCore(parameters=params.parameters).run()
+    assert os.path.exists(result_mp4) is True
+    assert os.path.exists(os.path.join(tmp_dir, 'DummyProcessor')) is False
+    assert os.path.exists(os.path.join(tmp_dir, 'FrameResizer')) is False
+    assert len(glob.glob(os.path.join(tmp_dir, 'DummyProcessor+FrameResizer', 'target.mp4', '*.png'))) == TARGET_FC
+
+
+def test_dummy_mp4_temp_format() -> None:
+    assert os.path.exists(result_mp4) is False
+    params = Parameters(f'--frame-processor DummyProcessor --target-path="{target_mp4}" --output-path="{result_mp4}" --temp-format=npy --keep-frames --temp-dir="{tmp_dir}"')
+    BatchProcessingCore(parameters=params.parameters).run()
+    assert len(glob.glob(os.path.join(tmp_dir, 'DummyProcessor', 'target.mp4', '*.npy'))) == TARGET_FC
+    assert VideoHandler(result_mp4, params.parameters).fc == TARGET_FC
+
+
+def test_dummy_mp4_duplicates() -> None:
+    assert os.path.exists(result_mp4) is False
+    params = Parameters(f'--frame-processor DummyProcessor --target-path="{target_mp4}" --output-path="{result_mp4}" --duplicate-threshold=255 --execution-threads=1 --batch-size=4 --keep-frames --temp-dir="{tmp_dir}"')
+    BatchProcessingCore(parameters=params.parameters).run()
+    assert len(glob.glob(os.path.join(tmp_dir, 'DummyProcessor', 'target.mp4', '*.png'))) == TARGET_FC
+    assert VideoHandler(result_mp4, params.parameters).fc == TARGET_FC
@@ -0,0 +1,35 @@
+import numpy
+from insightface.app.common import Face
+
+from sinner.models.DetectionSize import DetectionSize
+
+
+def get_face(side: int) -> Face:
+    return Face(bbox=numpy.array([10, 10, 10 + side, 10 + side], dtype=numpy.float32), det_score=0.9)
+
+
+def test_fixed_size() -> None:
+    detection_size = DetectionSize(640)
+    assert detection_size.for_frame((480, 854, 3)) == (640, 384)  # the input follows the frame proportions
+    assert detection_size.for_frame((1080, 1080, 3)) == (640, 640)
+    assert detection_size.for_frame((1920, 1080, 3)) == (384, 640)
+    assert DetectionSize('1024').for_frame((2160, 3840, 3)) == (1024, 576)
+    detection_size.remember([get_face(10)])  # faces don't change the fixed size
+    assert detection_size.for_frame((480, 854, 3)) == (640, 384)
+
+
+def test_auto_size() -> None:
+    detection_size = DetectionSize(DetectionSize.AUTO)
+    assert detection_size.auto
+    assert detection_size.for_frame((2160, 3840, 3)) == (640, 384)  # no faces seen yet
+    assert detection_size.for_frame((240, 320, 3)) == (320, 256)  # small frames aren't upscaled (but not smaller, than the minimal size)
+    detection_size.remember([get_face(100), get_face(240)])
+    assert detection_size.for_frame((2160, 3840, 3)) == (1024, 576)  # the largest face becomes 64px
+    detection_size.remember([])
+    assert detection_size.for_frame((480, 640, 3)) == (320, 256)  # large faces on small frames need the minimal size
+    detection_size.remember([get_face(20)])
+    assert detection_size.for_frame((2160, 3840, 3)) == (1024, 576)  # the largest recent face is used
+    for _ in range(DetectionSize.RECENT):
+        detection_size.remember([get_face(20)])
+    assert detection_size.for_frame((2160, 3840, 3)) == (1920, 1088)  # small faces in 4K need the maximal size
+    assert detection_size.for_frame((480, 854, 3)) == (864, 480)  # but the frame isn't upscaled
@@ -1,10 +1,13 @@
 from typing import List
 
+import numpy
+
 from insightface.app.common import Face
 
 from sinner.FaceAnalyser import FaceAnalyser
 from sinner.helpers.FrameHelper import read_from_image
-from tests.constants import source_jpg, target_faces
+from sinner.models.NumberedFrame import NumberedFrame
+from tests.constants import source_jpg, target_faces, target_png
 
 
 def get_test_object() -> FaceAnalyser:
@@ -36,3 +39,37 @@ def test_many_faces():
     assert faces[0].sex == 'F'
     assert faces[1].age == 47
     assert faces[1].sex == 'M'
+
+
+def test_frame_faces():
+    analyser = get_test_object()
+    numbered_frame = NumberedFrame(0, read_from_image(target_faces))
+    faces = analyser.get_frame_faces(numbered_frame)
+    assert len(faces) == 2
+    assert numbered_frame.detection is not None
+    assert analyser.get_frame_faces(numbered_frame) is faces  # the detection is reused
+
+
+def test_profiles():
+    analyser = get_test_object()
+    faces = analyser.get_faces(read_from_image(target_faces))
+    assert len(faces) == 2
+    assert faces[0].kps is not None
+    assert faces[0].embedding is None  # only the detector runs for the default profile
+    assert faces[0].age is None
+    analyser.analyse(read_from_image(target_faces), faces, FaceAnalyser.RECOGNITION)
+    assert faces[0].embedding is not None
+    assert faces[0].age is None
+    faces = analyser.get_faces(read_from_image(target_faces), FaceAnalyser.FULL)
+    assert faces[0].embedding is not None
+    assert faces[0].age is not None
+
+
+def test_detect_frames():
+    analyser = get_test_object()
+    frames = [read_from_image(target_faces), read_from_image(source_jpg), read_from_image(target_faces), read_from_image(target_png)]
+    for batched, faces in zip(analyser.detect_frames(frames), [analyser.detect(frame) for frame in frames]):  # batched with the real detector wrapper
+        assert len(batched) == len(faces)
+        for batched_face, face in zip(batched, faces):
+            assert numpy.allclose(batched_face.bbox, face.bbox, atol=1e-3)
+            assert numpy.allclose(batched_face.kps, face.kps, atol=1e-3)
@@ -0,0 +1,59 @@
+import os.path
+import shutil
+from pathlib import Path
+
+import numpy
+from insightface.app.common import Face
+
+from sinner.models.FaceCache import FaceCache
+from tests.constants import tmp_dir, source_jpg, no_face_jpg
+
+cache_dir: str = os.path.join(tmp_dir, FaceCache.__name__)
+
+
+def setup_function():
+    setup()
+
+
+def setup():
+    #  clean previous results, if exists
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    Path(tmp_dir).mkdir(parents=True)
+
+
+def get_face() -> Face:
+    embedding = numpy.arange(512, dtype=numpy.float32)
+    return Face(bbox=numpy.array([10, 20, 50, 80], dtype=numpy.float32), kps=numpy.ones((5, 2), dtype=numpy.float32), det_score=0.9, embedding=embedding, gender=1, age=30)
+
+
+def test_save_load() -> None:
+    cache = FaceCache(cache_dir)
+    key = FaceCache.key(source_jpg, 'signature')
+    assert cache.load(key) is None
+    cache.save(key, get_face())
+    face = FaceCache(cache_dir).load(key)
+    assert face is not None
+    assert numpy.array_equal(face.bbox, [10, 20, 50, 80])
+    assert numpy.array_equal(face.embedding, get_face().embedding)
+    assert numpy.allclose(face.normed_embedding, get_face().normed_embedding)
+    assert face.det_score == numpy.float32(0.9)
+    assert face.sex == 'M'
+    assert face.age == 30
+    assert os.listdir(cache_dir) == [f'{key}.{FaceCache.EXTENSION}']
+
+
+def test_keys() -> None:
+    key = FaceCache.key(source_jpg, 'signature')
+    assert key == FaceCache.key(source_jpg, 'signature')
+    assert key != FaceCache.key(source_jpg, 'other signature')
+    assert key != FaceCache.key(no_face_jpg, 'signature')
+
+
+def test_broken_file() -> None:
+    cache = FaceCache(cache_dir)
+    key = FaceCache.key(source_jpg, 'signature')
+    Path(cache_dir).mkdir(parents=True)
+    with open(cache.get_path(key), 'wb') as cache_file:
+        cache_file.write(b'broken')
+    assert cache.load(key) is None
@@ -0,0 +1,61 @@
+import cv2
+import numpy
+import pytest
+
+from sinner.models.FacePaste import FacePaste
+from sinner.typing import Frame
+
+SIZE: int = 128
+
+
+def get_frame() -> Frame:
+    return numpy.random.default_rng(0).integers(0, 256, (1080, 1920, 3), dtype=numpy.uint8)
+
+
+def get_face() -> Frame:
+    return numpy.random.default_rng(1).integers(0, 256, (SIZE, SIZE, 3), dtype=numpy.uint8)
+
+
+def get_inverse_affine(left: float, top: float, scale: float, angle: float = 0) -> numpy.ndarray:  # type: ignore[type-arg]
+    cos, sin = scale * numpy.cos(angle), scale * numpy.sin(angle)
+    return numpy.array([[cos, -sin, left], [sin, cos, top]], dtype=numpy.float64)
+
+
+def test_feather_mask() -> None:
+    mask = FacePaste.feather_mask(SIZE, 6, 13)
+    assert mask.shape == (SIZE, SIZE)
+    assert mask[SIZE // 2, SIZE // 2] == pytest.approx(1)
+    assert mask[0, 0] < 0.001
+    assert not mask.flags.writeable
+    assert FacePaste.feather_mask(SIZE, 6, 13) is mask  # masks are cached
+
+
+def test_region() -> None:
+    assert FacePaste.region(get_inverse_affine(100, 50, 2), SIZE, (1080, 1920, 3)) == (98, 48, 358, 308)
+    assert FacePaste.region(get_inverse_affine(-100, 1000, 2), SIZE, (1080, 1920, 3)) == (0, 998, 158, 1080)  # clipped
+    left, top, right, bottom = FacePaste.region(get_inverse_affine(2000, 2000, 1), SIZE, (1080, 1920, 3))
+    assert right == left and bottom == top  # outside the frame
+
+
+def test_paste_equals_full_frame() -> None:
+    frame, face = get_frame(), get_face()
+    mask = FacePaste.feather_mask(SIZE, 6, 13)
+    for inverse_affine in [get_inverse_affine(300.5, 200.25, 1.7, 0.3), get_inverse_affine(-40, 1000, 0.9)]:
+        size = (frame.shape[1], frame.shape[0])
+        full_mask = cv2.warpAffine(mask, inverse_affine, size)[:, :, None]
+        expected = (full_mask * cv2.warpAffine(face, inverse_affine, size) + (1 - full_mask) * frame).astype(numpy.uint8)
+        result = FacePaste.paste(frame.copy(), face, inverse_affine, mask)
+        assert numpy.abs(result.astype(numpy.int16) - expected.astype(numpy.int16)).max() <= 1
+
+
+def test_paste_in_place() -> None:
+    frame, face = get_frame(), get_face()
+    original = frame.copy()
+    result = FacePaste.paste(frame, face, get_inverse_affine(100, 50, 2), FacePaste.feather_mask(SIZE, 6, 13))
+    assert result is frame
+    left, top, right, bottom = FacePaste.region(get_inverse_affine(100, 50, 2), SIZE, frame.shape)
+    outside = numpy.ones(frame.shape[:2], dtype=bool)
+    outside[top:bottom, left:right] = False
+    assert numpy.array_equal(frame[outside], original[outside])  # only the region is written
+    assert not numpy.array_equal(frame, original)
+    assert numpy.array_equal(FacePaste.paste(frame.copy(), face, get_inverse_affine(2000, 2000, 1), FacePaste.feather_mask(SIZE, 6, 13)), frame)
@@ -0,0 +1,80 @@
+from typing import List, Tuple
+
+import numpy
+from insightface.app.common import Face
+
+from sinner.models.FaceTracker import FaceTracker
+from sinner.typing import Frame
+
+calls: List[Tuple[int, int] | None] = []
+
+
+def detect(frame: Frame, input_size: Tuple[int, int] | None = None) -> List[Face]:
+    """
+    Detects the bright square as a face
+    """
+    calls.append(input_size)
+    ys, xs = numpy.nonzero(frame[:, :, 0] > 128)
+    if len(xs) == 0:
+        return []
+    left, top, right, bottom = xs.min(), ys.min(), xs.max() + 1, ys.max() + 1
+    return [Face(bbox=numpy.array([left, top, right, bottom], dtype=numpy.float32), kps=numpy.array([[left, top]], dtype=numpy.float32), det_score=0.9)]
+
+
+def get_frame(left: int, top: int, background: int = 0) -> Frame:
+    frame = numpy.full((200, 300, 3), background, dtype=numpy.uint8)
+    frame[top:top + 40, left:left + 40] = 255
+    return frame
+
+
+def setup_function() -> None:
+    calls.clear()
+
+
+def test_tracking() -> None:
+    tracker = FaceTracker(5, detect)
+    for index in range(10):
+        faces = tracker.track(index, get_frame(100 + index * 2, 50))
+        assert len(faces) == 1
+        assert numpy.array_equal(faces[0].bbox, [100 + index * 2, 50, 140 + index * 2, 90])  # tracked faces are shifted back to the frame coordinates
+        assert numpy.array_equal(faces[0].kps[0], [100 + index * 2, 50])
+    assert calls.count(None) == 2  # keyframes 0 and 5
+    assert calls.count(FaceTracker.REGION_SIZE) == 8
+    assert tracker.statistics == {'keyframes': 2, 'tracked': 8}
+
+
+def test_disabled() -> None:
+    tracker = FaceTracker(1, detect)
+    for index in range(3):
+        tracker.track(index, get_frame(100, 50))
+    assert calls == [None, None, None]
+
+
+def test_out_of_order() -> None:
+    tracker = FaceTracker(10, detect)
+    tracker.track(3, get_frame(100, 50))  # there is no preceding frame
+    tracker.track(2, get_frame(100, 50))  # the following frame isn't used
+    tracker.track(4, get_frame(100, 50))
+    assert calls == [None, None, FaceTracker.REGION_SIZE]
+
+
+def test_lost_face() -> None:
+    tracker = FaceTracker(10, detect)
+    tracker.track(0, get_frame(10, 10))
+    faces = tracker.track(1, get_frame(200, 150))  # the face is outside the tracking region
+    assert calls == [None, FaceTracker.REGION_SIZE, None]
+    assert numpy.array_equal(faces[0].bbox, [200, 150, 240, 190])
+
+
+def test_scene_cut() -> None:
+    tracker = FaceTracker(10, detect)
+    tracker.track(0, get_frame(100, 50))
+    tracker.track(1, get_frame(100, 50, background=100))
+    assert calls == [None, None]
+
+
+def test_no_faces() -> None:
+    tracker = FaceTracker(10, detect)
+    assert tracker.track(0, numpy.zeros((200, 300, 3), dtype=numpy.uint8)) == []
+    tracker.track(1, get_frame(100, 50))  # new faces can be found only by the full detection
+    assert calls == [None, None]
@@ -0,0 +1,36 @@
+import numpy
+from insightface.app.common import Face
+
+from sinner.models.FacesDetection import FacesDetection
+from sinner.models.NumberedFrame import NumberedFrame
+
+
+def get_detection() -> FacesDetection:
+    face = Face(bbox=numpy.array([10, 20, 50, 80], dtype=numpy.float32), kps=numpy.array([[20, 40], [40, 40], [30, 50], [22, 65], [38, 65]], dtype=numpy.float32), det_score=0.9)
+    return FacesDetection([face], (100, 200, 3))
+
+
+def test_same_geometry() -> None:
+    detection = get_detection()
+    assert detection.for_frame(numpy.zeros((100, 200, 3), dtype=numpy.uint8)) is detection.faces
+
+
+def test_scaled_geometry() -> None:
+    detection = get_detection()
+    faces = detection.for_frame(numpy.zeros((200, 400, 3), dtype=numpy.uint8))
+    assert faces is not None
+    assert numpy.array_equal(faces[0].bbox, [20, 40, 100, 160])
+    assert numpy.array_equal(faces[0].kps[0], [40, 80])
+    assert faces[0].det_score == 0.9
+    assert numpy.array_equal(detection.faces[0].bbox, [10, 20, 50, 80])  # the original detection isn't changed
+
+
+def test_changed_proportions() -> None:
+    assert get_detection().for_frame(numpy.zeros((100, 100, 3), dtype=numpy.uint8)) is None
+
+
+def test_numbered_frame() -> None:
+    numbered_frame = NumberedFrame(0, numpy.zeros((100, 200, 3), dtype=numpy.uint8))
+    assert numbered_frame.detection is None
+    numbered_frame.detection = get_detection()
+    assert numbered_frame == NumberedFrame(0, numbered_frame.frame)  # the detection isn't compared
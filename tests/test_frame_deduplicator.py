@@ -0,0 +1,92 @@
+from typing import List
+
+import numpy
+
+from sinner.models.FrameDeduplicator import FrameDeduplicator
+from sinner.models.NumberedFrame import NumberedFrame
+from sinner.typing import Frame
+
+processed: List[int] = []
+
+
+def get_frame(value: int, shape: tuple[int, ...] = (360, 640, 3)) -> Frame:
+    return numpy.full(shape, value, dtype=numpy.uint8)
+
+
+def process(numbered_frame: NumberedFrame) -> NumberedFrame:
+    processed.append(numbered_frame.index)
+    return NumberedFrame(numbered_frame.index, 255 - numbered_frame.frame)
+
+
+def process_batch(numbered_frames: List[NumberedFrame]) -> List[NumberedFrame]:
+    return [process(numbered_frame) for numbered_frame in numbered_frames]
+
+
+def setup_function() -> None:
+    processed.clear()
+
+
+def test_process() -> None:
+    deduplicator = FrameDeduplicator(2)
+    results = [deduplicator.process(NumberedFrame(index, get_frame(value)), process) for index, value in enumerate([10, 10, 11, 20, 10])]
+    assert processed == [0, 3]  # similar frames reuse results, the frame 4 matches a recent frame
+    assert [result.index for result in results] == [0, 1, 2, 3, 4]
+    assert [int(result.frame[0, 0, 0]) for result in results] == [245, 245, 245, 235, 245]
+    assert deduplicator.statistics == {'duplicates': '3/5 (60%)'}
+
+
+def test_local_change() -> None:
+    deduplicator = FrameDeduplicator(2)
+    frame = get_frame(10)
+    changed_frame = frame.copy()
+    changed_frame[100:130, 200:230] = 200  # a small area is changed
+    deduplicator.process(NumberedFrame(0, frame), process)
+    deduplicator.process(NumberedFrame(1, changed_frame), process)
+    assert processed == [0, 1]
+
+
+def test_shapes() -> None:
+    deduplicator = FrameDeduplicator(2)
+    deduplicator.process(NumberedFrame(0, get_frame(10)), process)
+    deduplicator.process(NumberedFrame(1, get_frame(10, (720, 1280, 3))), process)
+    assert processed == [0, 1]
+
+
+def test_recent() -> None:
+    deduplicator = FrameDeduplicator(1, recent=2)
+    for index, value in enumerate([10, 20, 30, 10]):
+        deduplicator.process(NumberedFrame(index, get_frame(value)), process)
+    assert processed == [0, 1, 2, 3]  # the first frame result is already forgotten
+
+
+def test_clear() -> None:
+    deduplicator = FrameDeduplicator(1)
+    deduplicator.process(NumberedFrame(0, get_frame(10)), process)
+    deduplicator.clear()
+    deduplicator.process(NumberedFrame(1, get_frame(10)), process)
+    assert processed == [0, 1]
+
+
+def test_process_batch() -> None:
+    deduplicator = FrameDeduplicator(1)
+    deduplicator.process(NumberedFrame(0, get_frame(10)), process)
+    results = deduplicator.process_batch([NumberedFrame(index, get_frame(value)) for index, value in zip(range(1, 6), [10, 50, 50, 60, 10])], process_batch)
+    assert processed == [0, 2, 4]  # duplicates inside the batch are processed once
+    assert [result.index for result in results] == [1, 2, 3, 4, 5]
+    assert [int(result.frame[0, 0, 0]) for result in results] == [245, 205, 205, 195, 245]
+    assert deduplicator.statistics == {'duplicates': '3/6 (50%)'}
+    deduplicator.process(NumberedFrame(6, get_frame(60)), process)
+    assert processed == [0, 2, 4]  # batch results are remembered
+
+
+def test_results_isolation() -> None:
+    deduplicator = FrameDeduplicator(1)
+    first = deduplicator.process(NumberedFrame(0, get_frame(10)), process)
+    second = deduplicator.process(NumberedFrame(1, get_frame(10)), process)
+    first.frame[:10] = 0  # results are changed in place, e.g. by FacePaste
+    second.frame[:10] = 1
+    results = deduplicator.process_batch([NumberedFrame(index, get_frame(10)) for index in range(2, 4)], process_batch)
+    results[0].frame[:10] = 2
+    assert processed == [0]
+    assert [int(result.frame[0, 0, 0]) for result in [first, second, *results]] == [0, 1, 2, 245]
+    assert int(deduplicator.process(NumberedFrame(4, get_frame(10)), process).frame[0, 0, 0]) == 245  # the remembered result isn't changed
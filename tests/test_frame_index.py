@@ -0,0 +1,55 @@
+import json
+import os.path
+import shutil
+
+from sinner.handlers.frame.BaseFrameHandler import BaseFrameHandler
+from sinner.models.FrameIndex import FrameIndex
+from tests.constants import tmp_dir, target_mp4, TARGET_FC, TARGET_FPS
+
+index_path: str = BaseFrameHandler.cache_path(tmp_dir, 'FrameIndex', target_mp4)
+
+
+def setup_function():
+    setup()
+
+
+def setup():
+    #  clean previous results, if exists
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+
+
+def test_build() -> None:
+    assert os.path.exists(index_path) is False
+    index = FrameIndex(target_mp4, index_path)
+    assert os.path.exists(index_path) is True
+    assert TARGET_FC == len(index)
+    assert index.pts == sorted(index.pts)
+    assert round(index.pts[1] - index.pts[0], 3) == 1 / TARGET_FPS
+    assert index.keyframes == [0]
+
+
+def test_keyframes() -> None:
+    index = FrameIndex(target_mp4, index_path)
+    index.keyframes = [0, 3, 6]
+    assert index.keyframe(0) == 0
+    assert index.keyframe(2) == 0
+    assert index.keyframe(3) == 3
+    assert index.keyframe(9) == 6
+    assert index.pts[3] < index.seek_time(5) + index.start_time < index.pts[4]
+    assert index.pts[4] < index.select_time(5) < index.pts[5]
+
+
+def test_load() -> None:
+    FrameIndex(target_mp4, index_path)
+    with open(index_path) as index_file:
+        stored_index = json.load(index_file)
+    stored_index['pts'] = stored_index['pts'][:5]
+    with open(index_path, 'w') as index_file:
+        json.dump(stored_index, index_file)
+    assert 5 == len(FrameIndex(target_mp4, index_path))  # the stored index is used
+
+    stored_index['fingerprint']['size'] += 1
+    with open(index_path, 'w') as index_file:
+        json.dump(stored_index, index_file)
+    assert TARGET_FC == len(FrameIndex(target_mp4, index_path))  # the outdated index is rebuilt
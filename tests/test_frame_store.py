@@ -0,0 +1,70 @@
+import os.path
+import shutil
+
+import numpy
+import pytest
+
+from sinner.models.FrameStore import FrameStore
+from tests.constants import tmp_dir
+
+store_path: str = os.path.join(tmp_dir, 'FrameStore')
+
+
+def setup_function():
+    setup()
+
+
+def setup():
+    #  clean previous results, if exists
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+
+
+def make_frame(value: int) -> numpy.ndarray:
+    return numpy.full((4, 6, 3), value, dtype=numpy.uint8)
+
+
+def test_empty() -> None:
+    store = FrameStore(store_path, 10)
+    assert FrameStore.exists(store_path) is False
+    assert store.shape is None
+    assert store.count == 0
+    assert store.missing() == list(range(10))
+    assert store.written() == []
+
+
+def test_write_read() -> None:
+    store = FrameStore(store_path, 10)
+    for index in [0, 3, 9]:
+        store.write(index, make_frame(index))
+    assert FrameStore.exists(store_path) is True
+    assert store.shape == (4, 6, 3)
+    assert store.count == 3
+    assert store.is_written(3) is True
+    assert store.is_written(4) is False
+    assert store.written() == [0, 3, 9]
+    assert store.missing() == [1, 2, 4, 5, 6, 7, 8]
+    assert numpy.array_equal(store.read(9), make_frame(9))
+    assert [numbered_frame.index for numbered_frame in store.stream()] == [0, 3, 9]
+    with pytest.raises(Exception):
+        store.read(1)
+    with pytest.raises(Exception):
+        store.write(1, numpy.zeros((2, 2, 3), dtype=numpy.uint8))
+
+
+def test_reopen() -> None:
+    store = FrameStore(store_path, 10)
+    store.write(5, make_frame(5))
+    store.flush()
+
+    reopened = FrameStore(store_path)
+    assert len(reopened) == 10
+    assert reopened.written() == [5]
+    assert numpy.array_equal(reopened.read(5), make_frame(5))
+    reopened.write(6, make_frame(6))
+    assert store.count == 2  # the bitmap is shared through the mapped file
+
+    recreated = FrameStore(store_path, 20)  # another frames count means another target, the store is recreated
+    assert recreated.count == 0
+    recreated.write(0, make_frame(0))
+    assert len(FrameStore(store_path)) == 20
@@ -0,0 +1,111 @@
+import threading
+import time
+from typing import List
+
+import numpy
+import pytest
+
+from sinner.models.FramesPipeline import FramesPipeline
+from sinner.models.MemoryGovernor import MemoryGovernor
+from sinner.models.NumberedFrame import NumberedFrame
+
+FRAMES_COUNT: int = 50
+
+
+def extract(frame_index: int) -> NumberedFrame:
+    return NumberedFrame(frame_index, numpy.full((2, 2, 3), frame_index % 256, dtype=numpy.uint8))
+
+
+def process(numbered_frame: NumberedFrame) -> NumberedFrame:
+    numbered_frame.frame = numbered_frame.frame + 1
+    return numbered_frame
+
+
+def test_indexes() -> None:
+    saved: List[NumberedFrame] = []
+    done: List[int] = []
+    pipeline = FramesPipeline(extract=extract, process=process, save=saved.append, decode_workers=2, process_workers=3, save_workers=2, queue_size=4)
+    pipeline.run(range(FRAMES_COUNT), on_done=lambda numbered_frame: done.append(numbered_frame.index))
+    assert sorted(numbered_frame.index for numbered_frame in saved) == list(range(FRAMES_COUNT))
+    assert sorted(done) == list(range(FRAMES_COUNT))
+    assert all(numbered_frame.frame[0, 0, 0] == numbered_frame.index % 256 + 1 for numbered_frame in saved)
+    assert pipeline.depths == {'process': 0, 'save': 0}
+    assert set(pipeline.statistics.keys()) == {'queues', 'stalls'}
+
+
+def test_decoded_frames() -> None:
+    saved: List[int] = []
+    pipeline = FramesPipeline(extract=extract, process=process, save=lambda numbered_frame: saved.append(numbered_frame.index))
+    pipeline.run((extract(frame_index) for frame_index in range(FRAMES_COUNT)))
+    assert sorted(saved) == list(range(FRAMES_COUNT))
+
+
+def test_bounded_queues() -> None:
+    depths: List[int] = []
+    decoded: List[int] = []
+    lock = threading.Lock()
+
+    def slow_save(numbered_frame: NumberedFrame) -> None:
+        time.sleep(0.005)
+        with lock:
+            depths.append(len(decoded) - numbered_frame.index)
+
+    def counting_extract(frame_index: int) -> NumberedFrame:
+        with lock:
+            decoded.append(frame_index)
+        return extract(frame_index)
+
+    pipeline = FramesPipeline(extract=counting_extract, process=process, save=slow_save, queue_size=2)
+    pipeline.run(range(FRAMES_COUNT))
+    assert max(depths) <= 2 + 2 + 3  # both queues, and a frame in each stage worker
+    decode_stalls = pipeline.statistics['stalls'].split(', ')[0]  # 'decode <input wait>/<output wait>s'
+    assert float(decode_stalls.split('/')[1].rstrip('s')) > 0  # the decoder waited for the slow save stage
+
+
+def test_error() -> None:
+    def failing_process(numbered_frame: NumberedFrame) -> NumberedFrame:
+        if numbered_frame.index == 10:
+            raise Exception('Processing error')
+        return numbered_frame
+
+    saved: List[int] = []
+    pipeline = FramesPipeline(extract=extract, process=failing_process, save=lambda numbered_frame: saved.append(numbered_frame.index), process_workers=2)
+    stops: List[bool] = []
+    with pytest.raises(Exception, match='Processing error'):
+        pipeline.run(range(FRAMES_COUNT), on_stop=lambda: stops.append(True))
+    assert len(saved) < FRAMES_COUNT
+    assert stops == [True]  # the source is told once
+
+
+def test_memory_governor() -> None:
+    frame_size = extract(0).frame.nbytes
+    governor = MemoryGovernor(frame_size * 3)
+    peaks: List[int] = []
+
+    def save(_: NumberedFrame) -> None:
+        peaks.append(governor.used)
+
+    FramesPipeline(extract=extract, process=process, save=save, process_workers=4, queue_size=8, governor=governor).run(range(FRAMES_COUNT))
+    assert len(peaks) == FRAMES_COUNT
+    assert governor.peak <= frame_size * 3
+    assert governor.used == 0
+
+    with pytest.raises(Exception):
+        FramesPipeline(extract=extract, process=lambda numbered_frame: 1 / 0, save=save, governor=governor).run(range(FRAMES_COUNT))
+    assert governor.used == 0  # frames of the failed pipeline are released
+
+
+def test_batches() -> None:
+    saved: List[NumberedFrame] = []
+    batches: List[int] = []
+
+    def process_batch(numbered_frames: List[NumberedFrame]) -> List[NumberedFrame]:
+        batches.append(len(numbered_frames))
+        return [process(numbered_frame) for numbered_frame in numbered_frames]
+
+    pipeline = FramesPipeline(extract=extract, process=process, save=saved.append, process_workers=2, queue_size=8, process_batch=process_batch, batch_size=4, batch_latency=0.5)
+    pipeline.run(range(FRAMES_COUNT))
+    assert sorted(numbered_frame.index for numbered_frame in saved) == list(range(FRAMES_COUNT))
+    assert all(numbered_frame.frame[0, 0, 0] == numbered_frame.index % 256 + 1 for numbered_frame in saved)
+    assert max(batches) == 4
+    assert 'batch' in pipeline.statistics
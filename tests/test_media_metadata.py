@@ -0,0 +1,60 @@
+import json
+import os.path
+import shutil
+from argparse import Namespace
+
+from sinner.handlers.frame.BaseFrameHandler import BaseFrameHandler
+from sinner.handlers.frame.FFmpegVideoHandler import FFmpegVideoHandler
+from sinner.models.MediaMetadata import MediaMetadata
+from tests.constants import tmp_dir, target_mp4, TARGET_FC, TARGET_FPS, TARGET_RESOLUTION
+
+cache_path: str = BaseFrameHandler.cache_path(tmp_dir, 'MediaMetadata', target_mp4)
+
+
+def setup_function():
+    setup()
+
+
+def setup():
+    #  clean previous results, if exists
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+
+
+def test_empty() -> None:
+    metadata = MediaMetadata(target_mp4, cache_path)
+    assert metadata.loaded is False
+    assert metadata.complete is False
+    metadata.save()
+    assert os.path.exists(cache_path) is False
+
+
+def test_probe() -> None:
+    handler = FFmpegVideoHandler(target_mp4, Namespace(temp_dir=tmp_dir))
+    assert os.path.exists(cache_path) is True
+    assert handler.metadata.loaded is False
+    assert handler.fc == TARGET_FC
+    assert handler.fps == TARGET_FPS
+    assert handler.resolution == TARGET_RESOLUTION
+    assert round(handler.metadata.duration, 1) == round(TARGET_FC / TARGET_FPS, 1)
+
+    metadata = MediaMetadata(target_mp4, cache_path)
+    assert metadata.loaded is True
+    assert metadata.fc == TARGET_FC
+    assert metadata.fps == TARGET_FPS
+    assert metadata.resolution == TARGET_RESOLUTION
+
+
+def test_outdated() -> None:
+    FFmpegVideoHandler(target_mp4, Namespace(temp_dir=tmp_dir))
+    with open(cache_path) as cache_file:
+        stored_metadata = json.load(cache_file)
+    stored_metadata['fc'] = 1
+    with open(cache_path, 'w') as cache_file:
+        json.dump(stored_metadata, cache_file)
+    assert FFmpegVideoHandler(target_mp4, Namespace(temp_dir=tmp_dir)).fc == 1  # the stored metadata is used
+
+    stored_metadata['fingerprint']['mtime'] -= 1
+    with open(cache_path, 'w') as cache_file:
+        json.dump(stored_metadata, cache_file)
+    assert FFmpegVideoHandler(target_mp4, Namespace(temp_dir=tmp_dir)).fc == TARGET_FC  # the outdated metadata is reprobed
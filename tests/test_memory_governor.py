@@ -0,0 +1,45 @@
+import threading
+import time
+
+from sinner.models.MemoryGovernor import MemoryGovernor
+
+
+def test_accounting() -> None:
+    governor = MemoryGovernor(100)
+    assert governor.acquire(60) is True
+    assert governor.used == 60
+    governor.resize(60, 80)
+    assert governor.used == 80
+    assert governor.peak == 80
+    assert governor.acquire(40, timeout=0.01) is False  # doesn't fit the budget
+    governor.release(80)
+    assert governor.used == 0
+    assert governor.acquire(150) is True  # a single frame is allowed to exceed the budget
+    assert governor.peak == 150
+    assert 'memory_waits' in governor.statistics
+
+
+def test_unlimited() -> None:
+    governor = MemoryGovernor()
+    for _ in range(10):
+        assert governor.acquire(1024 ** 3, timeout=0) is True
+    assert governor.statistics['frames_memory'].endswith('/unlimited')
+
+
+def test_wait() -> None:
+    governor = MemoryGovernor(100)
+    governor.acquire(100)
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: governor.acquire(50) and acquired.set())
+    thread.start()
+    time.sleep(0.05)
+    assert acquired.is_set() is False
+    governor.release(100)
+    thread.join(1)
+    assert acquired.is_set() is True
+    assert governor.used == 50
+
+
+def test_shared() -> None:
+    assert MemoryGovernor.shared() is MemoryGovernor.shared(1024)
+    assert MemoryGovernor.shared().budget == 1024
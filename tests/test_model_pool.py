@@ -0,0 +1,41 @@
+import threading
+import time
+from typing import List
+
+from sinner.models.ModelPool import ModelPool
+
+
+def test_instances() -> None:
+    loaded: List[int] = []
+    pool = ModelPool(2, lambda slot: loaded.append(slot) or f'instance {slot}')  # type: ignore[func-returns-value]
+    with pool.instance() as instance:
+        assert instance == 'instance 0'
+    with pool.instance() as instance:  # the recently used instance is taken first
+        assert instance == 'instance 0'
+        with pool.instance() as other_instance:
+            assert other_instance == 'instance 1'
+    assert loaded == [0, 0, 1]
+
+
+def test_bounded() -> None:
+    active: List[int] = []
+    peak: List[int] = [0]
+    lock = threading.Lock()
+    pool = ModelPool(3, lambda slot: slot)
+
+    def work() -> None:
+        with pool.instance() as slot:
+            with lock:
+                assert slot not in active  # an instance is used by one thread at a time
+                active.append(slot)
+                peak[0] = max(peak[0], len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(slot)
+
+    threads = [threading.Thread(target=work) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 1 < peak[0] <= 3
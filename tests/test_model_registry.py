@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import List
+
+import pytest
+
+from sinner.models.ModelRegistry import ModelRegistry
+
+
+class Model:
+    pass
+
+
+def test_shared() -> None:
+    registry = ModelRegistry()
+    loads: List[int] = []
+
+    def loader() -> Model:
+        time.sleep(0.05)
+        loads.append(1)
+        return Model()
+
+    models: List[Model] = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get('model', loader, ['CPUExecutionProvider']))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1  # loaded once, despite simultaneous requests
+    assert all(model is models[0] for model in models)
+    assert len(registry.records) == 1
+    assert registry.records[0].load_time >= 0.05
+    assert registry.statistics.startswith('model (')
+
+
+def test_keys() -> None:
+    registry = ModelRegistry()
+    model = registry.get('model', Model, ['CPUExecutionProvider'], {'size': 1})
+    assert registry.get('model', Model, ['CPUExecutionProvider'], {'size': 1}) is model
+    assert registry.get('model', Model, ['CPUExecutionProvider'], {'size': 2}) is not model
+    assert registry.get('model', Model, ['CUDAExecutionProvider'], {'size': 1}) is not model
+    assert registry.get('another', Model, ['CPUExecutionProvider'], {'size': 1}) is not model
+    assert len(registry.records) == 4
+    registry.release()
+    assert registry.records == []
+
+
+def test_per_thread() -> None:
+    registry = ModelRegistry()
+    models: List[Model] = []
+    barrier = threading.Barrier(3)  # threads are alive simultaneously, so their identifiers aren't reused
+
+    def get() -> None:
+        models.append(registry.get('model', Model, [], policy=ModelRegistry.PER_THREAD))
+        barrier.wait()
+
+    threads = [threading.Thread(target=get) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(id(model) for model in models)) == 3
+    assert registry.get('model', Model, [], policy=ModelRegistry.PER_THREAD) is registry.get('model', Model, [], policy=ModelRegistry.PER_THREAD)
+    with pytest.raises(ValueError):
+        registry.get('model', Model, [], policy='unknown')
+
+
+def test_process_wide() -> None:
+    assert ModelRegistry.shared() is ModelRegistry.shared()
+
+
+def test_per_thread_same_names() -> None:
+    registry = ModelRegistry()
+    models: List[Model] = []
+    barrier = threading.Barrier(3)
+
+    def get() -> None:
+        models.append(registry.get('model', Model, [], policy=ModelRegistry.PER_THREAD))
+        barrier.wait()
+
+    threads = [threading.Thread(target=get, name='worker') for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(id(model) for model in models)) == 3  # threads are distinguished by identifiers, not names
+    assert registry.statistics.count('@worker') == 3
+
+
+def test_renew() -> None:
+    registry = ModelRegistry()
+    model = registry.get('model', Model, ['CPUExecutionProvider'])
+    another = registry.get('another', Model, ['CPUExecutionProvider'])
+    registry.renew()
+    assert registry.get('another', Model, ['CPUExecutionProvider']) is another  # the same key, the same instance
+    assert registry.get('model', Model, ['CUDAExecutionProvider']) is not model
+    assert len(registry.records) == 2  # the model with previous providers is forgotten, the requested one is kept
+    assert registry.get('model', Model, ['CPUExecutionProvider']) is not model
+    assert len(registry.records) == 3  # both models are requested in this generation
@@ -0,0 +1,96 @@
+import os
+
+import cv2
+import numpy
+import onnx
+import torch
+from insightface.app.common import Face
+
+from sinner.models.FaceAlignment import FaceAlignment
+from sinner.models.OnnxFaceEnhancer import OnnxFaceEnhancer
+from sinner.typing import Frame
+from tests.constants import tmp_dir
+
+identity_onnx: str = os.path.join(tmp_dir, 'identity.onnx')
+network_onnx: str = os.path.join(tmp_dir, 'network.onnx')
+
+
+class Network(torch.nn.Module):
+    """
+    A tiny network with the GFPGAN network call signature
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.convolution = torch.nn.Conv2d(3, 3, 3, padding=1)
+
+    def forward(self, x: torch.Tensor, return_rgb: bool = True, randomize_noise: bool = True) -> tuple[torch.Tensor, None]:
+        return torch.tanh(self.convolution(x)), None
+
+
+def setup_module() -> None:
+    os.makedirs(tmp_dir, exist_ok=True)
+    shape = ['batch', 3, FaceAlignment.SIZE, FaceAlignment.SIZE]
+    graph = onnx.helper.make_graph([onnx.helper.make_node('Identity', ['input'], ['output'])], 'identity', [onnx.helper.make_tensor_value_info('input', onnx.TensorProto.FLOAT, shape)], [onnx.helper.make_tensor_value_info('output', onnx.TensorProto.FLOAT, shape)])
+    onnx.save(onnx.helper.make_model(graph, opset_imports=[onnx.helper.make_opsetid('', 13)], ir_version=8), identity_onnx)
+
+
+def get_frame() -> Frame:
+    generator = numpy.random.default_rng(0)
+    return cv2.GaussianBlur(generator.integers(0, 256, (360, 640, 3), dtype=numpy.uint8), (15, 15), 0)  # the smooth image isn't changed much by warping
+
+
+def get_face(left: float, top: float, size: float) -> Face:
+    kps = FaceAlignment.TEMPLATE * size / FaceAlignment.SIZE + [left, top]
+    return Face(bbox=numpy.array([left, top, left + size, top + size], dtype=numpy.float32), kps=kps, det_score=0.9)
+
+
+def test_align() -> None:
+    frame = get_frame()
+    crop, affine = FaceAlignment.align(frame, get_face(100, 50, 256).kps)
+    assert crop.shape == (FaceAlignment.SIZE, FaceAlignment.SIZE, 3)
+    assert numpy.allclose(affine, [[2, 0, -200], [0, 2, -100]], atol=1e-3)
+
+
+def test_conversions() -> None:
+    crop = get_frame()[:FaceAlignment.SIZE // 2, :FaceAlignment.SIZE // 2]
+    tensor = FaceAlignment.to_tensor(crop)
+    assert tensor.shape == (1, 3, FaceAlignment.SIZE // 2, FaceAlignment.SIZE // 2)
+    assert tensor.min() >= -1 and tensor.max() <= 1
+    assert numpy.array_equal(FaceAlignment.to_image(tensor[0]), crop)
+
+
+def test_enhance_identity() -> None:
+    frame = get_frame()
+    enhancer = OnnxFaceEnhancer(identity_onnx, ['CPUExecutionProvider'])
+    result = enhancer.enhance(frame, [get_face(100, 50, 256), get_face(400, 100, 128)])
+    assert result.shape == frame.shape
+    assert numpy.abs(result.astype(numpy.int16) - frame.astype(numpy.int16)).mean() < 1  # faces are pasted back in place
+    assert numpy.array_equal(enhancer.enhance(frame, []), frame)
+
+
+def test_enhance_upscale() -> None:
+    frame = get_frame()
+    result = OnnxFaceEnhancer(identity_onnx, ['CPUExecutionProvider'], upscale=2).enhance(frame, [get_face(100, 50, 256)])
+    assert result.shape == (720, 1280, 3)
+
+
+def test_export_parity() -> None:
+    network = Network().eval()
+    OnnxFaceEnhancer.export_network(network, network_onnx)
+    enhancer = OnnxFaceEnhancer(network_onnx, ['CPUExecutionProvider'])
+    crops = [FaceAlignment.align(get_frame(), get_face(100, 50, 256).kps)[0], FaceAlignment.align(get_frame(), get_face(400, 100, 128).kps)[0]]
+    with torch.no_grad():
+        expected = [FaceAlignment.to_image(network(torch.from_numpy(FaceAlignment.to_tensor(crop)))[0][0].numpy()) for crop in crops]
+    for restored, expected_face in zip(enhancer.restore(crops), expected):
+        assert numpy.abs(restored.astype(numpy.int16) - expected_face.astype(numpy.int16)).max() <= 1
+
+
+def test_enhance_roi() -> None:
+    frame = get_frame()
+    enhancer = OnnxFaceEnhancer(identity_onnx, ['CPUExecutionProvider'], upscale=2)
+    faces = [get_face(100, 50, 256), get_face(400, 100, 128)]
+    result = enhancer.enhance(frame, faces, roi=True)
+    assert result.shape == (720, 1280, 3)
+    assert numpy.abs(result.astype(numpy.int16) - enhancer.enhance(frame, faces).astype(numpy.int16)).mean() < 1
+    assert numpy.array_equal(enhancer.enhance(frame, [], roi=True), FaceAlignment.upscale(frame, 2))
@@ -0,0 +1,55 @@
+import os.path
+import shutil
+from pathlib import Path
+
+from sinner.models.ProgressJournal import ProgressJournal
+from tests.constants import tmp_dir
+
+journal_path: str = os.path.join(tmp_dir, '.png.journal')
+
+
+def setup_function():
+    setup()
+
+
+def setup():
+    #  clean previous results, if exists
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    Path(tmp_dir).mkdir(parents=True)
+
+
+def test_append_replay() -> None:
+    journal = ProgressJournal(journal_path)
+    assert journal.loaded is False
+    assert len(journal) == 0
+    for index in [3, 0, 1]:
+        journal.append(index, f'{index}.png')
+    assert len(journal) == 3
+    assert 3 in journal
+    assert 2 not in journal
+    assert journal.indexes() == [0, 1, 3]
+    assert journal.missing(5) == [2, 4]
+
+    journal = ProgressJournal(journal_path)
+    assert journal.loaded is True
+    assert journal.indexes() == [0, 1, 3]
+    assert dict(journal.items())[3] == '3.png'
+
+
+def test_interrupted_write() -> None:
+    with open(journal_path, 'w') as journal_file:
+        journal_file.write('0\t0.png\n1\t1.p')
+    journal = ProgressJournal(journal_path)
+    assert journal.indexes() == [0]
+    journal.append(2, '2.png')
+    assert ProgressJournal(journal_path).indexes() == [0, 2]
+
+
+def test_replace() -> None:
+    journal = ProgressJournal(journal_path)
+    journal.append(0, '0.png')
+    journal.replace({5: '5.png', 6: '6.png'})
+    assert ProgressJournal(journal_path).indexes() == [5, 6]
+    with open(journal_path) as journal_file:
+        assert len(journal_file.readlines()) == 2
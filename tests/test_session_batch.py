@@ -0,0 +1,100 @@
+from typing import List, Dict, Any
+
+import insightface
+import numpy
+import pytest
+
+from sinner.models.SessionBatch import SessionBatch
+
+
+class Node:
+    name: str
+    shape: List[Any]
+
+    def __init__(self, name: str, shape: List[Any]):
+        self.name = name
+        self.shape = shape
+
+
+class Session:
+    runs: List[int]
+    batch: Any
+
+    def __init__(self, batch: Any = 'batch'):
+        self.runs = []
+        self.batch = batch
+
+    def get_inputs(self) -> List[Node]:
+        return [Node('input', [self.batch, 3])]
+
+    def run(self, output_names: List[str], feeds: Dict[str, numpy.ndarray]) -> List[numpy.ndarray]:  # type: ignore[type-arg]
+        data = feeds['input']
+        self.runs.append(data.shape[0])
+        return [data * 2, numpy.repeat(data.sum(axis=1), 2)]  # batched and concatenated (two rows per sample) outputs
+
+
+class Model:
+    session: Session
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get(self, value: float, size: int = 3) -> tuple[float, float]:
+        doubled, sums = self.session.run(['doubled', 'sums'], {'input': numpy.full((1, size), value)})
+        assert doubled.shape == (1, size) and sums.shape == (2,)
+        return float(doubled[0, 0]), float(sums[0])
+
+
+def test_batch() -> None:
+    model = Model(Session())
+    results = SessionBatch.run(model, [lambda used_model, value=value: used_model.get(value) for value in range(5)])  # type: ignore[misc]
+    assert results == [(value * 2, value * 3) for value in range(5)]
+    assert model.session.runs == [5]
+
+
+def test_shapes_groups() -> None:
+    model = Model(Session())
+    results = SessionBatch.run(model, [lambda used_model: used_model.get(1), lambda used_model: used_model.get(2, 4), lambda used_model: used_model.get(3)])
+    assert results == [(2, 3), (4, 8), (6, 9)]
+    assert sorted(model.session.runs) == [1, 2]
+
+
+def test_fixed_batch() -> None:
+    model = Model(Session(1))
+    assert not SessionBatch.is_batchable(model)
+    results = SessionBatch.run(model, [lambda used_model, value=value: used_model.get(value) for value in range(3)])  # type: ignore[misc]
+    assert results == [(value * 2, value * 3) for value in range(3)]
+    assert model.session.runs == [1, 1, 1]
+
+
+class TwiceRunningModel(Model):
+    def get(self, value: float, size: int = 3) -> tuple[float, float]:
+        self.session.run(['doubled', 'sums'], {'input': numpy.full((1, size), value)})
+        return super().get(value, size)
+
+
+class RandomInputModel(Model):
+    def get(self, value: float, size: int = 3) -> tuple[float, float]:
+        doubled, sums = self.session.run(['doubled', 'sums'], {'input': numpy.random.default_rng().random((1, size)) + value})
+        return float(doubled[0, 0]), float(sums[0])
+
+
+def test_unbatchable_calls() -> None:
+    for model in [TwiceRunningModel(Session()), RandomInputModel(Session())]:
+        with pytest.raises(RuntimeError):  # wrong results aren't returned silently
+            SessionBatch.run(model, [lambda used_model, value=value: used_model.get(value) for value in range(3)])  # type: ignore[misc]
+
+
+def test_insightface_versions(monkeypatch) -> None:
+    class InsightfaceModel(Model):
+        pass
+
+    InsightfaceModel.__module__ = 'insightface.model_zoo.model'
+    model = InsightfaceModel(Session())
+    monkeypatch.setattr(insightface, '__version__', SessionBatch.INSIGHTFACE_VERSIONS[0])
+    assert SessionBatch.is_batchable(model)
+    monkeypatch.setattr(insightface, '__version__', '0.0.1')  # wrappers of unknown versions may run sessions differently
+    assert not SessionBatch.is_batchable(model)
+    results = SessionBatch.run(model, [lambda used_model, value=value: used_model.get(value) for value in range(3)])  # type: ignore[misc]
+    assert results == [(value * 2, value * 3) for value in range(3)]
+    assert model.session.runs == [1, 1, 1]
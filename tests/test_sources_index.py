@@ -0,0 +1,65 @@
+import os.path
+import shutil
+from pathlib import Path
+from typing import List
+
+from PIL import Image
+
+from sinner.models.SourcesIndex import SourcesIndex
+from tests.constants import tmp_dir, source_jpg
+
+index_path: str = os.path.join(tmp_dir, SourcesIndex.__name__, 'thumbnails.db')
+image_path: str = os.path.join(tmp_dir, 'source.jpg')
+made: List[str] = []
+
+
+def make_thumbnail(image: Image.Image, size: int) -> Image.Image:
+    made.append(image.filename)  # type: ignore[attr-defined]
+    thumbnail = image.copy()
+    thumbnail.thumbnail((size, size))
+    return thumbnail
+
+
+def setup_function():
+    setup()
+
+
+def setup():
+    #  clean previous results, if exists
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    Path(tmp_dir).mkdir(parents=True)
+    shutil.copy(source_jpg, image_path)
+    made.clear()
+
+
+def test_index() -> None:
+    index = SourcesIndex(index_path, 100, make_thumbnail)
+    assert index.get(image_path) is None
+    assert max(index.thumbnail(image_path).size) == 100
+    assert len(index) == 1
+    index.close()
+
+    index = SourcesIndex(index_path, 100, make_thumbnail)  # thumbnails are taken from the stored index
+    thumbnail = index.get(image_path)
+    assert thumbnail is not None
+    assert max(thumbnail.size) == 100
+    assert max(index.thumbnail(image_path).size) == 100
+    assert made == [image_path]
+    index.close()
+
+
+def test_outdated() -> None:
+    index = SourcesIndex(index_path, 100, make_thumbnail)
+    index.thumbnail(image_path)
+    os.utime(image_path, (0, 0))  # the image is changed
+    assert index.get(image_path) is None
+    index.thumbnail(image_path)
+    index.close()
+
+    index = SourcesIndex(index_path, 50, make_thumbnail)  # thumbnails of another size
+    assert index.get(image_path) is None
+    assert max(index.thumbnail(image_path).size) == 50
+    assert len(index) == 1
+    assert made == [image_path] * 3
+    index.close()
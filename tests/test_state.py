@@ -3,13 +3,15 @@ import shutil
 from argparse import Namespace
 from typing import List
 
+import numpy
 import pytest
 
 from sinner.Parameters import Parameters
-from sinner.helpers.FrameHelper import EmptyFrame
+from sinner.helpers.FrameHelper import EmptyFrame, write_to_image
+from sinner.models.FrameStore import FrameStore
 from sinner.models.State import State
 from sinner.models.NumberedFrame import NumberedFrame
-from tests.constants import tmp_dir, target_mp4, source_jpg, target_png, TARGET_FC, state_frames_dir
+from tests.constants import tmp_dir, target_mp4, source_jpg, target_png, TARGET_FC, state_frames_dir, images_dir
 
 parameters: Namespace = Parameters(f'--frame-processor=DummyProcessor --source-path="{source_jpg}" --target-path="{target_mp4}" --output-path="{tmp_dir}"').parameters
 
@@ -84,18 +86,21 @@ def test_states() -> None:
     assert state.unprocessed_frames_count == 10
 
     copy_files(state_frames_dir, state.path, ['00.png'])
+    state.sync()  # files are copied outside the state
     assert state.is_started is True
     assert state.is_finished is False
     assert state.processed_frames_count == 1
     assert state.unprocessed_frames_count == 9
 
     copy_files(state_frames_dir, state.path, ['01.png', '02.png', '03.png', '04.png'])
+    state.sync()  # files are copied outside the state
     assert state.is_started is True
     assert state.is_finished is False
     assert state.processed_frames_count == 5
     assert state.unprocessed_frames_count == 5
 
     copy_files(state_frames_dir, state.path, ['05.png', '06.png', '07.png', '08.png', '09.png'])
+    state.sync()  # files are copied outside the state
     assert state.is_started is False
     assert state.is_finished is True
     assert state.processed_frames_count == 10
@@ -121,3 +126,69 @@ def test_final_check_fail_zero_files():
     with open(os.path.join(state.path, '04.png'), 'r+') as file:
         file.truncate(0)
     assert state.final_check() == (False, [])
+
+
+def test_temp_format() -> None:
+    state = State(parameters=Namespace(temp_format='npy'), target_path=target_mp4, temp_dir=tmp_dir, frames_count=3, processor_name='DummyProcessor')
+    assert state.get_frame_processed_name(NumberedFrame(1, EmptyFrame)).endswith('1.npy')
+    for frame_index in [0, 2]:
+        state.save_temp_frame(NumberedFrame(frame_index, EmptyFrame))
+    write_to_image(EmptyFrame, os.path.join(state.path, '1.png'))  # frames of another format are ignored
+    assert state.processed_frames_count == 2
+    assert state.is_started is True
+    assert state.final_check() == (False, [1])
+    state.save_temp_frame(NumberedFrame(1, EmptyFrame))
+    assert state.final_check() == (True, [])
+
+
+def test_frame_store() -> None:
+    state = State(parameters=Namespace(temp_format='mmap'), target_path=target_mp4, temp_dir=tmp_dir, frames_count=3, processor_name='DummyProcessor')
+    assert state.is_started is False
+    for frame_index in [0, 2]:
+        state.save_temp_frame(NumberedFrame(frame_index, EmptyFrame))
+    assert os.path.exists(os.path.join(state.path, 'frames.npy')) is True
+    assert state.processed_frames_count == 2
+    assert state.processed_frames_indexes == [0, 2]
+    assert state.final_check() == (False, [1])
+    state.save_temp_frame(NumberedFrame(1, EmptyFrame))
+    assert state.final_check() == (True, [])
+    assert state.read_temp_frame(1).shape == EmptyFrame.shape
+
+
+def test_journal() -> None:
+    state = State(parameters=Namespace(), target_path=target_mp4, temp_dir=tmp_dir, frames_count=3, processor_name='DummyProcessor')
+    for frame_index in [0, 2]:
+        state.save_temp_frame(NumberedFrame(frame_index, EmptyFrame))
+    state.save_temp_frame(NumberedFrame(1, EmptyFrame, 'named'))
+    assert os.path.exists(os.path.join(state.path, '.png.journal')) is True
+
+    state = State(parameters=Namespace(), target_path=target_mp4, temp_dir=tmp_dir, frames_count=3, processor_name='DummyProcessor')
+    assert state.processed_frames_count == 3  # replayed from the journal
+    assert state.processed_frames_indexes == [0, 1, 2]
+    assert state.processed_frames[1] == os.path.join(state.path, 'named.png')
+    os.remove(os.path.join(state.path, 'named.png'))
+    assert state.is_finished is True  # the directory isn't checked until asked
+    assert state.final_check() == (False, [1])
+    assert state.processed_frames_count == 2
+
+
+def test_journal_named_frames() -> None:
+    state = State(parameters=Namespace(), target_path=images_dir, temp_dir=tmp_dir, frames_count=3, processor_name='DummyProcessor')
+    for frame_index, name in enumerate(['juel', 'olivia', 'scarlett']):  # frames of the directory target are named as target files
+        state.save_temp_frame(NumberedFrame(frame_index, EmptyFrame, name))
+    os.remove(os.path.join(state.path, '.png.journal'))
+
+    state = State(parameters=Namespace(), target_path=images_dir, temp_dir=tmp_dir, frames_count=3, processor_name='DummyProcessor')
+    assert state.processed_frames_indexes == [0, 1, 2]  # rebuilt from the directory
+    assert state.processed_frames[1] == os.path.join(state.path, 'olivia.png')
+    assert state.read_temp_frame(2).shape == EmptyFrame.shape
+
+
+def test_frame_store_mixed_shapes() -> None:
+    state = State(parameters=Namespace(temp_format='mmap'), target_path=images_dir, temp_dir=tmp_dir, frames_count=3, processor_name='DummyProcessor')
+    assert state.temp_format == FrameStore.FALLBACK_FORMAT  # images of the target have different sizes
+    for frame_index, shape in enumerate([(2, 2, 3), (3, 2, 3), (2, 4, 3)]):
+        state.save_temp_frame(NumberedFrame(frame_index, numpy.zeros(shape, dtype=numpy.uint8)))
+    assert state.final_check() == (True, [])
+    assert state.read_temp_frame(1).shape == (3, 2, 3)
+    assert State(parameters=Namespace(temp_format='mmap'), target_path=target_mp4, temp_dir=tmp_dir, frames_count=3, processor_name='DummyProcessor').temp_format == FrameStore.FORMAT
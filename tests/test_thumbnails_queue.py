@@ -0,0 +1,63 @@
+import threading
+from typing import List
+
+from sinner.models.ThumbnailsQueue import ThumbnailsQueue
+
+
+def show(queue: ThumbnailsQueue[str], shown: List[str]) -> None:
+    for position, thumbnail in queue.take():
+        shown.insert(position, thumbnail)
+
+
+def test_order() -> None:
+    queue: ThumbnailsQueue[str] = ThumbnailsQueue()
+    tokens = [queue.add() for _ in range(5)]
+    shown: List[str] = []
+    for number in [3, 1]:
+        queue.put(*tokens[number], f'thumbnail{number}')
+    show(queue, shown)
+    assert shown == ['thumbnail1', 'thumbnail3']
+    assert queue.pending == 3
+    for number in [4, 0, 2]:
+        queue.put(*tokens[number], f'thumbnail{number}')
+    show(queue, shown)
+    assert shown == [f'thumbnail{number}' for number in range(5)]  # shown in the order of addition
+    assert queue.pending == 0
+
+
+def test_threads() -> None:
+    queue: ThumbnailsQueue[str] = ThumbnailsQueue()
+    tokens = [queue.add() for _ in range(20)]
+    threads = [threading.Thread(target=queue.put, args=(*token, f'thumbnail{number:02d}')) for number, token in reversed(list(enumerate(tokens)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    shown: List[str] = []
+    show(queue, shown)
+    assert shown == sorted(shown) and len(shown) == 20
+
+
+def test_skipped() -> None:
+    queue: ThumbnailsQueue[str] = ThumbnailsQueue()
+    first, second = queue.add(), queue.add()
+    queue.put(*first, None)  # an unreadable image
+    queue.put(*second, 'thumbnail')
+    assert queue.take() == [(0, 'thumbnail')]
+    assert queue.pending == 0
+
+
+def test_generations() -> None:
+    queue: ThumbnailsQueue[str] = ThumbnailsQueue()
+    shown: List[str] = []
+    stale = queue.add()
+    queue.put(*queue.add(), 'old')
+    show(queue, shown)
+    queue.clear()
+    shown = []
+    queue.put(*stale, 'stale')  # made after clearing, but added before
+    current = queue.add()
+    queue.put(*current, 'new')
+    show(queue, shown)
+    assert shown == ['new']
+    assert queue.pending == 0